@@ -3,10 +3,11 @@
 import os
 import shutil
 import json
-from flask import Flask, request, jsonify, send_from_directory, abort, url_for
+from flask import Flask, request, jsonify, send_from_directory, abort, url_for, Response, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
-from checkpoint_alpha import process_folder
+from checkpoint_alpha import process_folder, configure_ner_scheduler, configure_document_cache
+from jobs import JobManager, DONE, DEFAULT_JOBS_DIR, DEFAULT_JOB_WORKERS, DEFAULT_JOB_TTL_SECONDS
 import boto3
 import mimetypes
 
@@ -23,6 +24,30 @@ OUTPUT_FOLDER = '/Users/yashwantbalaji/Library/Mobile Documents/com~apple~CloudD
 os.makedirs(INPUT_FOLDER, exist_ok=True)
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
+# NER micro-batching across concurrent uploads. A larger batch or longer wait
+# raises throughput under load at the cost of per-request latency.
+configure_ner_scheduler(
+    enabled=os.environ.get('NER_SCHEDULER_ENABLED', '1') != '0',
+    max_batch_size=int(os.environ.get('NER_MAX_BATCH_SIZE', '32')),
+    max_wait_ms=float(os.environ.get('NER_MAX_WAIT_MS', '10'))
+)
+
+# Repeat uploads of the same document are answered from this cache.
+# Clear it with `python document_cache.py --clear` after changing models or rules.
+configure_document_cache(
+    enabled=os.environ.get('DOCUMENT_CACHE_ENABLED', '1') != '0',
+    cache_dir=os.environ.get('DOCUMENT_CACHE_DIR', os.path.join('cache', 'documents')),
+    max_bytes=int(os.environ.get('DOCUMENT_CACHE_MAX_MB', '1024')) * 1024 * 1024
+)
+
+# Background processing for POST /jobs. Every job runs in its own workspace under JOBS_DIR.
+job_manager = JobManager(
+    process_folder,
+    root=os.environ.get('JOBS_DIR', DEFAULT_JOBS_DIR),
+    workers=int(os.environ.get('JOB_WORKERS', DEFAULT_JOB_WORKERS)),
+    ttl_seconds=float(os.environ.get('JOB_TTL_SECONDS', DEFAULT_JOB_TTL_SECONDS))
+)
+
 # Allowed file extensions for upload
 ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg', 'tiff', 'bmp'}
 
@@ -47,6 +72,41 @@ def clear_output_folder():
         except Exception as e:
             print(f'Error deleting file {file_path}: {e}')
 
+def parse_pii_types(pii_options):
+    """
+    Turns the piiOptions form field into the pii_types flags used by process_folder.
+    Raises ValueError if the field is not valid JSON.
+    """
+    try:
+        pii_flags = json.loads(pii_options)
+    except json.JSONDecodeError as e:
+        raise ValueError(f'Error parsing PII options: {e}')
+    print(f"Received PII Options: {pii_flags}")
+
+    # Initialize default pii_types
+    pii_types = {
+        'person': False,
+        'address': False,
+        'org': False,
+        'aadhar': False,
+        'pan': False,
+        'dob': False,
+        'dl': False,
+        'voter': False,
+        'ration_card': False,
+        'birth_certificate': False,
+        'passport': False,
+    }
+
+    # Update pii_types
+    for key in pii_flags:
+        if key in pii_types:
+            pii_types[key] = pii_flags[key]
+            print(f"Updated pii_types[{key}] to {pii_flags[key]}")
+        else:
+            print(f"Received unknown PII type: {key}")
+    return pii_types
+
 @app.route('/upload', methods=['POST'])
 def upload_files():
     # Clear output folder at the start of each new upload to remove old files
@@ -62,33 +122,9 @@ def upload_files():
         return jsonify({'error': 'No PII options provided'}), 400
 
     try:
-        pii_flags = json.loads(pii_options)
-        print(f"Received PII Options: {pii_flags}")
-
-        # Initialize default pii_types
-        pii_types = {
-            'person': False,
-            'address': False,
-            'org': False,
-            'aadhar': False,
-            'pan': False,
-            'dob': False,
-            'dl': False,
-            'voter': False,
-            'ration_card': False,
-            'birth_certificate': False,
-            'passport': False,
-        }
-
-        # Update pii_types
-        for key in pii_flags:
-            if key in pii_types:
-                pii_types[key] = pii_flags[key]
-                print(f"Updated pii_types[{key}] to {pii_flags[key]}")
-            else:
-                print(f"Received unknown PII type: {key}")
-    except json.JSONDecodeError as e:
-        return jsonify({'error': f'Error parsing PII options: {e}'}), 400
+        pii_types = parse_pii_types(pii_options)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Unexpected error: {e}'}), 400
 
@@ -132,6 +168,96 @@ def download_file(filename):
     except FileNotFoundError:
         abort(404)
 
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """
+    Queues the uploaded files for redaction and returns the job id immediately.
+    Poll GET /jobs/<job_id> for progress.
+    """
+    if 'files' not in request.files:
+        return jsonify({'error': 'No files uploaded'}), 400
+
+    pii_options = request.form.get('piiOptions')
+    if not pii_options:
+        return jsonify({'error': 'No PII options provided'}), 400
+
+    try:
+        pii_types = parse_pii_types(pii_options)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    files = [file for file in request.files.getlist('files') if file and allowed_file(file.filename)]
+    if not files:
+        return jsonify({'error': 'No supported files uploaded'}), 400
+
+    job = job_manager.create_job(pii_types)
+    for file in files:
+        filename = secure_filename(file.filename)
+        file.save(os.path.join(job.input_dir, filename))
+        job_manager.add_file(job, filename)
+    job_manager.start(job)
+
+    return jsonify({'job_id': job.id, 'status_url': url_for('get_job', job_id=job.id, _external=True)}), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        abort(404)
+
+    state = job_manager.snapshot(job)
+    for file in state['files']:
+        if file['status'] == DONE and file['output']:
+            file['download_url'] = url_for('download_job_file', job_id=job.id, filename=file['output'], _external=True)
+    return jsonify(state), 200
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Streams the progress of a job as server-sent events.
+
+    Events: 'job' (status), 'file' (status, output, error and download_url once done),
+    'page' (page, stage 'ocr' | 'detect' | 'redact', ms and lines or entities) and
+    'timings' (per-stage totals of a file). The stream replays the job from the start,
+    or from after the Last-Event-ID a reconnecting client sends, and ends with the job.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        abort(404)
+
+    try:
+        start = int(request.headers.get('Last-Event-ID', -1)) + 1
+    except ValueError:
+        start = 0
+
+    def stream():
+        for item in job_manager.iter_events(job, start=start):
+            if item is None:
+                # Keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            index, event = item
+            data = dict(event['data'])
+            if event['event'] == 'file' and data.get('status') == DONE and data.get('output'):
+                data['download_url'] = url_for('download_job_file', job_id=job.id, filename=data['output'], _external=True)
+            yield f"id: {index}\nevent: {event['event']}\ndata: {json.dumps(data)}\n\n"
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/jobs/<job_id>/download/<filename>', methods=['GET'])
+def download_job_file(job_id, filename):
+    job = job_manager.get(job_id)
+    if job is None:
+        abort(404)
+    try:
+        return send_from_directory(job.output_dir, filename, as_attachment=True)
+    except FileNotFoundError:
+        abort(404)
+
 # Hardcode S3 credentials and bucket info for demonstration
 AWS_ACCESS_KEY_ID = "addkeyhere"
 AWS_SECRET_ACCESS_KEY = "addkeyhere"
@@ -152,7 +278,17 @@ def send_to_s3():
     if not filename:
         return jsonify({'error': 'No filename provided'}), 400
 
-    local_filepath = os.path.join(OUTPUT_FOLDER, filename)
+    # Files produced by POST /jobs live in the job's workspace
+    output_folder = OUTPUT_FOLDER
+    job_id = data.get('job_id')
+    if job_id:
+        job = job_manager.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job does not exist'}), 404
+        output_folder = job.output_dir
+
+    filename = secure_filename(filename)
+    local_filepath = os.path.join(output_folder, filename)
     if not os.path.exists(local_filepath):
         return jsonify({'error': 'File does not exist'}), 404
 
@@ -2,16 +2,71 @@
 
 import os
 import shutil
+import time
 import warnings
 import re
 import fitz  # PyMuPDF
 from PIL import Image, ImageDraw
-from doctr.models import ocr_predictor
 from doctr.io import DocumentFile
-from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
+from model_registry import get_ner_pipeline, get_ocr_predictor, ENGLISH_NER_MODEL, DOCTR_OCR_MODEL
+from document_cache import get_document_cache, make_document_key, hash_file, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
+from ner_scheduler import get_ner_scheduler, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS
 
 warnings.filterwarnings("ignore")
 
+# Number of OCR lines sent through the NER model per forward pass
+NER_BATCH_SIZE = 16
+
+# Cross-request micro-batching of NER lines (see configure_ner_scheduler)
+NER_SCHEDULER_SETTINGS = {
+    'enabled': True,
+    'max_batch_size': DEFAULT_MAX_BATCH_SIZE,
+    'max_wait_ms': DEFAULT_MAX_WAIT_MS
+}
+
+def configure_ner_scheduler(enabled=True, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+    """
+    Configures how NER lines from concurrent uploads are grouped into micro-batches.
+
+    Parameters:
+        enabled (bool): Route NER through the shared scheduler instead of running it per request.
+        max_batch_size (int): Number of queued lines that triggers a forward pass.
+        max_wait_ms (float): Longest time a request waits for other requests to fill the batch.
+    """
+    NER_SCHEDULER_SETTINGS.update({
+        'enabled': enabled,
+        'max_batch_size': max_batch_size,
+        'max_wait_ms': max_wait_ms
+    })
+
+# Bump when detection rules or redaction output change so cached results are not reused
+DETECTION_VERSION = 1
+
+# Whole-document result cache (see configure_document_cache)
+DOCUMENT_CACHE_SETTINGS = {
+    'enabled': True,
+    'cache_dir': DEFAULT_CACHE_DIR,
+    'max_bytes': DEFAULT_MAX_BYTES
+}
+
+def configure_document_cache(enabled=True, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Configures the cache that serves repeat uploads of the same document without reprocessing.
+
+    Parameters:
+        enabled (bool): Look up and store results by document content hash.
+        cache_dir (str): Directory holding the cached outputs.
+        max_bytes (int): Size limit of the cache; least recently used entries are evicted.
+    """
+    DOCUMENT_CACHE_SETTINGS.update({
+        'enabled': enabled,
+        'cache_dir': cache_dir,
+        'max_bytes': max_bytes
+    })
+
+def document_cache_version():
+    return f"{ENGLISH_NER_MODEL}|{DOCTR_OCR_MODEL}|v{DETECTION_VERSION}"
+
 def load_pii_config():
     """
     Loads PII configuration.
@@ -57,57 +112,113 @@ def extract_text_and_coords(file_path):
         file_path (str): Path to the image or PDF file.
 
     Returns:
-        List[dict]: A list of dictionaries containing 'text', 'left', 'top', 'width', 'height' for each line.
+        List[dict]: A list of dictionaries containing 'text', 'left', 'top', 'width', 'height' and
+                    the zero-based 'page' index for each line.
     """
     try:
         config = load_pii_config()  # Load PII configurations if any
-        # Initialize OCR model if not already done
-        if not hasattr(extract_text_and_coords, "ocr_model"):
-            extract_text_and_coords.ocr_model = ocr_predictor(pretrained=True)
-
-        ocr_model = extract_text_and_coords.ocr_model
-
-        # Determine if file is PDF or image
-        if file_path.lower().endswith(".pdf"):
-            try:
-                doc = DocumentFile.from_pdf(file_path)
-            except Exception as e:
-                print(f"Error reading PDF with docTR: {e}")
-                print("Attempting to convert PDF to images using PyMuPDF...")
-                image_paths = pdf_to_images(file_path)
-                doc = DocumentFile.from_images(image_paths)
-        else:
-            doc = DocumentFile.from_images(file_path)
+        # Shared with every request handled by this process
+        ocr_model = get_ocr_predictor()
 
-        result = ocr_model(doc)
+        result = ocr_model(load_document_pages(file_path))
 
         extracted_data = []
-        # docTR returns normalized coordinates (relative to page width/height)
-        for page in result.pages:
-            for block in page.blocks:
-                for line_obj in block.lines:
-                    line_text = " ".join(word.value for word in line_obj.words)
-                    # geometry: ((x0, y0), (x1, y1))
-                    (x0, y0), (x1, y1) = line_obj.geometry
-                    # Convert normalized coords into width/height
-                    left = float(x0)
-                    top = float(y0)
-                    width = float(x1 - x0)
-                    height = float(y1 - y0)
-                    
-                    extracted_data.append({
-                        'text': line_text,
-                        'left': left,
-                        'top': top,
-                        'width': width,
-                        'height': height
-                    })
+        for page_index, page in enumerate(result.pages):
+            extracted_data.extend(lines_from_ocr_page(page, page_index))
 
         return extracted_data
     except Exception as e:
         print(f"Error during OCR extraction: {e}")
         return []
 
+def load_document_pages(file_path):
+    """
+    Loads the pages of an image or PDF as docTR input.
+    """
+    # Determine if file is PDF or image
+    if file_path.lower().endswith(".pdf"):
+        try:
+            return DocumentFile.from_pdf(file_path)
+        except Exception as e:
+            print(f"Error reading PDF with docTR: {e}")
+            print("Attempting to convert PDF to images using PyMuPDF...")
+            image_paths = pdf_to_images(file_path)
+            return DocumentFile.from_images(image_paths)
+    return DocumentFile.from_images(file_path)
+
+def lines_from_ocr_page(page, page_index):
+    """
+    Converts one docTR result page into line dictionaries.
+    """
+    lines = []
+    # docTR returns normalized coordinates (relative to page width/height)
+    for block in page.blocks:
+        for line_obj in block.lines:
+            line_text = " ".join(word.value for word in line_obj.words)
+            # geometry: ((x0, y0), (x1, y1))
+            (x0, y0), (x1, y1) = line_obj.geometry
+            # Convert normalized coords into width/height
+            left = float(x0)
+            top = float(y0)
+            width = float(x1 - x0)
+            height = float(y1 - y0)
+
+            lines.append({
+                'text': line_text,
+                'left': left,
+                'top': top,
+                'width': width,
+                'height': height,
+                'page': page_index
+            })
+    return lines
+
+def extract_and_detect_by_page(file_path, pii_types, on_event):
+    """
+    OCRs and scans one page at a time, reporting every page as it finishes each stage.
+
+    Detection results match find_pii_entities over the whole document: dates already
+    found on an earlier page are not reported again.
+
+    Parameters:
+        on_event (callable): Called as on_event('page', page=..., pages=..., stage='ocr'|'detect',
+                             ms=..., lines=... or entities=...).
+
+    Returns:
+        tuple: (extracted_data, detected_pii, timings) with the total 'ocr_ms' and 'detect_ms'.
+    """
+    extracted_data = []
+    detected_pii = []
+    found_dates = set()
+    timings = {'ocr_ms': 0.0, 'detect_ms': 0.0}
+    try:
+        ocr_model = get_ocr_predictor()
+        pages = load_document_pages(file_path)
+    except Exception as e:
+        print(f"Error during OCR extraction: {e}")
+        return extracted_data, detected_pii, timings
+
+    for page_index, page_image in enumerate(pages):
+        start = time.perf_counter()
+        try:
+            lines = lines_from_ocr_page(ocr_model([page_image]).pages[0], page_index)
+        except Exception as e:
+            print(f"Error during OCR extraction of page {page_index + 1}: {e}")
+            lines = []
+        ocr_ms = 1000 * (time.perf_counter() - start)
+        timings['ocr_ms'] += ocr_ms
+        extracted_data.extend(lines)
+        on_event('page', page=page_index, pages=len(pages), stage='ocr', ms=ocr_ms, lines=len(lines))
+
+        start = time.perf_counter()
+        entities = find_pii_entities(lines, pii_types, found_dates=found_dates) if lines else []
+        detect_ms = 1000 * (time.perf_counter() - start)
+        timings['detect_ms'] += detect_ms
+        detected_pii.extend(entities)
+        on_event('page', page=page_index, pages=len(pages), stage='detect', ms=detect_ms, entities=len(entities))
+
+    return extracted_data, detected_pii, timings
+
 def get_id_patterns():
     return {
         "Ration Card": r"\b(Ration\s?Card|RC)\s?[-/]?\s?(\d{5,12})\b",
@@ -147,18 +258,37 @@ def get_date_patterns():
         }
     ]
 
-def find_pii_entities(extracted_data, pii_types):
+def run_ner_batched(ner_pipeline_instance, texts, batch_size=NER_BATCH_SIZE):
+    """
+    Runs NER over all lines in padded batches, sorted by token length to reduce padding.
+    Returns the entities of each line in input order.
+    """
+    results = [[] for _ in texts]
+    order = [i for i, text in enumerate(texts) if text and text.strip()]
+    if not order:
+        return results
+
+    encoded = ner_pipeline_instance.tokenizer([texts[i] for i in order], add_special_tokens=False)['input_ids']
+    token_lengths = dict(zip(order, (len(ids) for ids in encoded)))
+    order.sort(key=lambda i: token_lengths[i])
+
+    outputs = ner_pipeline_instance([texts[i] for i in order], batch_size=batch_size)
+    for i, entities in zip(order, outputs):
+        results[i] = entities
+    return results
+
+def find_pii_entities(extracted_data, pii_types, found_dates=None):
     """
     Identifies PII entities in the extracted text using NER and regex.
     Supports multiple PII types including IDs and dates.
+
+    Parameters:
+        found_dates (set): Dates already reported; shared across calls when a document is scanned page by page.
     """
     print("\n--- Starting PII Detection ---")
 
-    # Load NER model once globally to optimize performance
-    model_name = "dbmdz/bert-large-cased-finetuned-conll03-english"
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForTokenClassification.from_pretrained(model_name)
-    ner_pipeline_instance = pipeline("ner", model=model, tokenizer=tokenizer, aggregation_strategy="simple")
+    # Loaded once per process and kept warm in the model registry
+    ner_pipeline_instance = get_ner_pipeline(ENGLISH_NER_MODEL)
 
     id_patterns = get_id_patterns()
     date_patterns = get_date_patterns()
@@ -171,9 +301,19 @@ def find_pii_entities(extracted_data, pii_types):
     org_flag = pii_types.get('org', False)
 
     print("Performing NER-based detection...")
-    for line_data in extracted_data:
-        text = line_data['text']
-        entities = ner_pipeline_instance(text)
+    line_texts = [line_data['text'] for line_data in extracted_data]
+    if NER_SCHEDULER_SETTINGS['enabled']:
+        scheduler = get_ner_scheduler(
+            ENGLISH_NER_MODEL,
+            lambda texts: run_ner_batched(ner_pipeline_instance, texts),
+            max_batch_size=NER_SCHEDULER_SETTINGS['max_batch_size'],
+            max_wait_ms=NER_SCHEDULER_SETTINGS['max_wait_ms'],
+            options={'batch_size': NER_BATCH_SIZE}
+        )
+        line_entities = scheduler.submit(line_texts)
+    else:
+        line_entities = run_ner_batched(ner_pipeline_instance, line_texts)
+    for line_data, entities in zip(extracted_data, line_entities):
         for entity in entities:
             ent_type = entity['entity_group']
             ent_text = entity['word'].strip()
@@ -195,7 +335,8 @@ def find_pii_entities(extracted_data, pii_types):
                         'top': line_data['top'],
                         'width': line_data['width'],
                         'height': line_data['height']
-                    }
+                    },
+                    'page': line_data.get('page', 0)
                 }
                 pii_entities.append(entity_data)
                 print(f"Detected {pii_type.upper()}: {ent_text} at {entity_data['bounding_box']}")
@@ -241,14 +382,15 @@ def find_pii_entities(extracted_data, pii_types):
                             'top': line_data['top'],
                             'width': line_data['width'],
                             'height': line_data['height']
-                        }
+                        },
+                        'page': line_data.get('page', 0)
                     }
                     pii_entities.append(entity_data)
                     print(f"Detected {id_type.upper()}: {matched_text} at {entity_data['bounding_box']}")
 
     # DOB detection
     if pii_types.get('dob', False):
-        found_dates_set = set()
+        found_dates_set = found_dates if found_dates is not None else set()
         for date_fmt in date_patterns:
             pattern = re.compile(date_fmt['pattern'], re.IGNORECASE | re.UNICODE)
             for line_data in extracted_data:
@@ -266,7 +408,8 @@ def find_pii_entities(extracted_data, pii_types):
                                 'top': line_data['top'],
                                 'width': line_data['width'],
                                 'height': line_data['height']
-                            }
+                            },
+                            'page': line_data.get('page', 0)
                         }
                         pii_entities.append(entity_data)
                         print(f"Detected DOB: {match} at {entity_data['bounding_box']}")
@@ -286,7 +429,8 @@ def find_pii_entities(extracted_data, pii_types):
                             'top': line_data['top'],
                             'width': line_data['width'],
                             'height': line_data['height']
-                        }
+                        },
+                        'page': line_data.get('page', 0)
                     }
                     pii_entities.append(entity_data)
                     print(f"Detected DOB: {dob_match} at {entity_data['bounding_box']}")
@@ -294,14 +438,17 @@ def find_pii_entities(extracted_data, pii_types):
     print("--- Completed PII Detection ---\n")
     return pii_entities
 
-def redact_image(image_path, pii_entities, output_path, pii_types):
+def redact_image(image_path, pii_entities, output_path, pii_types, on_page=None):
     """
     Redacts identified PII in images.
+    on_page(page, seconds, entities) is called once the image has been redacted.
     """
     try:
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"Image file not found: {image_path}")
 
+        start = time.perf_counter()
+        redacted = 0
         with Image.open(image_path) as img:
             image_width, image_height = img.size
             draw = ImageDraw.Draw(img)
@@ -320,32 +467,60 @@ def redact_image(image_path, pii_entities, output_path, pii_types):
 
                 rectangle = [left, top, left + width, top + height]
                 draw.rectangle(rectangle, fill='black')
+                redacted += 1
 
             img.save(output_path)
             print(f"Redacted image saved to: {output_path}")
+        if on_page is not None:
+            on_page(0, time.perf_counter() - start, redacted)
 
     except Exception as e:
         print(f"Redaction failed for {image_path}: {e}")
         raise
 
-def redact_pdf(pdf_path, pii_entities, output_path, pii_types):
+def group_entities_by_page(pii_entities, pii_types, page_count=None):
+    """
+    Builds a per-page index of the entities that should be redacted.
+    Entities without a 'page' index are applied to every page when page_count is given.
+    """
+    index = {}
+    unpaged = []
+    for entity in pii_entities:
+        if not pii_types.get(entity.get('type', ''), False):
+            continue
+        if entity.get('bounding_box') is None:
+            continue
+        page_num = entity.get('page')
+        if page_num is None:
+            unpaged.append(entity)
+        else:
+            index.setdefault(page_num, []).append(entity)
+
+    if unpaged and page_count:
+        for page_num in range(page_count):
+            index.setdefault(page_num, []).extend(unpaged)
+    return index
+
+def redact_pdf(pdf_path, pii_entities, output_path, pii_types, on_page=None):
     """
     Redacts identified PII in a PDF by overlaying black boxes.
+    Only pages that contain PII are visited; other pages are left untouched.
+    on_page(page, seconds, entities) is called after each visited page.
     """
     try:
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
         doc = fitz.open(pdf_path)
-        for page_num, page in enumerate(doc, start=1):
-            for entity in pii_entities:
-                entity_type = entity.get('type', '')
-                if not pii_types.get(entity_type, False):
-                    continue
-
+        entities_by_page = group_entities_by_page(pii_entities, pii_types, page_count=len(doc))
+
+        for page_num in sorted(entities_by_page):
+            if page_num >= len(doc):
+                continue
+            start = time.perf_counter()
+            page = doc[page_num]
+            for entity in entities_by_page[page_num]:
                 bbox = entity['bounding_box']
-                if bbox is None:
-                    continue
                 rect = fitz.Rect(
                     bbox['left'] * page.rect.width,
                     bbox['top'] * page.rect.height,
@@ -355,6 +530,8 @@ def redact_pdf(pdf_path, pii_entities, output_path, pii_types):
                 page.add_redact_annot(rect, fill=(0, 0, 0))
             # Apply redactions for the current page
             page.apply_redactions()
+            if on_page is not None:
+                on_page(page_num, time.perf_counter() - start, len(entities_by_page[page_num]))
 
         doc.save(output_path)
         print(f"Redacted PDF saved to: {output_path}")
@@ -363,25 +540,63 @@ def redact_pdf(pdf_path, pii_entities, output_path, pii_types):
         print(f"Redaction failed for {pdf_path}: {e}")
         raise
 
-def process_file(input_path, output_folder, pii_types):
+def process_file(input_path, output_folder, pii_types, on_event=None):
     """
     Extracts text, detects PII, and redacts if needed.
     If no PII is found, copies the file as is to the output directory.
+    Documents seen before with the same PII flags are served from the document cache.
+
+    Parameters:
+        on_event (callable): Receives progress as on_event(event, **data). When given, pages are
+                             OCRed and scanned one at a time and 'page' events report each page
+                             after OCR, detection and redaction; a final 'timings' event carries
+                             the per-stage totals in milliseconds.
+
+    Returns:
+        str: Path of the file written to output_folder.
     """
-    extracted_data = extract_text_and_coords(input_path)
+    started = time.perf_counter()
+    timings = {'ocr_ms': 0.0, 'detect_ms': 0.0, 'redact_ms': 0.0}
+    document_cache = None
+    cache_key = None
+    if DOCUMENT_CACHE_SETTINGS['enabled']:
+        document_cache = get_document_cache(DOCUMENT_CACHE_SETTINGS['cache_dir'], DOCUMENT_CACHE_SETTINGS['max_bytes'])
+        cache_key = make_document_key(hash_file(input_path), pii_types, document_cache_version())
+        cached = document_cache.get(cache_key)
+        if cached is not None:
+            root, ext = os.path.splitext(os.path.basename(input_path))
+            if cached['metadata'].get('redacted'):
+                output_file = os.path.join(output_folder, f"{root}_redacted{ext}")
+            else:
+                output_file = os.path.join(output_folder, os.path.basename(input_path))
+            with open(output_file, 'wb') as f:
+                f.write(cached['artifact'])
+            print(f"Served from document cache: {output_file}")
+            if on_event is not None:
+                on_event('timings', cached=True, total_ms=1000 * (time.perf_counter() - started), **timings)
+            return output_file
+
+    if on_event is None:
+        extracted_data = extract_text_and_coords(input_path)
+    else:
+        extracted_data, detected_pii, page_timings = extract_and_detect_by_page(input_path, pii_types, on_event)
+        timings.update(page_timings)
     if not extracted_data:
         # If OCR failed or no data, just copy the file
         output_file = os.path.join(output_folder, os.path.basename(input_path))
         shutil.copyfile(input_path, output_file)
         print("No text extracted. File copied as-is.")
-        return
+        if on_event is not None:
+            on_event('timings', cached=False, total_ms=1000 * (time.perf_counter() - started), **timings)
+        return output_file
 
     english_extracted_text = " ".join([line['text'] for line in extracted_data if line.get('text')])
     print("\n--- English Extracted Text ---")
     print(english_extracted_text)
     print("--- End of English Extracted Text ---\n")
 
-    detected_pii = find_pii_entities(extracted_data, pii_types)
+    if on_event is None:
+        detected_pii = find_pii_entities(extracted_data, pii_types)
 
     if detected_pii:
         print("\n--- Detected PII ---")
@@ -391,25 +606,46 @@ def process_file(input_path, output_folder, pii_types):
     else:
         print("\nNo PII detected.\n")
 
+    def on_redacted_page(page_num, seconds, entities):
+        timings['redact_ms'] += 1000 * seconds
+        if on_event is not None:
+            on_event('page', page=page_num, stage='redact', ms=1000 * seconds, entities=entities)
+
     base_name = os.path.basename(input_path)
     root, ext = os.path.splitext(base_name)
     if detected_pii:
         # Redact
         if ext.lower() == '.pdf':
             output_file = os.path.join(output_folder, f"{root}_redacted.pdf")
-            redact_pdf(input_path, detected_pii, output_file, pii_types)
+            redact_pdf(input_path, detected_pii, output_file, pii_types, on_page=on_redacted_page)
         else:
             output_file = os.path.join(output_folder, f"{root}_redacted{ext}")
-            redact_image(input_path, detected_pii, output_file, pii_types)
+            redact_image(input_path, detected_pii, output_file, pii_types, on_page=on_redacted_page)
     else:
         # No PII detected, just copy
         output_file = os.path.join(output_folder, base_name)
         shutil.copyfile(input_path, output_file)
         print("No PII detected. File copied as-is.")
 
-def process_folder(input_folder, output_folder, pii_types):
+    if document_cache is not None:
+        with open(output_file, 'rb') as f:
+            document_cache.put(cache_key, f.read(), detected_pii, {'redacted': bool(detected_pii)})
+
+    if on_event is not None:
+        on_event('timings', cached=False, total_ms=1000 * (time.perf_counter() - started), **timings)
+    return output_file
+
+def process_folder(input_folder, output_folder, pii_types, on_progress=None, stop_on_error=True, on_event=None):
     """
     Processes all supported files in the input_folder and saves redacted files to output_folder.
+
+    Parameters:
+        on_progress (callable): Called as on_progress(filename, status, output_file=None, error=None)
+                                with status 'processing', 'done' or 'error' for each supported file.
+        stop_on_error (bool): Re-raise the first failure; otherwise record it and continue
+                              with the remaining files.
+        on_event (callable): Called as on_event(filename, event, **data) with the page-level
+                             progress of process_file.
     """
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
@@ -419,7 +655,22 @@ def process_folder(input_folder, output_folder, pii_types):
         if filename.lower().endswith(supported_extensions):
             input_file = os.path.join(input_folder, filename)
             print(f"Processing file: {input_file}")
-            process_file(input_file, output_folder, pii_types)
+            if on_progress is not None:
+                on_progress(filename, 'processing')
+            try:
+                file_events = None
+                if on_event is not None:
+                    file_events = lambda event, _filename=filename, **data: on_event(_filename, event, **data)
+                output_file = process_file(input_file, output_folder, pii_types, on_event=file_events)
+            except Exception as e:
+                print(f"Error processing {input_file}: {e}")
+                if on_progress is not None:
+                    on_progress(filename, 'error', error=str(e) or type(e).__name__)
+                if stop_on_error:
+                    raise
+                continue
+            if on_progress is not None:
+                on_progress(filename, 'done', output_file=output_file)
         else:
             print(f"Skipping unsupported file format: {filename}")
 
@@ -0,0 +1,268 @@
+# document_cache.py
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.path.join('cache', 'documents')
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+
+ARTIFACT_FILE = 'artifact'
+META_FILE = 'meta.json'
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def hash_file(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def make_document_key(content_hash, pii_types, model_version):
+    """
+    Builds the cache key of a document.
+
+    Parameters:
+        content_hash (str): SHA-256 of the plaintext input bytes.
+        pii_types (dict): PII flags; only enabled types are part of the key.
+        model_version (str): Identifies the models, rules and settings that produced the result.
+
+    Returns:
+        str: Hex digest identifying the cached result.
+    """
+    enabled = ",".join(sorted(key for key, value in pii_types.items() if value))
+    payload = "\x1f".join([content_hash, enabled, model_version])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+# Eviction frees space down to this fraction of max_bytes, so the next puts fit without a rescan
+EVICT_TO_FRACTION = 0.9
+
+def _entry_size(entry_dir):
+    try:
+        return sum(os.path.getsize(os.path.join(entry_dir, name)) for name in os.listdir(entry_dir))
+    except FileNotFoundError:
+        return 0
+
+class DocumentCache:
+    """
+    Size-bounded on-disk store of final redaction results, addressed by document key.
+
+    Each entry is a directory holding the output artifact and a JSON file with the number of
+    detected entities of each type. The entity text and the file name are PII and are never
+    written, so `metadata` must only hold flags and counts. The least recently used entries
+    are removed once the store exceeds `max_bytes`.
+
+    The store size is kept as a running total, so the directory is only scanned on first use
+    and when the total goes over `max_bytes`. Entries written by other processes are counted
+    at the next scan.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bytes in the store, or None until the first scan
+        self._bytes = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key):
+        """
+        Returns:
+            dict or None: 'artifact' (bytes), 'entity_types' (dict of type to count), 'entity_count'
+                          (int) and 'metadata' (dict) on a hit.
+        """
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, META_FILE)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as meta_file:
+                meta = json.load(meta_file)
+            with open(os.path.join(entry_dir, ARTIFACT_FILE), 'rb') as artifact_file:
+                artifact = artifact_file.read()
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if 'entity_types' not in meta:
+            # Written by an earlier version that stored the entity text; drop it
+            size = _entry_size(entry_dir)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            with self._lock:
+                self.misses += 1
+            self._track(-size)
+            return None
+
+        # The metadata mtime is the LRU timestamp
+        os.utime(meta_path, None)
+        with self._lock:
+            self.hits += 1
+        return {
+            'artifact': artifact,
+            'entity_types': meta['entity_types'],
+            'entity_count': sum(meta['entity_types'].values()),
+            'metadata': meta.get('metadata', {})
+        }
+
+    def put(self, key, artifact, entities, metadata=None):
+        """
+        Stores the output artifact and the entity counts per type of a document, then evicts
+        old entries if needed.
+        """
+        entity_types = {}
+        for entity in entities:
+            entity_types[entity.get('type', '')] = entity_types.get(entity.get('type', ''), 0) + 1
+        entry_dir = self._entry_dir(key)
+        staging_dir = f"{entry_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(staging_dir, exist_ok=True)
+        with open(os.path.join(staging_dir, ARTIFACT_FILE), 'wb') as artifact_file:
+            artifact_file.write(artifact)
+        with open(os.path.join(staging_dir, META_FILE), 'w', encoding='utf-8') as meta_file:
+            json.dump({
+                'entity_types': entity_types,
+                'metadata': metadata or {},
+                'created': time.time()
+            }, meta_file, ensure_ascii=False)
+
+        size = _entry_size(staging_dir)
+
+        # Publish the entry in one rename so readers never see a half-written entry
+        replaced = _entry_size(entry_dir)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        try:
+            os.replace(staging_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            size = 0
+        if self._track(size - replaced):
+            self.evict()
+
+    def _track(self, delta):
+        """
+        Adds `delta` bytes to the running store size.
+
+        Returns:
+            bool: Whether the store is now over `max_bytes`.
+        """
+        if self._bytes is None:
+            entries = self._entries()
+            with self._lock:
+                if self._bytes is None:
+                    self._bytes = sum(size for _, size, _, _ in entries)
+                    return self._bytes > self.max_bytes
+        with self._lock:
+            self._bytes += delta
+            return self._bytes > self.max_bytes
+
+    def _entries(self):
+        entries = []
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                entry_dir = os.path.join(prefix_dir, key)
+                meta_path = os.path.join(entry_dir, META_FILE)
+                if key.endswith('.tmp') or not os.path.exists(meta_path):
+                    continue
+                size = _entry_size(entry_dir)
+                entries.append((os.path.getmtime(meta_path), size, key, entry_dir))
+        return entries
+
+    def evict(self):
+        """
+        Removes least recently used entries once the store exceeds `max_bytes`, until it fits
+        in EVICT_TO_FRACTION of it.
+        """
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _, _ in entries)
+            limit = self.max_bytes * EVICT_TO_FRACTION if total > self.max_bytes else self.max_bytes
+            for _, size, _, entry_dir in entries:
+                if total <= limit:
+                    break
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                total -= size
+                self.evictions += 1
+            self._bytes = total
+
+    def invalidate(self, key=None):
+        """
+        Removes one entry, or every entry when `key` is None.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        with self._lock:
+            if key is not None:
+                entry_dir = self._entry_dir(key)
+                if os.path.isdir(entry_dir):
+                    size = _entry_size(entry_dir)
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                    if self._bytes is not None:
+                        self._bytes -= size
+                    return 1
+                return 0
+            removed = len(self._entries())
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+            self._bytes = 0
+            return removed
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(entries),
+                'bytes': sum(size for _, size, _, _ in entries),
+                'max_bytes': self.max_bytes
+            }
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_document_cache(cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Returns the process-wide document cache for `cache_dir`.
+    """
+    with _caches_lock:
+        cache = _caches.get(cache_dir)
+        if cache is None:
+            cache = DocumentCache(cache_dir, max_bytes)
+            _caches[cache_dir] = cache
+        cache.max_bytes = max_bytes
+        return cache
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or invalidate the document result cache.")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="Cache directory.")
+    parser.add_argument('--clear', action='store_true', help="Remove every cached document.")
+    parser.add_argument('--key', help="Remove only the entry with this key.")
+    args = parser.parse_args()
+
+    cache = DocumentCache(args.cache_dir)
+    if args.clear or args.key:
+        removed = cache.invalidate(args.key)
+        print(f"Removed {removed} cached document(s) from {args.cache_dir}")
+    else:
+        stats = cache.stats()
+        print(f"{stats['entries']} cached document(s), {stats['bytes'] / (1024 * 1024):.1f} MB in {args.cache_dir}")
+
+if __name__ == "__main__":
+    main()
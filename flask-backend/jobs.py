@@ -0,0 +1,214 @@
+# jobs.py
+
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_JOBS_DIR = 'jobs'
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_JOB_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_HEARTBEAT_SECONDS = 15
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# Statuses reported by process_folder's on_progress callback, as job file statuses
+FILE_STATUSES = {'processing': RUNNING, 'done': DONE, 'error': FAILED}
+
+class Job:
+    """
+    One upload: its own input and output directory under the jobs root, the PII flags
+    it was submitted with, the progress of every file and the ordered list of progress
+    events published so far. Jobs and their files share the QUEUED, RUNNING, DONE and
+    FAILED statuses.
+    """
+
+    def __init__(self, job_id, workspace, pii_types):
+        self.id = job_id
+        self.workspace = workspace
+        self.input_dir = os.path.join(workspace, 'input')
+        self.output_dir = os.path.join(workspace, 'output')
+        self.pii_types = pii_types
+        self.status = QUEUED
+        self.error = None
+        self.files = {}
+        self.events = []
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'files': [dict(file, filename=filename) for filename, file in self.files.items()]
+        }
+
+class JobManager:
+    """
+    Runs uploads in the background on a pool of in-process worker threads.
+
+    Each job gets an isolated workspace, so concurrent uploads never see or delete each
+    other's files. Worker threads share the process-wide model registry and NER scheduler,
+    which batches NER lines across jobs running at the same time. Finished jobs and their
+    workspaces are removed once they are older than `ttl_seconds`.
+    """
+
+    def __init__(self, process, root=DEFAULT_JOBS_DIR, workers=DEFAULT_JOB_WORKERS, ttl_seconds=DEFAULT_JOB_TTL_SECONDS):
+        """
+        Parameters:
+            process (callable): Called as process(input_dir, output_dir, pii_types, on_progress=...,
+                                stop_on_error=False, on_event=...); checkpoint_alpha.process_folder
+                                in the app.
+            root (str): Directory under which job workspaces are created.
+            workers (int): Number of jobs processed concurrently.
+            ttl_seconds (float): How long finished jobs stay available for status and downloads.
+        """
+        self.process = process
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self._jobs = {}
+        self._lock = threading.Lock()
+        # Notifies event listeners; shares the lock that guards job state
+        self._changed = threading.Condition(self._lock)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        os.makedirs(root, exist_ok=True)
+
+    def create_job(self, pii_types):
+        """
+        Creates a queued job and its workspace. Save the uploads into job.input_dir, then call start.
+        """
+        self.cleanup()
+        job_id = uuid.uuid4().hex
+        job = Job(job_id, os.path.join(self.root, job_id), pii_types)
+        os.makedirs(job.input_dir)
+        os.makedirs(job.output_dir)
+        with self._lock:
+            self._jobs[job_id] = job
+        return job
+
+    def add_file(self, job, filename):
+        with self._lock:
+            job.files[filename] = {'status': QUEUED, 'output': None, 'error': None}
+
+    def start(self, job):
+        self._executor.submit(self._run, job)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def snapshot(self, job):
+        """
+        Returns a consistent copy of the job state for serialization.
+        """
+        with self._lock:
+            return job.to_dict()
+
+    def wait(self, job_id, timeout=None):
+        """
+        Blocks until the job has finished. Returns False on timeout.
+        """
+        job = self.get(job_id)
+        return job is not None and job.done.wait(timeout)
+
+    def iter_events(self, job, start=0, heartbeat=DEFAULT_HEARTBEAT_SECONDS):
+        """
+        Yields (index, event) for every event of the job from `start` on, waiting for new
+        ones until the job has finished. Yields None after `heartbeat` seconds without events
+        so a streaming response can keep the connection open.
+        """
+        index = start
+        while True:
+            with self._changed:
+                if index >= len(job.events) and not job.done.is_set():
+                    self._changed.wait(heartbeat)
+                events = job.events[index:]
+                finished = job.done.is_set()
+            for event in events:
+                yield index, event
+                index += 1
+            if finished and not events and index >= len(job.events):
+                return
+            if not events and not finished:
+                yield None
+
+    def _emit(self, job, event, **data):
+        # Caller holds self._lock
+        job.events.append({'event': event, 'data': data})
+        self._changed.notify_all()
+
+    def _on_progress(self, job, filename, status, output_file=None, error=None):
+        if status not in FILE_STATUSES:
+            raise ValueError(f"Unknown file status: {status}")
+        status = FILE_STATUSES[status]
+        with self._lock:
+            file = job.files.setdefault(filename, {'status': QUEUED, 'output': None, 'error': None})
+            file['status'] = status
+            if output_file is not None:
+                file['output'] = os.path.basename(output_file)
+            if error is not None:
+                file['error'] = error
+            self._emit(job, 'file', filename=filename, status=status, output=file['output'], error=file['error'])
+
+    def _on_event(self, job, filename, event, **data):
+        with self._lock:
+            if event == 'timings':
+                job.files.setdefault(filename, {'status': QUEUED, 'output': None, 'error': None})['timings'] = data
+            self._emit(job, event, filename=filename, **data)
+
+    def _run(self, job):
+        with self._lock:
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._emit(job, 'job', status=job.status)
+        try:
+            self.process(
+                job.input_dir,
+                job.output_dir,
+                job.pii_types,
+                on_progress=lambda *args, **kwargs: self._on_progress(job, *args, **kwargs),
+                stop_on_error=False,
+                on_event=lambda *args, **kwargs: self._on_event(job, *args, **kwargs)
+            )
+            with self._lock:
+                failed = [file for file in job.files.values() if file['status'] == FAILED]
+                job.status = FAILED if failed and len(failed) == len(job.files) else DONE
+        except Exception as e:
+            print(f"Job {job.id} failed: {e}")
+            with self._lock:
+                job.status = FAILED
+                job.error = str(e) or type(e).__name__
+        finally:
+            # Uploaded originals are not kept once the job has run
+            shutil.rmtree(job.input_dir, ignore_errors=True)
+            with self._lock:
+                job.finished_at = time.time()
+                self._emit(job, 'job', status=job.status, error=job.error)
+                job.done.set()
+
+    def cleanup(self):
+        """
+        Removes finished jobs older than the TTL together with their workspaces.
+        """
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [job for job in self._jobs.values() if job.finished_at is not None and job.finished_at < cutoff]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            shutil.rmtree(job.workspace, ignore_errors=True)
+        return len(expired)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,67 @@
+# tests/test_jobs.py
+
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from jobs import JobManager, DONE, FAILED
+
+def fake_process(input_dir, output_dir, pii_types, on_progress=None, stop_on_error=True, on_event=None):
+    """
+    Stands in for checkpoint_alpha.process_folder: "redacts" by copying, fails files named bad_*.
+    """
+    for filename in sorted(os.listdir(input_dir)):
+        on_progress(filename, 'processing')
+        if filename.startswith('bad_'):
+            on_progress(filename, 'error', error='cannot read file')
+            continue
+        on_event(filename, 'page', stage='redact', page=0, pages=1)
+        root, ext = os.path.splitext(filename)
+        output_file = os.path.join(output_dir, f"{root}_redacted{ext}")
+        shutil.copyfile(os.path.join(input_dir, filename), output_file)
+        on_event(filename, 'timings', cached=False, total_ms=1.0)
+        on_progress(filename, 'done', output_file=output_file)
+
+def submit(manager, filenames):
+    job = manager.create_job({'pan': True})
+    for filename in filenames:
+        with open(os.path.join(job.input_dir, filename), 'wb') as file:
+            file.write(b'%PDF-1.4 sample')
+        manager.add_file(job, filename)
+    manager.start(job)
+    return job
+
+def main():
+    root = tempfile.mkdtemp(prefix='jobs_')
+    try:
+        manager = JobManager(fake_process, root=root, workers=2)
+
+        job = submit(manager, ['card.pdf', 'bad_scan.pdf'])
+        print(f"Finished: {manager.wait(job.id, timeout=10)}")
+        events = [(event['event'], event['data'].get('status')) for _, event in manager.iter_events(job, heartbeat=0.1)]
+        print(f"Events: {events}")
+        snapshot = manager.snapshot(job)
+        files = {file['filename']: (file['status'], file['output'], file['error']) for file in snapshot['files']}
+        print(f"Job status: {snapshot['status']} (expected {DONE}), files: {files}")
+        download = os.path.join(job.output_dir, files['card.pdf'][1])
+        print(f"Download available: {os.path.exists(download)}, uploads removed: {not os.path.exists(job.input_dir)}")
+
+        # Every file failing fails the job
+        failed = submit(manager, ['bad_one.pdf', 'bad_two.pdf'])
+        manager.wait(failed.id, timeout=10)
+        print(f"All files failed: job status {manager.snapshot(failed)['status']} (expected {FAILED})")
+
+        # Expired jobs and their workspaces are removed
+        manager.ttl_seconds = 0
+        removed = manager.cleanup()
+        print(f"Cleanup removed {removed} jobs, workspace gone: {not os.path.exists(job.workspace)}, "
+              f"lookup: {manager.get(job.id)}")
+        manager.shutdown()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,18 @@
 # src/main.py
 
+import argparse
 import os
-from pipeline.encrypt import encrypt_file
 from pipeline.workflow import run_workflow
-from pipeline.decrypt import decrypt_file
-from tqdm import tqdm
+from pipeline.bulk_crypto import encrypt_files, decrypt_files, DEFAULT_WORKERS
+from pipeline.utils import load_key
 
-def process_new_files(input_dir='input', output_dir='output', temp_dir='temp', pii_config_path='config/settings.yaml'):
+def process_new_files(input_dir='input', output_dir='output', temp_dir='temp', pii_config_path='config/settings.yaml',
+                      crypto_workers=DEFAULT_WORKERS, workers=None):
     """
     Encrypts all image and PDF files in the input directory, processes them for PII redaction,
     and saves the redacted encrypted files to the output directory.
+    Files are encrypted and decrypted in parallel on `crypto_workers` threads with the key loaded once,
+    and redacted on `workers` processes (see run_workflow).
     """
     # Define supported file extensions
     supported_extensions = ('.png', '.pdf', '.jpg', '.jpeg', '.bmp', '.tiff')
@@ -25,17 +28,14 @@ def process_new_files(input_dir='input', output_dir='output', temp_dir='temp', p
     os.makedirs(output_dir, exist_ok=True)
     
     # Encrypt all supported files
-    encrypted_files = []
+    key = load_key()
+    encrypted_files = [f"{file}.enc" for file in input_files]
     print("Starting Encryption Process...")
-    for file in tqdm(input_files, desc="Encrypting files"):
-        input_path = os.path.join(input_dir, file)
-        encrypted_filename = f"{file}.enc"
-        encrypted_output_path = os.path.join(input_dir, encrypted_filename)
-        
-        # Encrypt the file
-        encrypt_file(input_path, encrypted_output_path)
-        encrypted_files.append(encrypted_filename)
-        print(f"Encrypted '{file}' -> '{encrypted_filename}'")
+    encrypt_files(
+        [(os.path.join(input_dir, file), os.path.join(input_dir, f"{file}.enc")) for file in input_files],
+        key=key,
+        workers=crypto_workers
+    )
     
     print("Encryption Process Completed.\n")
     
@@ -45,12 +45,14 @@ def process_new_files(input_dir='input', output_dir='output', temp_dir='temp', p
         input_dir=input_dir,
         output_dir=output_dir,
         temp_dir=temp_dir,
-        pii_config_path=pii_config_path
+        pii_config_path=pii_config_path,
+        workers=workers
     )
     print("PII Redaction Process Completed.\n")
     
     # Decrypt redacted files (optional)
     print("Starting Decryption of Redacted Files...")
+    decrypt_jobs = []
     for enc_file in encrypted_files:
         # Define the expected redacted encrypted filename
         base_name = os.path.splitext(enc_file)[0]
@@ -74,9 +76,15 @@ def process_new_files(input_dir='input', output_dir='output', temp_dir='temp', p
                 decrypted_extension = 'png'
         
         decrypted_path = os.path.join(output_dir, f"decrypted_{original_filename}_redacted.{decrypted_extension}")
-        decrypt_file(encrypted_path, decrypted_path)
-        print(f"Decrypted '{redacted_enc_file}' -> 'decrypted_{original_filename}_redacted.{decrypted_extension}'")
+        decrypt_jobs.append((encrypted_path, decrypted_path))
+    decrypt_files(decrypt_jobs, key=key, workers=crypto_workers)
     print("Decryption of Redacted Files Completed.\n")
 
 if __name__ == "__main__":
-    process_new_files()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Encrypt, redact and decrypt the files in the input directory.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Number of worker processes for redaction (default: processing.workers, or 1).")
+    parser.add_argument('--crypto-workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"Number of threads for bulk encryption and decryption (default: {DEFAULT_WORKERS}).")
+    args = parser.parse_args()
+    process_new_files(workers=args.workers, crypto_workers=args.crypto_workers)
\ No newline at end of file
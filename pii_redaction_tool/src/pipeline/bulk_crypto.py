@@ -0,0 +1,124 @@
+# src/pipeline/bulk_crypto.py
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from cryptography.fernet import Fernet
+from tqdm import tqdm
+from pipeline.utils import load_key
+from pipeline.encrypt import FERNET_FORMAT, CHUNKED_FORMAT
+from pipeline.chunked_crypto import encrypt_file_chunked, decrypt_file_chunked, is_chunked_file
+
+# Fernet and the file I/O release the GIL, so a few threads overlap reads, writes and
+# encryption; beyond the core count they only contend. Override with --crypto-workers.
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+class BulkCryptoError(RuntimeError):
+    """
+    Raised once a batch has finished when any of its files failed. `report` holds the
+    batch report, with the failed files and their errors under 'failed'.
+    """
+
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.report = report
+
+def _encrypt_one(fernet, key, input_path, output_path, file_format):
+    if file_format == CHUNKED_FORMAT:
+        # Files are already spread over the pool, so each one is encrypted on a single thread
+        encrypt_file_chunked(input_path, output_path, key, workers=1)
+    else:
+        with open(input_path, 'rb') as file:
+            data = file.read()
+        with open(output_path, 'wb') as file:
+            file.write(fernet.encrypt(data))
+    return os.path.getsize(input_path)
+
+def _decrypt_one(fernet, key, input_path, output_path):
+    if is_chunked_file(input_path):
+        decrypt_file_chunked(input_path, output_path, key, workers=1)
+    else:
+        with open(input_path, 'rb') as file:
+            data = fernet.decrypt(file.read())
+        with open(output_path, 'wb') as file:
+            file.write(data)
+    return os.path.getsize(output_path)
+
+def _run(task, jobs, workers, desc):
+    """
+    Runs `task(input_path, output_path)` for every job on a thread pool.
+
+    The cryptography primitives release the GIL, so file reads, writes and
+    encryption of different files overlap. A failing file does not stop the others;
+    BulkCryptoError is raised after the batch if any file failed.
+    """
+    total_bytes = 0
+    failed = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(task, input_path, output_path): input_path for input_path, output_path in jobs}
+        for future in tqdm(as_completed(futures), total=len(futures), desc=desc):
+            try:
+                total_bytes += future.result()
+            except Exception as e:
+                print(f"{desc} failed for {futures[future]}: {e}")
+                failed.append((futures[future], str(e)))
+    seconds = time.perf_counter() - start
+
+    report = {
+        'files': len(jobs) - len(failed),
+        'failed': failed,
+        'bytes': total_bytes,
+        'seconds': seconds,
+        'mb_per_s': total_bytes / (1024 * 1024) / seconds if seconds else 0.0
+    }
+    print(f"{desc}: {report['files']} files, {total_bytes / (1024 * 1024):.1f} MB in {seconds:.2f}s "
+          f"({report['mb_per_s']:.1f} MB/s, {workers} workers)")
+    if failed:
+        raise BulkCryptoError(f"{desc} failed for {len(failed)} of {len(jobs)} files", report)
+    return report
+
+def encrypt_files(jobs, key=None, workers=DEFAULT_WORKERS, file_format=FERNET_FORMAT):
+    """
+    Encrypts many files in parallel with a key loaded once.
+
+    Parameters:
+        jobs (List[tuple]): (input_path, output_path) pairs.
+        key (bytes): Encryption key; loaded from the key file once when not given.
+        workers (int): Number of files encrypted concurrently.
+        file_format (str): 'fernet' or 'chunked'.
+
+    Returns:
+        dict: 'files', 'failed' [(path, error)], 'bytes' of plaintext, 'seconds' and 'mb_per_s'.
+
+    Raises:
+        BulkCryptoError: If any file could not be encrypted.
+    """
+    key = key or load_key()
+    fernet = Fernet(key)
+    return _run(
+        lambda input_path, output_path: _encrypt_one(fernet, key, input_path, output_path, file_format),
+        jobs, workers, "Encrypting files"
+    )
+
+def decrypt_files(jobs, key=None, workers=DEFAULT_WORKERS):
+    """
+    Decrypts many Fernet or chunked files in parallel with a key loaded once.
+
+    Parameters:
+        jobs (List[tuple]): (input_path, output_path) pairs.
+        key (bytes): Encryption key; loaded from the key file once when not given.
+        workers (int): Number of files decrypted concurrently.
+
+    Returns:
+        dict: Same report as encrypt_files, with 'bytes' counting plaintext written.
+
+    Raises:
+        BulkCryptoError: If any file could not be decrypted.
+    """
+    key = key or load_key()
+    fernet = Fernet(key)
+    return _run(
+        lambda input_path, output_path: _decrypt_one(fernet, key, input_path, output_path),
+        jobs, workers, "Decrypting files"
+    )
@@ -0,0 +1,241 @@
+# src/pipeline/chunked_crypto.py
+
+import base64
+import io
+import os
+import struct
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from pipeline.utils import load_key
+
+# Container layout (all integers big-endian):
+#   header: MAGIC | version (u8) | chunk_size (u32) | plaintext_size (u64) | nonce_prefix (8 bytes) | salt (16 bytes)
+#   body:   one AES-256-GCM ciphertext per chunk, each `chunk_size` plaintext bytes (the last may be shorter) + 16-byte tag
+# Chunk i uses nonce = nonce_prefix | i (u32) and is authenticated together with the header,
+# its index and whether it is the final chunk, so chunks cannot be reordered, truncated or
+# moved to another file.
+MAGIC = b'RCENC'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('>5sBIQ8s16s')
+TAG_SIZE = 16
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1 MB
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+def _derive_key(key, salt):
+    """
+    Derives the per-file AES-256 key from the Fernet key and the file's salt.
+    """
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        info=b'redactcrew chunked encryption v1'
+    ).derive(base64.urlsafe_b64decode(key))
+
+def _nonce(nonce_prefix, index):
+    return nonce_prefix + struct.pack('>I', index)
+
+def _aad(header, index, final):
+    return header + struct.pack('>QB', index, 1 if final else 0)
+
+def _chunk_count(plaintext_size, chunk_size):
+    # An empty file still has one (empty) authenticated chunk
+    return max(1, -(-plaintext_size // chunk_size))
+
+def is_chunked(data):
+    """
+    Returns True if `data` (the start of an encrypted file) is a chunked container.
+    """
+    return data[:len(MAGIC)] == MAGIC
+
+def is_chunked_file(path):
+    with open(path, 'rb') as file:
+        return is_chunked(file.read(len(MAGIC)))
+
+def _body_size(plaintext_size, chunk_size):
+    return plaintext_size + _chunk_count(plaintext_size, chunk_size) * TAG_SIZE
+
+def _stream_size(file):
+    """
+    Returns the number of bytes left in `file`, or None if it cannot seek.
+    """
+    if not file.seekable():
+        return None
+    position = file.tell()
+    end = file.seek(0, os.SEEK_END)
+    file.seek(position)
+    return end - position
+
+def _parse_header(header, body_size=None):
+    """
+    Parameters:
+        header (bytes): At least the header of a container.
+        body_size (int): Bytes following the header, if known; checked against the sizes in the header.
+
+    Raises:
+        InvalidToken: If the header is malformed or does not match the body size.
+    """
+    if len(header) < HEADER.size:
+        raise InvalidToken
+    magic, version, chunk_size, plaintext_size, nonce_prefix, salt = HEADER.unpack(header[:HEADER.size])
+    if magic != MAGIC:
+        raise InvalidToken
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported chunked encryption version: {version}")
+    if chunk_size == 0:
+        raise InvalidToken
+    if body_size is not None and body_size != _body_size(plaintext_size, chunk_size):
+        raise InvalidToken
+    return chunk_size, plaintext_size, nonce_prefix, salt
+
+def _new_header(chunk_size, plaintext_size):
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    return HEADER.pack(MAGIC, FORMAT_VERSION, chunk_size, plaintext_size, os.urandom(8), os.urandom(16))
+
+def _run_ordered(executor, tasks, max_in_flight):
+    """
+    Runs (callable, args) tasks on `executor`, yielding results in submission order
+    with at most `max_in_flight` tasks queued or running.
+    """
+    pending = deque()
+    for function, args in tasks:
+        pending.append(executor.submit(function, *args))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def _read_chunks(file, chunk_size, count):
+    for _ in range(count):
+        yield file.read(chunk_size)
+
+def encrypt_stream(reader, writer, plaintext_size, key=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS):
+    """
+    Encrypts `plaintext_size` bytes from the file object `reader` into `writer`.
+
+    Memory use is bounded by about 2 * workers * chunk_size regardless of the file size.
+    """
+    header = _new_header(chunk_size, plaintext_size)
+    _, _, nonce_prefix, salt = _parse_header(header)
+    aesgcm = AESGCM(_derive_key(key or load_key(), salt))
+    count = _chunk_count(plaintext_size, chunk_size)
+
+    def encrypt_chunk(index, chunk):
+        return aesgcm.encrypt(_nonce(nonce_prefix, index), chunk, _aad(header, index, index == count - 1))
+
+    writer.write(header)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        tasks = ((encrypt_chunk, (index, chunk)) for index, chunk in enumerate(_read_chunks(reader, chunk_size, count)))
+        for ciphertext in _run_ordered(executor, tasks, max_in_flight=2 * workers):
+            writer.write(ciphertext)
+
+def decrypt_stream(reader, writer, key=None, workers=DEFAULT_WORKERS):
+    """
+    Decrypts a chunked container from the file object `reader` into `writer`.
+
+    Chunks are written as soon as each one is authenticated, so when InvalidToken is raised
+    `writer` may already hold the plaintext of the chunks before the bad one. Callers must
+    discard the output on error; decrypt_file_chunked only publishes the output file once
+    the whole container has been verified.
+
+    Raises:
+        InvalidToken: If the key is wrong or any chunk was modified, reordered or truncated.
+    """
+    header = reader.read(HEADER.size)
+    chunk_size, plaintext_size, nonce_prefix, salt = _parse_header(header, _stream_size(reader))
+    aesgcm = AESGCM(_derive_key(key or load_key(), salt))
+    count = _chunk_count(plaintext_size, chunk_size)
+
+    def decrypt_chunk(index, ciphertext):
+        if len(ciphertext) < TAG_SIZE:
+            raise InvalidToken
+        try:
+            return aesgcm.decrypt(_nonce(nonce_prefix, index), ciphertext, _aad(header, index, index == count - 1))
+        except InvalidTag:
+            raise InvalidToken
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        tasks = (
+            (decrypt_chunk, (index, ciphertext))
+            for index, ciphertext in enumerate(_read_chunks(reader, chunk_size + TAG_SIZE, count))
+        )
+        written = 0
+        for plaintext in _run_ordered(executor, tasks, max_in_flight=2 * workers):
+            writer.write(plaintext)
+            written += len(plaintext)
+    if written != plaintext_size or reader.read(1):
+        raise InvalidToken
+
+def encrypt_file_chunked(input_path, output_path, key=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS):
+    with open(input_path, 'rb') as reader, open(output_path, 'wb') as writer:
+        encrypt_stream(reader, writer, os.path.getsize(input_path), key, chunk_size, workers)
+
+def decrypt_file_chunked(input_path, output_path, key=None, workers=DEFAULT_WORKERS):
+    """
+    Decrypts a chunked container file into `output_path`.
+
+    The plaintext is written to a temporary file next to `output_path` and renamed into place
+    only after the final chunk is verified, so a tampered or truncated file never leaves
+    partial plaintext at `output_path`.
+    """
+    staging_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(input_path, 'rb') as reader, open(staging_path, 'wb') as writer:
+            decrypt_stream(reader, writer, key, workers)
+        os.replace(staging_path, output_path)
+    except BaseException:
+        if os.path.exists(staging_path):
+            os.remove(staging_path)
+        raise
+
+def encrypt_bytes_chunked(data, key=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS):
+    output = io.BytesIO()
+    encrypt_stream(io.BytesIO(data), output, len(data), key, chunk_size, workers)
+    return output.getvalue()
+
+def decrypt_bytes_chunked(data, key=None, workers=DEFAULT_WORKERS):
+    output = io.BytesIO()
+    decrypt_stream(io.BytesIO(data), output, key, workers)
+    return output.getvalue()
+
+def decrypt_range(input_path, offset, length, key=None):
+    """
+    Decrypts `length` plaintext bytes starting at `offset` without reading the rest of the file.
+
+    Only the chunks that overlap the range are read and authenticated.
+
+    Returns:
+        bytes: The requested plaintext (shorter if the range runs past the end of the file).
+    """
+    if offset < 0 or length < 0:
+        raise ValueError("offset and length must not be negative")
+    with open(input_path, 'rb') as reader:
+        header = reader.read(HEADER.size)
+        chunk_size, plaintext_size, nonce_prefix, salt = _parse_header(header, _stream_size(reader))
+        aesgcm = AESGCM(_derive_key(key or load_key(), salt))
+        count = _chunk_count(plaintext_size, chunk_size)
+
+        end = min(offset + length, plaintext_size)
+        if offset >= end:
+            return b''
+        first, last = offset // chunk_size, (end - 1) // chunk_size
+
+        reader.seek(HEADER.size + first * (chunk_size + TAG_SIZE))
+        parts = []
+        for index in range(first, last + 1):
+            ciphertext = reader.read(chunk_size + TAG_SIZE)
+            try:
+                parts.append(aesgcm.decrypt(_nonce(nonce_prefix, index), ciphertext, _aad(header, index, index == count - 1)))
+            except InvalidTag:
+                raise InvalidToken
+    data = b''.join(parts)
+    start = offset - first * chunk_size
+    return data[start:start + (end - offset)]
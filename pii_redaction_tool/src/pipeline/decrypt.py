@@ -2,11 +2,31 @@
 
 from cryptography.fernet import Fernet, InvalidToken
 from pipeline.utils import load_key
+from pipeline.chunked_crypto import is_chunked, is_chunked_file, decrypt_bytes_chunked, decrypt_file_chunked
 import os
 
+def decrypt_bytes(encrypted_data, key=None):
+    """
+    Decrypts an encrypted buffer without writing the plaintext anywhere.
+
+    Parameters:
+        encrypted_data (bytes): A Fernet token or a chunked container; the format is detected.
+        key (bytes): Encryption key; loaded from the key file when not given.
+
+    Returns:
+        bytes: The plaintext.
+
+    Raises:
+        InvalidToken: If decryption fails due to an invalid key or corrupted data.
+    """
+    if is_chunked(encrypted_data):
+        return decrypt_bytes_chunked(encrypted_data, key)
+    return Fernet(key or load_key()).decrypt(encrypted_data)
+
 def decrypt_file(input_path, output_path):
     """
     Decrypts an encrypted file and saves the plaintext to the specified output path.
+    Chunked containers are decrypted as a stream; Fernet files are read whole.
 
     Parameters:
         input_path (str): Path to the encrypted input file.
@@ -21,16 +41,16 @@ def decrypt_file(input_path, output_path):
         if not os.path.exists(input_path):
             raise FileNotFoundError(f"Encrypted file not found: {input_path}")
 
-        key = load_key()
-        fernet = Fernet(key)
-
-        with open(input_path, 'rb') as enc_file:
-            encrypted_data = enc_file.read()
+        if is_chunked_file(input_path):
+            decrypt_file_chunked(input_path, output_path)
+        else:
+            with open(input_path, 'rb') as enc_file:
+                encrypted_data = enc_file.read()
 
-        decrypted_data = fernet.decrypt(encrypted_data)
+            decrypted_data = decrypt_bytes(encrypted_data)
 
-        with open(output_path, 'wb') as dec_file:
-            dec_file.write(decrypted_data)
+            with open(output_path, 'wb') as dec_file:
+                dec_file.write(decrypted_data)
 
         print(f"File decrypted: {input_path} -> {output_path}")
     except FileNotFoundError as fnf_error:
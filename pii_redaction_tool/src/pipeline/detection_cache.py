@@ -0,0 +1,185 @@
+# src/pipeline/detection_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from cryptography.fernet import Fernet, InvalidToken
+
+DEFAULT_MAX_ENTRIES = 50000
+# How long a writer waits for another process holding the database lock
+DEFAULT_BUSY_TIMEOUT_SECONDS = 30
+
+def normalize_line_text(text):
+    """
+    Collapses whitespace so OCR spacing differences map to the same cache entry.
+    """
+    return " ".join(text.split())
+
+def make_line_key(text, enabled_types, model_version):
+    """
+    Builds the cache key for one line.
+
+    Parameters:
+        text (str): Line text.
+        enabled_types (Iterable[str]): Enabled PII types.
+        model_version (str): Identifies the models and rules that produced the spans.
+
+    Returns:
+        str: Hex digest of the normalized text, the sorted enabled types and the model version.
+    """
+    payload = "\x1f".join([model_version, ",".join(sorted(enabled_types)), normalize_line_text(text)])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class LineDetectionCache:
+    """
+    Bounded LRU of per-line detection results, optionally persisted to a local SQLite file.
+
+    Recurring lines (issuer names, field labels, addresses printed on every card) are
+    detected once; later occurrences reuse the stored entity spans and skip NER and the
+    regex scan entirely.
+
+    The spans hold the detected PII text, so the SQLite file stores them encrypted with
+    `key`. Writes and last-used times are kept in memory and written in one transaction
+    by flush, so other processes sharing the file are never left waiting on a lock.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, sqlite_path=None, key=None,
+                 busy_timeout=DEFAULT_BUSY_TIMEOUT_SECONDS):
+        self.max_entries = max_entries
+        self.sqlite_path = sqlite_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._fernet = Fernet(key) if key else None
+        self._pending = {}
+        self._touched = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if sqlite_path:
+            os.makedirs(os.path.dirname(os.path.abspath(sqlite_path)), exist_ok=True)
+            self._db = sqlite3.connect(sqlite_path, timeout=busy_timeout, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS line_cache (key TEXT PRIMARY KEY, spans TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key):
+        """
+        Returns the stored spans for `key`, or None on a miss.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT spans FROM line_cache WHERE key = ?", (key,)).fetchone()
+                spans = self._decode(row[0]) if row is not None else None
+                if spans is not None:
+                    self._touched[key] = time.time()
+                    self._store(key, spans)
+                    self.hits += 1
+                    return spans
+
+            self.misses += 1
+            return None
+
+    def _encode(self, spans):
+        payload = json.dumps(spans, ensure_ascii=False)
+        return self._fernet.encrypt(payload.encode('utf-8')).decode('ascii') if self._fernet else payload
+
+    def _decode(self, payload):
+        try:
+            if self._fernet:
+                payload = self._fernet.decrypt(payload.encode('ascii')).decode('utf-8')
+            return json.loads(payload)
+        except (InvalidToken, ValueError):
+            # Written with another key, or unencrypted by an earlier version; treat as a miss
+            return None
+
+    def put(self, key, spans):
+        with self._lock:
+            self._store(key, spans)
+            if self._db is not None:
+                self._pending[key] = spans
+
+    def flush(self):
+        """
+        Writes pending lines and last-used times in one transaction and trims the SQLite file
+        to the `max_entries` most recently used lines.
+        """
+        with self._lock:
+            if self._db is None or not (self._pending or self._touched):
+                return
+            now = time.time()
+            self._db.executemany(
+                "UPDATE line_cache SET last_used = ? WHERE key = ?",
+                [(last_used, key) for key, last_used in self._touched.items()]
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO line_cache (key, spans, last_used) VALUES (?, ?, ?)",
+                [(key, self._encode(spans), now) for key, spans in self._pending.items()]
+            )
+            self._pending = {}
+            self._touched = {}
+            cursor = self._db.execute(
+                "DELETE FROM line_cache WHERE key NOT IN "
+                "(SELECT key FROM line_cache ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self.evictions += max(cursor.rowcount, 0)
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pending = {}
+            self._touched = {}
+            if self._db is not None:
+                self._db.execute("DELETE FROM line_cache")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'evictions': self.evictions
+            }
+
+    def _store(self, key, spans):
+        self._entries[key] = spans
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_line_cache(max_entries=DEFAULT_MAX_ENTRIES, sqlite_path=None, key=None):
+    """
+    Returns the process-wide line cache for `sqlite_path` (None for a memory-only cache).
+    """
+    with _caches_lock:
+        cache = _caches.get(sqlite_path)
+        if cache is None:
+            cache = LineDetectionCache(max_entries, sqlite_path, key)
+            _caches[sqlite_path] = cache
+        cache.max_entries = max_entries
+        return cache
+
+def get_line_caches():
+    with _caches_lock:
+        return list(_caches.values())
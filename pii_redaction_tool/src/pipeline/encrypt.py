@@ -2,15 +2,40 @@
 
 from cryptography.fernet import Fernet
 from pipeline.utils import load_key
+from pipeline.chunked_crypto import encrypt_bytes_chunked, encrypt_file_chunked
 import os
 
-def encrypt_file(input_path, output_path):
+# 'fernet' writes one Fernet token; 'chunked' writes the streaming AES-GCM container (see chunked_crypto)
+FERNET_FORMAT = 'fernet'
+CHUNKED_FORMAT = 'chunked'
+
+def encrypt_bytes(data, key=None, file_format=FERNET_FORMAT):
+    """
+    Encrypts a plaintext buffer.
+
+    Parameters:
+        data (bytes): Plaintext.
+        key (bytes): Encryption key; loaded from the key file when not given.
+        file_format (str): 'fernet' or 'chunked'.
+
+    Returns:
+        bytes: The encrypted data.
+    """
+    if file_format == CHUNKED_FORMAT:
+        return encrypt_bytes_chunked(data, key)
+    if file_format != FERNET_FORMAT:
+        raise ValueError(f"Unknown encryption format: {file_format}")
+    return Fernet(key or load_key()).encrypt(data)
+
+def encrypt_file(input_path, output_path, file_format=FERNET_FORMAT):
     """
     Encrypts a file and saves it to the specified output path.
 
     Parameters:
         input_path (str): Path to the plaintext input file.
         output_path (str): Path to save the encrypted file.
+        file_format (str): 'fernet' or 'chunked'. The chunked format streams the file in
+                           bounded memory and encrypts chunks in parallel.
 
     Raises:
         FileNotFoundError: If the input file does not exist.
@@ -20,16 +45,16 @@ def encrypt_file(input_path, output_path):
         if not os.path.exists(input_path):
             raise FileNotFoundError(f"Input file not found: {input_path}")
 
-        key = load_key()
-        fernet = Fernet(key)
-
-        with open(input_path, 'rb') as file:
-            original_data = file.read()
+        if file_format == CHUNKED_FORMAT:
+            encrypt_file_chunked(input_path, output_path)
+        else:
+            with open(input_path, 'rb') as file:
+                original_data = file.read()
 
-        encrypted_data = fernet.encrypt(original_data)
+            encrypted_data = encrypt_bytes(original_data, file_format=file_format)
 
-        with open(output_path, 'wb') as encrypted_file:
-            encrypted_file.write(encrypted_data)
+            with open(output_path, 'wb') as encrypted_file:
+                encrypted_file.write(encrypted_data)
 
         print(f"File encrypted: {input_path} -> {output_path}")
     except Exception as e:
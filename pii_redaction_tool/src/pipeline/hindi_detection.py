@@ -1,17 +1,84 @@
 # src/pipeline/hindi_detection.py
 
+import bisect
 import re
-from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
 import sys
+from pipeline.model_registry import get_ner_pipeline, HINDI_NER_MODEL
 
-def perform_hindi_ner(cleaned_text, model_name="ai4bharat/IndicNER", logger=None):
+# IndicNER accepts 512 tokens including [CLS] and [SEP]; shorter windows batch with less padding
+DEFAULT_WINDOW_TOKENS = 256
+# Tokens shared by consecutive windows, so a name cut at one window's edge is whole in the next
+DEFAULT_WINDOW_OVERLAP = 64
+DEFAULT_NER_BATCH_SIZE = 8
+
+def split_token_windows(text, tokenizer, window_tokens=DEFAULT_WINDOW_TOKENS, overlap_tokens=DEFAULT_WINDOW_OVERLAP):
+    """
+    Splits `text` into overlapping windows of at most `window_tokens` tokens.
+
+    Window edges inside the text are moved inwards to the nearest whitespace, so no word
+    is cut in half. Needs a fast tokenizer for the token offsets.
+
+    Returns:
+        List[tuple]: (start, end) character offsets of each window in `text`.
+    """
+    offsets = [
+        (start, end) for start, end in tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)['offset_mapping']
+        if end > start
+    ]
+    if len(offsets) <= window_tokens:
+        return [(0, len(text))]
+
+    step = max(window_tokens - overlap_tokens, 1)
+    windows = []
+    for first in range(0, len(offsets), step):
+        last = min(first + window_tokens, len(offsets)) - 1
+        start = 0 if first == 0 else offsets[first][0]
+        end = len(text) if last == len(offsets) - 1 else offsets[last][1]
+        if start > 0 and not text[start - 1].isspace():
+            space = re.search(r'\s+', text[start:end])
+            if space is not None:
+                start += space.end()
+        if end < len(text) and not text[end].isspace():
+            space = max((match.start() for match in re.finditer(r'\s+', text[start:end])), default=None)
+            # Whitespace at the very start of the window would leave it empty; a word longer
+            # than the window is cut rather than dropped
+            if space is not None and space > 0:
+                end = start + space
+        windows.append((start, end))
+        if last == len(offsets) - 1:
+            break
+    return windows
+
+def merge_window_entities(entities):
+    """
+    Merges person spans found by overlapping windows. Spans that overlap are the same name
+    seen twice, or seen whole in one window and cut off in the other, so they are joined
+    into their union with the higher confidence.
+    """
+    merged = []
+    for entity in sorted(entities, key=lambda entity: (entity['start'], -entity['end'])):
+        if merged and entity['start'] < merged[-1]['end']:
+            previous = merged[-1]
+            previous['end'] = max(previous['end'], entity['end'])
+            previous['confidence'] = max(previous['confidence'], entity['confidence'])
+        else:
+            merged.append(dict(entity))
+    return merged
+
+def perform_hindi_ner(cleaned_text, model_name=HINDI_NER_MODEL, logger=None, backend='torch', onnx_options=None,
+                      window_tokens=DEFAULT_WINDOW_TOKENS, overlap_tokens=DEFAULT_WINDOW_OVERLAP,
+                      batch_size=DEFAULT_NER_BATCH_SIZE):
     """
     Perform Named Entity Recognition on the cleaned Hindi text.
-    Expects to return person entities with 'start' and 'end' indices.
+    Returns person entities with 'start' and 'end' indices into `cleaned_text`.
+    `backend` selects the PyTorch ('torch') or quantized ONNX Runtime ('onnx') model.
+
+    Text longer than `window_tokens` tokens is split into overlapping windows that run
+    through the model `batch_size` at a time; entities from all windows are merged.
     """
     try:
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
-        model = AutoModelForTokenClassification.from_pretrained(model_name)
+        # Use CPU. Pass device=0 if GPU is available.
+        ner_pipeline_obj = get_ner_pipeline(model_name, device=-1, backend=backend, onnx_options=onnx_options)
     except OSError as e:
         if logger:
             logger.error(f"Error loading the model '{model_name}': {e}")
@@ -21,40 +88,98 @@ def perform_hindi_ner(cleaned_text, model_name="ai4bharat/IndicNER", logger=None
             print("Ensure the model name is correct and you have internet connectivity.")
         sys.exit(1)
 
-    ner_pipeline_obj = pipeline(
-        "token-classification",
-        model=model,
-        tokenizer=tokenizer,
-        aggregation_strategy="simple",
-        device=-1  # Use CPU. Set to 0 if GPU is available.
-    )
-
-    ner_results = ner_pipeline_obj(cleaned_text)
+    if getattr(ner_pipeline_obj.tokenizer, 'is_fast', False):
+        windows = split_token_windows(cleaned_text, ner_pipeline_obj.tokenizer, window_tokens, overlap_tokens)
+    else:
+        # Slow tokenizers have no offset mapping; the model sees the text in one piece
+        windows = [(0, len(cleaned_text))]
+
+    if len(windows) == 1:
+        window_results = [ner_pipeline_obj(cleaned_text)]
+    else:
+        window_results = ner_pipeline_obj([cleaned_text[start:end] for start, end in windows], batch_size=batch_size)
+        message = f"IndicNER ran over {len(windows)} windows of up to {window_tokens} tokens in batches of {batch_size}"
+        if logger:
+            logger.info(message)
+        else:
+            print(message)
 
     person_entities = []
-    for entity in ner_results:
-        if entity.get("entity_group") == "PER":
-            # Safely extract start/end, or default to None if not present
-            person_name = entity["word"].replace("##", "")
-            confidence = entity["score"]
-            start = entity.get("start")
-            end = entity.get("end")
-
-            # Only append if start and end exist
-            if start is not None and end is not None:
-                person_entities.append({
-                    "name": person_name,
-                    "confidence": confidence,
-                    "start": start,
-                    "end": end
-                })
+    for (window_start, _), ner_results in zip(windows, window_results):
+        for entity in ner_results:
+            # Safely extract start/end, and skip entities that have none
+            if entity.get("entity_group") != "PER" or entity.get("start") is None or entity.get("end") is None:
+                continue
+            person_entities.append({
+                "confidence": entity["score"],
+                "start": window_start + entity["start"],
+                "end": window_start + entity["end"]
+            })
 
+    person_entities = merge_window_entities(person_entities)
+    for entity in person_entities:
+        entity["name"] = cleaned_text[entity["start"]:entity["end"]]
     return person_entities
 
+def assemble_hindi_text(word_info_list, separator=' '):
+    """
+    Joins the Hindi OCR fragments into the text passed to NER and records where each fragment lies in it.
+
+    Parameters:
+        word_info_list (list of dicts): Fragments from filter_hindi_ocr_results, in reading order.
+        separator (str): Inserted between fragments.
+
+    Returns:
+        tuple: (text, fragments). `fragments` are copies of the non-empty input fragments
+               with 'start' and 'end' character offsets into `text`.
+    """
+    parts = []
+    fragments = []
+    offset = 0
+    for word in word_info_list:
+        text = word.get('text')
+        if not text:
+            continue
+        if parts:
+            parts.append(separator)
+            offset += len(separator)
+        parts.append(text)
+        fragments.append(dict(word, start=offset, end=offset + len(text)))
+        offset += len(text)
+    return ''.join(parts), fragments
+
+class FragmentIndex:
+    """
+    Sorted interval index over fragments with character offsets, for finding the
+    fragments an entity span overlaps with two binary searches.
+
+    Fragments must not overlap each other, as is the case for assemble_hindi_text output,
+    so sorting by start also sorts them by end.
+    """
+
+    def __init__(self, fragments):
+        self.fragments = sorted(
+            (word for word in fragments if word.get('start') is not None and word.get('end') is not None),
+            key=lambda word: word['start']
+        )
+        self.starts = [word['start'] for word in self.fragments]
+        self.ends = [word['end'] for word in self.fragments]
+
+    def overlapping(self, start, end):
+        """
+        Returns the fragments that share at least one character with [start, end).
+        """
+        first = bisect.bisect_right(self.ends, start)
+        last = bisect.bisect_left(self.starts, end)
+        return self.fragments[first:last]
+
 def map_hindi_entities_to_bboxes(person_entities, word_info_list):
     """
     Map detected person entities to a single bounding box similar to English pipeline.
     If 'start' or 'end' are missing, skip that entity.
+
+    `word_info_list` holds fragments with the offsets recorded by assemble_hindi_text, or
+    the raw OCR fragments, which are then assumed to have been joined with single spaces.
     """
 
     def merge_bboxes(bboxes):
@@ -72,43 +197,38 @@ def map_hindi_entities_to_bboxes(person_entities, word_info_list):
             'height': float(max_y - min_y)
         }
 
+    if any(word.get('start') is None for word in word_info_list if word.get('text')):
+        _, word_info_list = assemble_hindi_text(word_info_list)
+    index = FragmentIndex(word_info_list)
+
     mapped_entities = []
 
     for entity in person_entities:
         # Skip if 'start' or 'end' not present
-        if "start" not in entity or "end" not in entity:
+        if entity.get("start") is None or entity.get("end") is None:
             continue
 
         name = entity['name']
-        confidence = entity['confidence']
-        start = entity['start']
-        end = entity['end']
-
-        bboxes = []
-        # Accumulate all bounding boxes of words that overlap the entity text indices
-        for word in word_info_list:
-            word_start = word.get('start')
-            word_end = word.get('end')
-            if word_start is None or word_end is None:
-                continue
 
-            # Check for character index overlap
-            if not (word_end <= start or word_start >= end):
-                bboxes.append(word['bbox'])
+        bboxes_by_page = {}
+        # Accumulate the bounding boxes of all fragments that overlap the entity text indices
+        for word in index.overlapping(entity['start'], entity['end']):
+            bboxes_by_page.setdefault(word.get('page', 0), []).append(word['bbox'])
 
-        # Merge all bounding boxes into one
-        merged_box = merge_bboxes(bboxes)
+        # Merge the bounding boxes of each page into one; an entity spanning a page break gets one box per page
+        for page_num, bboxes in sorted(bboxes_by_page.items()):
+            merged_box = merge_bboxes(bboxes)
 
-        # If merged_box is None, entity had no valid bounding boxes
-        if merged_box is None:
-            # You can either skip or just continue without bounding box
-            continue
+            # If merged_box is None, entity had no valid bounding boxes
+            if merged_box is None:
+                continue
 
-        # Return a structure similar to English detection
-        mapped_entities.append({
-            'type': 'person',    # Assign a type - Hindi NER currently detects persons
-            'text': name,         # Use 'text' instead of 'name' to be consistent
-            'bounding_box': merged_box
-        })
+            # Return a structure similar to English detection
+            mapped_entities.append({
+                'type': 'person',    # Assign a type - Hindi NER currently detects persons
+                'text': name,         # Use 'text' instead of 'name' to be consistent
+                'bounding_box': merged_box,
+                'page': page_num
+            })
 
-    return mapped_entities
\ No newline at end of file
+    return mapped_entities
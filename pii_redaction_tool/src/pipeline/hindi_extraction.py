@@ -5,10 +5,123 @@ import sys
 import os
 import numpy as np
 import logging
-from PIL import Image, ImageDraw, ImageFont
-from transformers import AutoModelForTokenClassification, AutoTokenizer, pipeline
+import threading
+from contextlib import contextmanager
 import easyocr
-from pdf2image import convert_from_path
+from pipeline.ocr_store import hash_page_pixels, make_page_key
+from pipeline.model_registry import get_registry, EASYOCR_MODEL
+
+DEFAULT_READERS_PER_LANGUAGE_SET = 1
+DEFAULT_READTEXT_BATCH_SIZE = 4
+OCR_ENGINE = 'easyocr'
+
+def ocr_model_version(languages):
+    return f"{easyocr.__version__}:{'+'.join(languages)}"
+
+def _serializable_results(ocr_results):
+    # EasyOCR returns NumPy scalars in boxes and confidences
+    return [
+        [[[float(x), float(y)] for x, y in bbox], text, float(conf)]
+        for bbox, text, conf in ocr_results
+    ]
+
+def _stored_results(stored):
+    return [(bbox, text, conf) for bbox, text, conf in stored]
+
+class ReaderPool:
+    """
+    Thread-safe pool of EasyOCR readers keyed by language set.
+
+    Loading a reader pulls in the CRAFT detector and the recognizer weights, so readers
+    are created once and reused across pages and files. A reader is used by one thread at
+    a time; up to `max_readers` readers are created per language set for concurrent callers.
+
+    The pool only hands out reader slots; the readers themselves are loaded through the
+    model registry, pinned so they count in its statistics without being evicted.
+    """
+
+    def __init__(self, max_readers=DEFAULT_READERS_PER_LANGUAGE_SET, gpu=False):
+        self.max_readers = max_readers
+        self.gpu = gpu
+        self._idle = {}
+        self._created = {}
+        self._condition = threading.Condition()
+        self.loads = 0
+        self.reuses = 0
+
+    def _load(self, key, slot):
+        loaded = []
+
+        def loader():
+            loaded.append(True)
+            return easyocr.Reader(list(key), gpu=self.gpu)
+
+        # The pool bounds the number of readers, so the registry must not evict them
+        reader = get_registry().get(
+            f"{EASYOCR_MODEL}[{'+'.join(key)}]#{slot}", 'cuda' if self.gpu else 'cpu', loader, pinned=True
+        )
+        with self._condition:
+            if loaded:
+                self.loads += 1
+            else:
+                self.reuses += 1
+        return reader
+
+    @contextmanager
+    def reader(self, languages):
+        """
+        Borrows a reader for `languages`, waiting if all readers for that set are busy.
+        """
+        key = tuple(languages)
+        with self._condition:
+            while True:
+                idle = self._idle.setdefault(key, [])
+                if idle:
+                    slot = idle.pop()
+                    break
+                if self._created.get(key, 0) < self.max_readers:
+                    slot = self._created.get(key, 0)
+                    self._created[key] = slot + 1
+                    break
+                self._condition.wait()
+
+        try:
+            reader = self._load(key, slot)
+        except Exception:
+            with self._condition:
+                self._idle[key].append(slot)
+                self._condition.notify()
+            raise
+
+        try:
+            yield reader
+        finally:
+            with self._condition:
+                self._idle[key].append(slot)
+                self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            return {
+                'loads': self.loads,
+                'reuses': self.reuses,
+                'language_sets': [list(key) for key in self._created]
+            }
+
+_reader_pool = ReaderPool()
+
+def get_reader_pool():
+    return _reader_pool
+
+def configure_reader_pool(max_readers=DEFAULT_READERS_PER_LANGUAGE_SET, gpu=False):
+    """
+    Sets how many EasyOCR readers may be created per language set and whether they run on GPU.
+    Readers that already exist are kept.
+    """
+    with _reader_pool._condition:
+        _reader_pool.max_readers = max_readers
+        _reader_pool.gpu = gpu
+        _reader_pool._condition.notify_all()
 
 def setup_logging(output_dir='output', log_file='hindi_results.log'):
     """
@@ -44,22 +157,90 @@ def setup_logging(output_dir='output', log_file='hindi_results.log'):
     
     return logger
 
-def extract_text_with_bboxes(input_image, languages=['hi']):
+def extract_text_with_bboxes(input_image, languages=['hi'], store=None):
     """
     Extract text and bounding boxes from an image using EasyOCR.
 
     Args:
-        input_image (PIL.Image.Image): PIL Image object.
+        input_image (PIL.Image.Image or np.ndarray): Page image.
         languages (list): List of languages to be used by EasyOCR.
+        store (OcrResultStore): Persistent OCR results keyed by page pixels, or None.
 
     Returns:
         list of tuples: Each tuple contains (bounding_box, text, confidence).
     """
-    reader = easyocr.Reader(languages, gpu=False)  # Set gpu=True if GPU is available
-    results = reader.readtext(np.array(input_image), detail=1, paragraph=False)
+    # Arrays rendered by pipeline.rasterize are used as they are, without a copy
+    array = np.asarray(input_image)
+    store_key = None
+    if store is not None:
+        store_key = make_page_key(hash_page_pixels(array), OCR_ENGINE, ocr_model_version(languages))
+        stored = store.get(store_key)
+        if stored is not None:
+            return _stored_results(stored)
+
+    with _reader_pool.reader(languages) as reader:
+        results = reader.readtext(array, detail=1, paragraph=False)
+    if store is not None:
+        store.put(store_key, _serializable_results(results))
+    return results
+
+def extract_text_with_bboxes_batch(input_images, languages=['hi'], batch_size=DEFAULT_READTEXT_BATCH_SIZE, store=None):
+    """
+    Extract text and bounding boxes from many images with a single pooled EasyOCR reader.
+
+    Images with the same dimensions (e.g. the pages of one PDF) are recognized together
+    with `readtext_batched`; images of a unique size fall back to `readtext`. Images
+    found in `store` are not OCRed again.
+
+    Args:
+        input_images (list): PIL Image objects or NumPy arrays.
+        languages (list): List of languages to be used by EasyOCR.
+        batch_size (int): Number of images per recognizer batch.
+        store (OcrResultStore): Persistent OCR results keyed by page pixels, or None.
+
+    Returns:
+        list of lists: OCR results for each input image, in input order, in the same
+        (bounding_box, text, confidence) format as extract_text_with_bboxes.
+    """
+    arrays = [np.asarray(image) for image in input_images]
+    results = [[] for _ in arrays]
+    store_keys = [None] * len(arrays)
+
+    groups = {}
+    for index, array in enumerate(arrays):
+        if store is not None:
+            store_keys[index] = make_page_key(hash_page_pixels(array), OCR_ENGINE, ocr_model_version(languages))
+            stored = store.get(store_keys[index])
+            if stored is not None:
+                results[index] = _stored_results(stored)
+                continue
+        groups.setdefault(array.shape, []).append(index)
+
+    if not groups:
+        return results
+
+    with _reader_pool.reader(languages) as reader:
+        for indices in groups.values():
+            if len(indices) == 1:
+                results[indices[0]] = reader.readtext(arrays[indices[0]], detail=1, paragraph=False)
+                continue
+            batched = reader.readtext_batched(
+                [arrays[i] for i in indices],
+                batch_size=batch_size,
+                detail=1,
+                paragraph=False
+            )
+            for index, page_results in zip(indices, batched):
+                results[index] = page_results
+
+    if store is not None:
+        for indices in groups.values():
+            for index in indices:
+                store.put(store_keys[index], _serializable_results(results[index]))
+        store.flush()
     return results
 
-def filter_hindi_ocr_results(ocr_results, image_width, image_height):
+def filter_hindi_ocr_results(ocr_results, image_width, image_height, page_index=0):
     """
     Filter OCR results to include only Hindi text, excluding numbers, English letters, and unwanted special characters.
 
@@ -67,9 +248,10 @@ def filter_hindi_ocr_results(ocr_results, image_width, image_height):
         ocr_results (list of tuples): Each tuple contains (bounding_box, text, confidence).
         image_width (int): Width of the image in pixels.
         image_height (int): Height of the image in pixels.
+        page_index (int): Zero-based index of the page the results belong to.
 
     Returns:
-        list of dicts: Each dict contains 'text' and 'bbox' for filtered OCR results.
+        list of dicts: Each dict contains 'text', 'bbox' and 'page' for filtered OCR results.
     """
     filtered = []
     pattern = re.compile(r'^[\u0900-\u097F।\s]+$')  # Only Hindi characters and '।'
@@ -94,6 +276,7 @@ def filter_hindi_ocr_results(ocr_results, image_width, image_height):
             )
             filtered.append({
                 'text': text,
-                'bbox': normalized_bbox
+                'bbox': normalized_bbox,
+                'page': page_index
             })
     return filtered
\ No newline at end of file
@@ -0,0 +1,165 @@
+# src/pipeline/model_registry.py
+
+import threading
+import time
+from collections import OrderedDict
+
+ENGLISH_NER_MODEL = "dbmdz/bert-large-cased-finetuned-conll03-english"
+HINDI_NER_MODEL = "ai4bharat/IndicNER"
+DOCTR_OCR_MODEL = "doctr/ocr_predictor"
+EASYOCR_MODEL = "easyocr/reader"
+
+DEFAULT_MAX_ENTRIES = 4
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded models.
+
+    Instances are created lazily on first use, kept warm afterwards and keyed by
+    (model name, device). When more than `max_entries` models are resident, the
+    least recently used one is evicted. Pinned models (e.g. the EasyOCR readers, whose
+    number the reader pool bounds) are counted in the statistics but never evicted and
+    do not count towards `max_entries`.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self._pinned = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_time = 0.0
+
+    def get(self, model_name, device, loader, pinned=False):
+        """
+        Returns the cached instance for (model_name, device), loading it with `loader` on a miss.
+
+        Parameters:
+            model_name (str): Name of the model (e.g. a Hugging Face model id).
+            device: Device the model runs on (e.g. -1 or 'cpu'). Part of the cache key.
+            loader (callable): Zero-argument callable that builds the instance.
+            pinned (bool): Keep the instance until clear(), outside the `max_entries` limit.
+
+        Returns:
+            object: The warm model instance.
+        """
+        key = (model_name, str(device))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock so other models stay available, but make sure
+        # two threads asking for the same model only load it once.
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key]
+                self.misses += 1
+
+            start = time.perf_counter()
+            instance = loader()
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self.load_time += elapsed
+                self._entries[key] = instance
+                self._entries.move_to_end(key)
+                if pinned:
+                    self._pinned.add(key)
+                self._evict()
+            print(f"Loaded model '{model_name}' on {device} in {elapsed:.2f}s")
+            return instance
+
+    def resize(self, max_entries):
+        """
+        Changes the maximum number of resident models, evicting the least recently used ones if needed.
+        """
+        with self._lock:
+            self.max_entries = max_entries
+            self._evict()
+
+    def _evict(self):
+        # Called with the lock held
+        evictable = [key for key in self._entries if key not in self._pinned]
+        while self.max_entries and len(evictable) > self.max_entries:
+            evicted_key = evictable.pop(0)
+            del self._entries[evicted_key]
+            self.evictions += 1
+            print(f"Evicted model from registry: {evicted_key[0]} ({evicted_key[1]})")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit/miss/eviction counters, cumulative load time in seconds and the resident keys.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'load_time': self.load_time,
+                'size': len(self._entries),
+                'pinned': len(self._pinned),
+                'max_entries': self.max_entries,
+                'models': [f"{name} ({device})" for name, device in self._entries]
+            }
+
+_registry = ModelRegistry()
+
+def get_registry():
+    return _registry
+
+def get_ner_pipeline(model_name=ENGLISH_NER_MODEL, device=-1, backend='torch', onnx_options=None):
+    """
+    Returns a warm Hugging Face token-classification pipeline for `model_name`.
+
+    Parameters:
+        model_name (str): Hugging Face model id.
+        device (int): Device for the PyTorch backend (-1 for CPU).
+        backend (str): 'torch' for the fp32 PyTorch model or 'onnx' for the int8 ONNX Runtime model.
+        onnx_options (dict): 'cache_dir', 'intra_op_threads' and 'inter_op_threads' for the ONNX backend.
+    """
+    if backend == 'onnx':
+        from pipeline.onnx_backend import load_onnx_ner_pipeline
+        onnx_options = onnx_options or {}
+        # Different thread counts or cache directories build different sessions
+        options = ",".join(f"{name}={onnx_options[name]}" for name in sorted(onnx_options))
+        return _registry.get(
+            f"{model_name}[onnx-int8]({options})" if options else f"{model_name}[onnx-int8]",
+            'cpu',
+            lambda: load_onnx_ner_pipeline(model_name, **onnx_options)
+        )
+    if backend != 'torch':
+        raise ValueError(f"Unknown NER backend: {backend}")
+
+    def loader():
+        from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForTokenClassification.from_pretrained(model_name)
+        return pipeline("ner", model=model, tokenizer=tokenizer, aggregation_strategy="simple", device=device)
+
+    return _registry.get(model_name, device, loader)
+
+def get_ocr_predictor(device='cpu'):
+    """
+    Returns a warm docTR OCR predictor.
+    """
+    def loader():
+        from doctr.models import ocr_predictor
+        return ocr_predictor(pretrained=True)
+
+    return _registry.get(DOCTR_OCR_MODEL, device, loader)
+
@@ -0,0 +1,148 @@
+# src/pipeline/ner_scheduler.py
+
+import json
+import queue
+import threading
+import time
+
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_WAIT_MS = 10
+
+class _PendingRequest:
+    def __init__(self, texts):
+        self.texts = texts
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class NerScheduler:
+    """
+    Collects NER lines submitted by concurrent callers into shared micro-batches.
+
+    A batch is flushed as soon as it holds `max_batch_size` lines or the oldest request
+    has waited `max_wait_ms`. Larger batches raise throughput under load, a shorter wait
+    keeps latency low when the process is mostly idle.
+    """
+
+    def __init__(self, run_batch, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        """
+        Parameters:
+            run_batch (callable): Takes a list of line texts and returns one entity list per line.
+            max_batch_size (int): Number of lines that triggers an immediate flush.
+            max_wait_ms (float): Longest time a request waits for other requests to join its batch.
+        """
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self.batches = 0
+        self.lines = 0
+        self.queue_time = 0.0
+        self.requests = 0
+
+    def submit(self, texts):
+        """
+        Queues the lines of one document and blocks until their entities are available.
+
+        Parameters:
+            texts (List[str]): Line texts.
+
+        Returns:
+            List[List[dict]]: Entities for each line, in input order.
+        """
+        if not texts:
+            return []
+        self._ensure_worker()
+        request = _PendingRequest(list(texts))
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'requests': self.requests,
+                'lines': self.lines,
+                'avg_batch_size': self.lines / self.batches if self.batches else 0.0,
+                'avg_queue_ms': 1000 * self.queue_time / self.requests if self.requests else 0.0,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait_ms
+            }
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="ner-scheduler", daemon=True)
+                self._worker.start()
+
+    def _collect_batch(self):
+        first = self._queue.get()
+        batch = [first]
+        line_count = len(first.texts)
+        deadline = first.enqueued_at + self.max_wait_ms / 1000.0
+        while line_count < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            line_count += len(request.texts)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            started = time.perf_counter()
+            texts = [text for request in batch for text in request.texts]
+            try:
+                results = self.run_batch(texts)
+                offset = 0
+                for request in batch:
+                    request.result = results[offset:offset + len(request.texts)]
+                    offset += len(request.texts)
+            except Exception as e:
+                print(f"NER micro-batch of {len(texts)} lines failed: {e}")
+                for request in batch:
+                    request.error = e
+
+            with self._lock:
+                self.batches += 1
+                self.lines += len(texts)
+                self.requests += len(batch)
+                self.queue_time += sum(started - request.enqueued_at for request in batch)
+            for request in batch:
+                request.done.set()
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+def get_ner_scheduler(model_name, run_batch, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                      backend='torch', options=None):
+    """
+    Returns the process-wide scheduler for `model_name` with these settings, creating it on first use.
+
+    Schedulers are keyed by the model, backend, pipeline options and batching settings, so
+    callers in one process that run the model differently (e.g. the Flask jobs on PyTorch and
+    the CLI pipeline on ONNX) never share a batch. Callers with the same key share the
+    scheduler and the `run_batch` of the first of them.
+
+    Parameters:
+        backend (str): NER backend the `run_batch` pipeline runs on ('torch' or 'onnx').
+        options (dict): Anything else that changes how `run_batch` runs (e.g. ONNX options, batch size).
+    """
+    key = (model_name, backend, json.dumps(options or {}, sort_keys=True, default=str), max_batch_size, max_wait_ms)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            scheduler = NerScheduler(run_batch, max_batch_size, max_wait_ms)
+            _schedulers[key] = scheduler
+        return scheduler
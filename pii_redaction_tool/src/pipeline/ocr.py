@@ -1,34 +1,279 @@
 # src/pipeline/ocr.py
 
-import os
 from pipeline.utils import load_pii_config
-from doctr.models import ocr_predictor
-from doctr.io import DocumentFile
+from pipeline.model_registry import get_ocr_predictor, DOCTR_OCR_MODEL
+from pipeline.ocr_store import hash_page_pixels, make_page_key, ocr_store_from_config
+from pipeline.rasterize import open_pdf, render_page, render_pages, DEFAULT_DPI
+import doctr
 import fitz  # PyMuPDF
 
-def pdf_to_images(pdf_path, output_dir='temp_images'):
+DEFAULT_PAGE_BATCH_SIZE = 8
+DEFAULT_MIN_TEXT_LAYER_WORDS = 3
+# Share of the page's image area the text layer must cover for the page to skip OCR. A scan
+# with a text footer or stamp has images the text layer says nothing about; a searchable
+# scan has its recognized text laid over the image.
+DEFAULT_MIN_IMAGE_TEXT_COVERAGE = 0.5
+OCR_ENGINE = 'doctr'
+
+def ocr_model_version():
+    return f"{DOCTR_OCR_MODEL}@{doctr.__version__}"
+
+def load_pages(file_path, data=None, dpi=DEFAULT_DPI):
+    """
+    Loads every page of an image or PDF as a NumPy array for docTR.
+
+    Parameters:
+        file_path (str): Path to the image or PDF file. Only its extension is used when `data` is given.
+        data (bytes): File contents, to load the pages without reading from disk.
+        dpi (int): Resolution PDF pages are rendered at.
+
+    Returns:
+        List[np.ndarray]: One array per page.
+    """
+    return render_pages(file_path, data, dpi)
+
+def image_text_coverage(page, words):
+    """
+    Returns the fraction of the area of the images on `page` covered by the text layer `words`,
+    or 1.0 if the page has no images.
+    """
+    images = [fitz.Rect(info['bbox']) & page.rect for info in page.get_image_info()]
+    images = [image for image in images if not image.is_empty]
+    image_area = sum(image.get_area() for image in images)
+    if not image_area:
+        return 1.0
+    covered = sum((fitz.Rect(word[:4]) & image).get_area() for word in words for image in images)
+    return min(covered / image_area, 1.0)
+
+def text_layer_lines(page, min_words=DEFAULT_MIN_TEXT_LAYER_WORDS, page_index=0,
+                     min_image_coverage=DEFAULT_MIN_IMAGE_TEXT_COVERAGE):
+    """
+    Builds line records from the embedded text layer of a PDF page.
+
+    Parameters:
+        page (fitz.Page): PDF page.
+        min_words (int): Minimum number of words for the text layer to count as usable.
+        min_image_coverage (float): Minimum share of the page's image area the words must cover;
+                                    below it the images hold text the layer lacks.
+
+    Returns:
+        List[dict] or None: Line records in the same normalized format as the OCR output,
+                            or None if the page has no usable text layer and needs OCR.
+    """
+    words = page.get_text("words")
+    if len(words) < min_words:
+        return None
+    if image_text_coverage(page, words) < min_image_coverage:
+        return None
+
+    page_rect = page.rect
+    page_width = page_rect.width
+    page_height = page_rect.height
+
+    # Each word: (x0, y0, x1, y1, text, block_no, line_no, word_no)
+    grouped = {}
+    for x0, y0, x1, y1, text, block_no, line_no, _ in words:
+        grouped.setdefault((block_no, line_no), []).append((x0, y0, x1, y1, text))
+
+    lines = []
+    for line_words in grouped.values():
+        x0 = min(w[0] for w in line_words) - page_rect.x0
+        y0 = min(w[1] for w in line_words) - page_rect.y0
+        x1 = max(w[2] for w in line_words) - page_rect.x0
+        y1 = max(w[3] for w in line_words) - page_rect.y0
+        lines.append({
+            'text': " ".join(w[4] for w in line_words),
+            'left': float(x0 / page_width),
+            'top': float(y0 / page_height),
+            'width': float((x1 - x0) / page_width),
+            'height': float((y1 - y0) / page_height),
+            # Embedded text is exact
+            'confidence': 1.0,
+            'page': page_index
+        })
+    return lines
+
+def iter_pages(file_path, use_text_layer=True, min_text_words=DEFAULT_MIN_TEXT_LAYER_WORDS, data=None,
+               render_text_pages=False, dpi=DEFAULT_DPI):
+    """
+    Yields the pages of an image or PDF, taking the PDF text layer where it is usable.
+
+    Parameters:
+        file_path (str): Path to the file. Only its extension is used when `data` is given.
+        data (bytes): File contents, to read the pages without touching disk.
+        render_text_pages (bool or callable): Also render pages read from the text layer, for
+                                  stages that need the page image regardless (e.g. Hindi OCR).
+                                  A callable is given the page's line records and decides per page.
+        dpi (int): Resolution PDF pages are rendered at.
+
+    Yields:
+        tuple: (page_index, lines, image). `lines` holds the line records of a born-digital
+               page and `image` is None unless `render_text_pages` asks for it; for pages that
+               need OCR `lines` is None and `image` is the rendered page.
+    """
+    if not file_path.lower().endswith(".pdf"):
+        for page_index, image in enumerate(load_pages(file_path, data)):
+            yield page_index, None, image
+        return
+
+    with open_pdf(file_path, data) as doc:
+        for page_index, page in enumerate(doc):
+            lines = text_layer_lines(page, min_text_words, page_index) if use_text_layer else None
+            if lines is not None:
+                render = render_text_pages(lines) if callable(render_text_pages) else render_text_pages
+                yield page_index, lines, render_page(page, dpi) if render else None
+            else:
+                yield page_index, None, render_page(page, dpi)
+
+def _page_lines(page, page_index=0):
+    """
+    Converts one docTR result page into line records.
     """
-    Converts a PDF to images using PyMuPDF.
+    lines = []
+    # docTR returns normalized coordinates (relative to page width/height)
+    for block in page.blocks:
+        for line_obj in block.lines:
+            line_text = " ".join(word.value for word in line_obj.words)
+            # geometry: ((x0, y0), (x1, y1))
+            (x0, y0), (x1, y1) = line_obj.geometry
+            # Convert normalized coords into width/height
+            left = float(x0)
+            top = float(y0)
+            width = float(x1 - x0)
+            height = float(y1 - y0)
+            # Mean word confidence; low for scripts outside the recognition vocabulary
+            confidence = sum(word.confidence for word in line_obj.words) / max(len(line_obj.words), 1)
+
+            lines.append({
+                'text': line_text,
+                'left': left,
+                'top': top,
+                'width': width,
+                'height': height,
+                'confidence': float(confidence),
+                'page': page_index
+            })
+    return lines
+
+def extract_text_and_coords_batch(file_paths, page_batch_size=DEFAULT_PAGE_BATCH_SIZE, use_text_layer=True,
+                                  min_text_words=DEFAULT_MIN_TEXT_LAYER_WORDS, store=None, contents=None,
+                                  dpi=DEFAULT_DPI):
+    """
+    Runs docTR OCR over the pages of many documents in large batches.
+
+    Pages from consecutive documents are packed into the same predictor call, so a
+    directory of single-page scans is OCRed in a few calls instead of one per file.
+    Only `page_batch_size` pages are held in memory at a time. PDF pages with a usable
+    text layer are read directly and never reach the OCR model, and pages whose pixels
+    were OCRed before are read from `store`.
 
     Parameters:
-        pdf_path (str): Path to the PDF file.
-        output_dir (str): Directory to save the images.
+        file_paths (List[str]): Paths to image or PDF files.
+        page_batch_size (int): Number of pages sent to the predictor per call.
+        use_text_layer (bool): Read born-digital PDF pages from their text layer instead of OCRing them.
+        min_text_words (int): Minimum number of words for a page's text layer to be used.
+        store (OcrResultStore): Persistent OCR results keyed by page pixels, or None.
+        contents (dict): Maps file paths to their in-memory contents; those files are not read from disk.
+        dpi (int): Resolution PDF pages are rendered at.
 
     Returns:
-        List[str]: Paths to the generated image files.
+        dict: Maps (file_path, page_index) to the list of line records of that page.
+              Documents that fail to load have no entries.
+    """
+    contents = contents or {}
+    results = {}
+    pending = []
+    text_layer_pages = 0
+    stored_pages = 0
+    model_version = ocr_model_version()
+
+    for file_path in file_paths:
+        try:
+            for page_index, lines, image in iter_pages(file_path, use_text_layer, min_text_words,
+                                                       data=contents.get(file_path), dpi=dpi):
+                if lines is not None:
+                    results[(file_path, page_index)] = lines
+                    text_layer_pages += 1
+                    continue
+                store_key = None
+                if store is not None:
+                    store_key = make_page_key(hash_page_pixels(image), OCR_ENGINE, model_version)
+                    stored = store.get(store_key)
+                    if stored is not None:
+                        results[(file_path, page_index)] = [dict(line, page=page_index) for line in stored]
+                        stored_pages += 1
+                        continue
+                pending.append(((file_path, page_index), image, store_key))
+                if len(pending) >= page_batch_size:
+                    _ocr_batch(pending, results, store)
+                    pending = []
+        except Exception as e:
+            print(f"Error loading {file_path} for OCR: {e}")
+            continue
+
+    if pending:
+        _ocr_batch(pending, results, store)
+    if text_layer_pages:
+        print(f"Read {text_layer_pages} of {len(results)} pages from the PDF text layer without OCR.")
+    if stored_pages:
+        print(f"Reused stored OCR results for {stored_pages} of {len(results)} pages.")
+    if store is not None:
+        store.flush()
+    return results
+
+def _ocr_batch(batch, results, store=None):
+    """
+    Runs one predictor call over `batch` of (result key, image, store key) and records the lines.
     """
-    os.makedirs(output_dir, exist_ok=True)
-    doc = fitz.open(pdf_path)
-    image_paths = []
+    result = get_ocr_predictor()([image for _, image, _ in batch])
+    for (key, _, store_key), page in zip(batch, result.pages):
+        results[key] = _page_lines(page, page_index=key[1])
+        if store is not None:
+            # The page index belongs to the document, not to the pixels
+            store.put(store_key, [{k: v for k, v in line.items() if k != 'page'} for line in results[key]])
+
+def ocr_page_images(images, page_batch_size=DEFAULT_PAGE_BATCH_SIZE, store=None):
+    """
+    OCRs already rendered pages.
+
+    Parameters:
+        images (dict): Maps page index to the page image (NumPy array).
+        page_batch_size (int): Number of pages sent to the predictor per call.
+        store (OcrResultStore): Persistent OCR results keyed by page pixels, or None.
 
-    for page_num in range(len(doc)):
-        page = doc.load_page(page_num)
-        pix = page.get_pixmap()
-        image_path = os.path.join(output_dir, f"page_{page_num + 1}.png")
-        pix.save(image_path)
-        image_paths.append(image_path)
+    Returns:
+        dict: Maps page index to the list of line records of that page.
+    """
+    results = {}
+    pending = []
+    model_version = ocr_model_version()
+    for page_index in sorted(images):
+        image = images[page_index]
+        store_key = None
+        if store is not None:
+            store_key = make_page_key(hash_page_pixels(image), OCR_ENGINE, model_version)
+            stored = store.get(store_key)
+            if stored is not None:
+                results[(None, page_index)] = [dict(line, page=page_index) for line in stored]
+                continue
+        pending.append(((None, page_index), image, store_key))
+        if len(pending) >= page_batch_size:
+            _ocr_batch(pending, results, store)
+            pending = []
+    if pending:
+        _ocr_batch(pending, results, store)
+    if store is not None:
+        store.flush()
+    return {page_index: lines for (_, page_index), lines in results.items()}
 
-    return image_paths
+def lines_by_document(batch_results):
+    """
+    Groups the output of extract_text_and_coords_batch into one line list per document, in page order.
+    """
+    documents = {}
+    for file_path, page_index in sorted(batch_results, key=lambda key: (str(key[0]), key[1])):
+        documents.setdefault(file_path, []).extend(batch_results[(file_path, page_index)])
+    return documents
 
 def extract_text_and_coords(file_path):
     """
@@ -38,49 +283,23 @@ def extract_text_and_coords(file_path):
         file_path (str): Path to the image or PDF file.
 
     Returns:
-        List[dict]: A list of dictionaries containing 'text', 'left', 'top', 'width', 'height' for each line.
+        List[dict]: A list of dictionaries containing 'text', 'left', 'top', 'width', 'height' and
+                    the zero-based 'page' index for each line.
     """
     try:
         config = load_pii_config()
-        ocr_model = ocr_predictor(pretrained=True)
-
-        # Determine if file is PDF or image
-        if file_path.lower().endswith(".pdf"):
-            try:
-                doc = DocumentFile.from_pdf(file_path)
-            except Exception as e:
-                print(f"Error reading PDF with docTR: {e}")
-                print("Attempting to convert PDF to images using PyMuPDF...")
-                image_paths = pdf_to_images(file_path)
-                doc = DocumentFile.from_images(image_paths)
-        else:
-            doc = DocumentFile.from_images(file_path)
-
-        result = ocr_model(doc)
-
-        extracted_data = []
-        # docTR returns normalized coordinates (relative to page width/height)
-        for page in result.pages:
-            for block in page.blocks:
-                for line_obj in block.lines:
-                    line_text = " ".join(word.value for word in line_obj.words)
-                    # geometry: ((x0, y0), (x1, y1))
-                    (x0, y0), (x1, y1) = line_obj.geometry
-                    # Convert normalized coords into width/height
-                    left = float(x0)
-                    top = float(y0)
-                    width = float(x1 - x0)
-                    height = float(y1 - y0)
-                    
-                    extracted_data.append({
-                        'text': line_text,
-                        'left': left,
-                        'top': top,
-                        'width': width,
-                        'height': height
-                    })
-        
-        return extracted_data
+        ocr_config = config.get('ocr', {})
+        text_layer_config = ocr_config.get('text_layer', {})
+
+        batch_results = extract_text_and_coords_batch(
+            [file_path],
+            page_batch_size=ocr_config.get('page_batch_size', DEFAULT_PAGE_BATCH_SIZE),
+            use_text_layer=text_layer_config.get('enabled', True),
+            min_text_words=text_layer_config.get('min_words', DEFAULT_MIN_TEXT_LAYER_WORDS),
+            store=ocr_store_from_config(ocr_config),
+            dpi=ocr_config.get('render_dpi', DEFAULT_DPI)
+        )
+        return lines_by_document(batch_results).get(file_path, [])
     except Exception as e:
         print(f"Error during OCR extraction: {e}")
-        return []
\ No newline at end of file
+        return []
@@ -0,0 +1,198 @@
+# src/pipeline/ocr_store.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+import numpy as np
+from cryptography.fernet import Fernet, InvalidToken
+from pipeline.utils import load_key
+
+DEFAULT_STORE_PATH = os.path.join('cache', 'ocr_results.sqlite')
+DEFAULT_MAX_ENTRIES = 20000
+# How long a writer waits for another process holding the database lock
+DEFAULT_BUSY_TIMEOUT_SECONDS = 30
+
+def hash_page_pixels(image):
+    """
+    Hashes the decoded pixels of a page, so the same scan re-encoded or re-rendered
+    to identical pixels maps to the same entry.
+
+    Parameters:
+        image (np.ndarray or PIL.Image.Image): Page image.
+
+    Returns:
+        str: Hex digest of the pixel buffer and its shape.
+    """
+    array = np.ascontiguousarray(np.asarray(image))
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{array.shape}|{array.dtype}".encode('utf-8'))
+    digest.update(array.data)
+    return digest.hexdigest()
+
+def make_page_key(pixel_hash, engine, model_version):
+    """
+    Builds the store key of one OCRed page.
+
+    Parameters:
+        pixel_hash (str): Output of hash_page_pixels.
+        engine (str): OCR engine name (e.g. 'doctr' or 'easyocr').
+        model_version (str): Identifies the engine version, model and settings (e.g. languages).
+    """
+    return f"{engine}:{model_version}:{pixel_hash}"
+
+class OcrResultStore:
+    """
+    SQLite store of OCR output per page image.
+
+    Detection and redaction settings are not part of the key, so changing the enabled
+    PII types reuses the stored OCR and only re-runs detection. Results are stored as
+    zlib-compressed JSON, encrypted with `key` when one is given since the recognized
+    text is itself PII. The least recently used pages are dropped beyond `max_entries`.
+
+    Several processes (workflow workers, Flask job threads) share one file. The database
+    runs in WAL mode so readers do not block the writer, and hits only record their
+    last-used time in memory; it is written with the next put or flush, so a lookup never
+    leaves a write transaction open.
+    """
+
+    def __init__(self, sqlite_path=DEFAULT_STORE_PATH, max_entries=DEFAULT_MAX_ENTRIES, key=None,
+                 busy_timeout=DEFAULT_BUSY_TIMEOUT_SECONDS):
+        self.sqlite_path = sqlite_path
+        self.max_entries = max_entries
+        self._fernet = Fernet(key) if key else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._touched = {}
+
+        os.makedirs(os.path.dirname(os.path.abspath(sqlite_path)), exist_ok=True)
+        self._db = sqlite3.connect(sqlite_path, timeout=busy_timeout, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_results (key TEXT PRIMARY KEY, payload BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def _encode(self, result):
+        payload = zlib.compress(json.dumps(result, ensure_ascii=False).encode('utf-8'))
+        return self._fernet.encrypt(payload) if self._fernet else payload
+
+    def _decode(self, payload):
+        if self._fernet:
+            payload = self._fernet.decrypt(payload)
+        return json.loads(zlib.decompress(payload).decode('utf-8'))
+
+    def get(self, key):
+        """
+        Returns the stored OCR result for `key`, or None on a miss.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT payload FROM ocr_results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                try:
+                    result = self._decode(row[0])
+                except (InvalidToken, zlib.error, ValueError):
+                    # Written with another key or corrupted; treat as a miss and overwrite later
+                    result = None
+                if result is not None:
+                    self._touched[key] = time.time()
+                    self.hits += 1
+                    return result
+            self.misses += 1
+            return None
+
+    def _write_touched(self):
+        # Caller holds self._lock and commits
+        if self._touched:
+            self._db.executemany(
+                "UPDATE ocr_results SET last_used = ? WHERE key = ?",
+                [(last_used, key) for key, last_used in self._touched.items()]
+            )
+            self._touched = {}
+
+    def put(self, key, result):
+        """
+        Stores the JSON-serializable OCR `result` of one page.
+        """
+        payload = self._encode(result)
+        with self._lock:
+            self._write_touched()
+            self._db.execute(
+                "INSERT OR REPLACE INTO ocr_results (key, payload, last_used) VALUES (?, ?, ?)",
+                (key, payload, time.time())
+            )
+            self._db.commit()
+
+    def flush(self):
+        """
+        Writes pending last-used times and trims the store to the `max_entries` most recently used pages.
+        """
+        with self._lock:
+            self._write_touched()
+            cursor = self._db.execute(
+                "DELETE FROM ocr_results WHERE key NOT IN "
+                "(SELECT key FROM ocr_results ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self.evictions += max(cursor.rowcount, 0)
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._touched = {}
+            self._db.execute("DELETE FROM ocr_results")
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            size = self._db.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'size': size,
+                'evictions': self.evictions
+            }
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_ocr_store(sqlite_path=DEFAULT_STORE_PATH, max_entries=DEFAULT_MAX_ENTRIES, key=None):
+    """
+    Returns the process-wide OCR result store for `sqlite_path`.
+    """
+    with _stores_lock:
+        store = _stores.get(sqlite_path)
+        if store is None:
+            store = OcrResultStore(sqlite_path, max_entries, key)
+            _stores[sqlite_path] = store
+        store.max_entries = max_entries
+        return store
+
+def get_ocr_stores():
+    with _stores_lock:
+        return list(_stores.values())
+
+def ocr_store_from_config(ocr_config):
+    """
+    Builds the OCR result store described by the `ocr.result_store` settings, or returns None if it is disabled.
+    """
+    store_config = ocr_config.get('result_store', {})
+    if not store_config.get('enabled', True):
+        return None
+    try:
+        key = load_key() if store_config.get('encrypt', True) else None
+    except FileNotFoundError:
+        print("Encryption key not found; OCR result store disabled.")
+        return None
+    return get_ocr_store(
+        sqlite_path=store_config.get('path', DEFAULT_STORE_PATH),
+        max_entries=store_config.get('max_entries', DEFAULT_MAX_ENTRIES),
+        key=key
+    )
@@ -0,0 +1,115 @@
+# src/pipeline/onnx_backend.py
+
+import os
+
+DEFAULT_ONNX_CACHE_DIR = os.path.join('models', 'onnx')
+QUANTIZED_FILE_NAME = 'model_quantized.onnx'
+
+def _model_dir(model_name, cache_dir):
+    return os.path.join(cache_dir, model_name.replace('/', '__'))
+
+def export_quantized_model(model_name, cache_dir=DEFAULT_ONNX_CACHE_DIR):
+    """
+    Exports a Hugging Face token-classification model to ONNX and applies dynamic int8 quantization.
+    The export is done once; later calls reuse the files in `cache_dir`.
+
+    Parameters:
+        model_name (str): Hugging Face model id, e.g. 'ai4bharat/IndicNER'.
+        cache_dir (str): Directory where exported models are kept.
+
+    Returns:
+        str: Directory containing the quantized model and its tokenizer.
+    """
+    from transformers import AutoTokenizer
+    from optimum.onnxruntime import ORTModelForTokenClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    model_dir = _model_dir(model_name, cache_dir)
+    if os.path.exists(os.path.join(model_dir, QUANTIZED_FILE_NAME)):
+        return model_dir
+
+    print(f"Exporting '{model_name}' to ONNX in {model_dir}...")
+    os.makedirs(model_dir, exist_ok=True)
+    model = ORTModelForTokenClassification.from_pretrained(model_name, export=True)
+    model.save_pretrained(model_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(model_dir)
+
+    # Dynamic quantization: int8 weights, activations quantized on the fly, no calibration data needed
+    quantizer = ORTQuantizer.from_pretrained(model)
+    quantization_config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=model_dir, quantization_config=quantization_config)
+    print(f"Quantized ONNX model saved to {model_dir}")
+    return model_dir
+
+def load_onnx_ner_pipeline(model_name, cache_dir=DEFAULT_ONNX_CACHE_DIR, intra_op_threads=0, inter_op_threads=0):
+    """
+    Builds a token-classification pipeline backed by the quantized ONNX Runtime model.
+
+    Parameters:
+        model_name (str): Hugging Face model id.
+        cache_dir (str): Directory where exported models are kept.
+        intra_op_threads (int): Threads used inside a single operator. 0 lets onnxruntime decide.
+        inter_op_threads (int): Threads used to run independent operators in parallel. 0 lets onnxruntime decide.
+
+    Returns:
+        transformers.Pipeline: Pipeline with the same output format as the PyTorch one.
+    """
+    import onnxruntime as ort
+    from transformers import AutoTokenizer, pipeline
+    from optimum.onnxruntime import ORTModelForTokenClassification
+
+    model_dir = export_quantized_model(model_name, cache_dir)
+
+    session_options = ort.SessionOptions()
+    session_options.intra_op_num_threads = intra_op_threads
+    session_options.inter_op_num_threads = inter_op_threads
+    session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    model = ORTModelForTokenClassification.from_pretrained(
+        model_dir,
+        file_name=QUANTIZED_FILE_NAME,
+        session_options=session_options,
+        provider='CPUExecutionProvider'
+    )
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    return pipeline("ner", model=model, tokenizer=tokenizer, aggregation_strategy="simple")
+
+def compare_ner_outputs(reference_pipeline, candidate_pipeline, texts):
+    """
+    Compares entity output of two NER pipelines on the same texts.
+
+    Entities are compared on (entity_group, start, end). Scores are ignored since
+    quantization shifts them slightly without changing the predicted spans.
+
+    Parameters:
+        reference_pipeline: Pipeline treated as ground truth (normally the PyTorch one).
+        candidate_pipeline: Pipeline under test (normally the ONNX one).
+        texts (List[str]): Fixture corpus.
+
+    Returns:
+        dict: 'matched', 'missing' and 'extra' entity counts, 'agreement' ratio and
+              the per-text 'mismatches'.
+    """
+    matched = missing = extra = 0
+    mismatches = []
+    for text in texts:
+        reference = {(e['entity_group'], e['start'], e['end']) for e in reference_pipeline(text)}
+        candidate = {(e['entity_group'], e['start'], e['end']) for e in candidate_pipeline(text)}
+        matched += len(reference & candidate)
+        missing += len(reference - candidate)
+        extra += len(candidate - reference)
+        if reference != candidate:
+            mismatches.append({
+                'text': text,
+                'missing': sorted(reference - candidate),
+                'extra': sorted(candidate - reference)
+            })
+
+    total = matched + missing + extra
+    return {
+        'matched': matched,
+        'missing': missing,
+        'extra': extra,
+        'agreement': matched / total if total else 1.0,
+        'mismatches': mismatches
+    }
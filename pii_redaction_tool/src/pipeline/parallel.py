@@ -0,0 +1,139 @@
+# src/pipeline/parallel.py
+
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import yaml
+from tqdm import tqdm
+from pipeline.workflow import load_workflow_settings, process_file
+from pipeline.model_registry import get_ner_pipeline, get_ocr_predictor, ENGLISH_NER_MODEL, HINDI_NER_MODEL
+from pipeline.hindi_extraction import get_reader_pool
+from pipeline.pii_detection import NER_ENTITY_TYPES
+
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+# Settings of the current worker process, filled in by init_worker
+_worker_settings = {}
+
+def threads_for_workers(workers, threads_per_worker=None):
+    """
+    Splits the machine's cores between `workers` processes unless a count is configured.
+    """
+    return threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+
+def limit_threads(threads):
+    """
+    Caps the intra-op thread pools of torch and the BLAS libraries in this process, so
+    several workers together do not start more threads than there are cores.
+    """
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only allowed before torch starts any parallel work
+        pass
+
+def warm_models(config, settings):
+    """
+    Loads the models this run needs into the worker's registry before the first document arrives.
+    """
+    if settings['english_enabled']:
+        get_ocr_predictor()
+        ner_config = config.get('ner', {})
+        # NER only runs when a type it detects is enabled
+        if any(settings['pii_types'].get(pii_type, False) for pii_type in NER_ENTITY_TYPES.values()):
+            get_ner_pipeline(
+                ENGLISH_NER_MODEL,
+                backend=ner_config.get('backend', 'torch'),
+                onnx_options=ner_config.get('onnx')
+            )
+
+    hindi_config = settings['hindi_config']
+    if settings['hindi_enabled'] and hindi_config.get('enabled', False):
+        get_ner_pipeline(
+            hindi_config.get('ner_model', HINDI_NER_MODEL),
+            device=-1,
+            backend=hindi_config.get('ner_backend', 'torch'),
+            onnx_options=hindi_config.get('onnx')
+        )
+        with get_reader_pool().reader(hindi_config.get('languages', ['hi'])):
+            pass
+
+def init_worker(pii_config_path, output_dir, temp_dir, threads):
+    limit_threads(threads)
+
+    with open(pii_config_path, 'r') as file:
+        config = yaml.safe_load(file)
+
+    # Each worker writes its own Hindi log instead of truncating the shared one
+    hindi_config = config.setdefault('hindi_processing', {})
+    log_root, log_ext = os.path.splitext(hindi_config.get('log_file', 'hindi_results.log'))
+    hindi_config['log_file'] = f"{log_root}.worker-{os.getpid()}{log_ext}"
+
+    settings = load_workflow_settings(config, output_dir)
+    os.makedirs(temp_dir, exist_ok=True)
+    settings['temp_dir'] = tempfile.mkdtemp(prefix=f'worker_{os.getpid()}_', dir=temp_dir)
+
+    try:
+        warm_models(config, settings)
+    except Exception as e:
+        # Models load lazily on the first document instead; errors are reported per file
+        print(f"Model warm-up failed in worker {os.getpid()}: {e}")
+
+    _worker_settings.update(settings)
+
+def process_in_worker(encrypted_input_path, encrypted_output_path):
+    return process_file(
+        encrypted_input_path=encrypted_input_path,
+        encrypted_output_path=encrypted_output_path,
+        **_worker_settings
+    )
+
+def run_parallel(jobs, workers, pii_config_path, output_dir='output', temp_dir='temp', threads_per_worker=None):
+    """
+    Processes documents on a pool of worker processes.
+
+    Each worker loads the configuration and models once, works in its own temp directory
+    and limits torch to its share of the cores. Documents are not batched across files
+    (ocr.document_batch_size) in this mode; every worker processes whole documents.
+
+    Parameters:
+        jobs (List[tuple]): (encrypted_input_path, encrypted_output_path) pairs.
+        workers (int): Number of worker processes.
+        threads_per_worker (int): Torch threads per worker; defaults to cores / workers.
+
+    Returns:
+        List[dict]: One process_file result per job, in submission order. A job whose
+                    worker died is reported with status 'error'.
+    """
+    threads = threads_for_workers(workers, threads_per_worker)
+    print(f"Processing {len(jobs)} files on {workers} worker processes with {threads} threads each")
+
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker,
+        initargs=(pii_config_path, output_dir, temp_dir, threads)
+    ) as executor:
+        futures = [executor.submit(process_in_worker, input_path, output_path) for input_path, output_path in jobs]
+        for (input_path, output_path), future in tqdm(zip(jobs, futures), total=len(jobs), desc="Processing files"):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({
+                    'file': input_path,
+                    'output': output_path,
+                    'status': 'error',
+                    'entities': 0,
+                    'error': f"Worker failed: {e}",
+                    'seconds': 0.0
+                })
+    return results
@@ -1,8 +1,25 @@
 # src/pipeline/pii_detection.py
 
 import re
-from pipeline.utils import load_pii_config
-from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
+import functools
+import json
+import string
+from pipeline.utils import load_pii_config, load_key
+from pipeline.model_registry import get_ner_pipeline, ENGLISH_NER_MODEL
+from pipeline.ner_scheduler import get_ner_scheduler, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS
+from pipeline.detection_cache import get_line_cache, make_line_key, DEFAULT_MAX_ENTRIES as DEFAULT_LINE_CACHE_ENTRIES
+
+DEFAULT_NER_BATCH_SIZE = 16
+
+# Bump when the regex rules or the per-line span format change, to invalidate cached line results
+DETECTION_RULES_VERSION = 1
+
+# NER entity groups and the PII types they are reported as
+NER_ENTITY_TYPES = {
+    'PER': 'person',
+    'LOC': 'address',
+    'ORG': 'org'
+}
 
 def get_id_patterns():
     return {
@@ -43,146 +60,453 @@ def get_date_patterns():
         }
     ]
 
-def find_pii_entities(extracted_data, pii_types):
-    print("\n--- Starting PII Detection ---")
+# Map the given ID card names to config keys
+ID_TYPE_KEYS = {
+    "Aadhaar Card": "aadhar",
+    "PAN Card": "pan",
+    "Driving Licence": "dl",
+    "Voter ID Card": "voter",
+    "Ration Card": "ration_card",
+    "Birth Certificate": "birth_certificate",
+    "Passport": "passport"
+}
 
-    extracted_text_lines = [line['text'] for line in extracted_data]
+# Catch-all numeric date pattern applied after the named date formats
+ADDITIONAL_DOB_PATTERN = r"\b(?:\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}[/-]\d{1,2}[-/]\d{1,2})\b"
 
-    model_name = "dbmdz/bert-large-cased-finetuned-conll03-english"
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForTokenClassification.from_pretrained(model_name)
-    ner_pipeline = pipeline("ner", model=model, tokenizer=tokenizer, aggregation_strategy="simple")
+def normalize_id_type(id_type):
+    """
+    Maps an ID card name such as "Aadhaar Card" to its config key such as "aadhar".
+    """
+    return ID_TYPE_KEYS.get(id_type, id_type.lower().replace(' ', '_'))
 
-    pii_config = load_pii_config()
-    id_patterns = get_id_patterns()
-    date_patterns = get_date_patterns()
+def get_detection_rules():
+    """
+    Returns every ID and date pattern as (name, key, label, pattern) in match priority order.
+    `name` is the named group used for the rule in the combined regex.
+    """
+    rules = []
+    for index, (id_type, pattern) in enumerate(get_id_patterns().items()):
+        rules.append((f"id_{index}", normalize_id_type(id_type), id_type, pattern))
+    for index, date_fmt in enumerate(get_date_patterns()):
+        rules.append((f"date_{index}", 'dob', date_fmt['name'], date_fmt['pattern']))
+    rules.append(("date_extra", 'dob', "Additional DOB", ADDITIONAL_DOB_PATTERN))
+    return rules
 
-    pii_entities = []
+# Rules whose matches can start inside a match of another rule. The combined alternation
+# consumes the text it matches, so the rule on the right would never fire there; each of
+# these is also looked up from within the rule on the left (e.g. "RC 123456789012" is both
+# a Ration Card and an Aadhaar number). Date rules overlap each other too, but give the
+# same date. tests/test_regex_benchmark.py checks the engine against the per-rule loops.
+OVERLAPPING_RULES = {
+    "Ration Card": ["Aadhaar Card"]
+}
+
+# Every ID and date rule needs at least two consecutive digits (the shortest is the year of
+# an Additional DOB date), so lines without them are rejected without running the
+# alternation. Revisit if a rule that can match without digits is added.
+REQUIRED_DIGITS = re.compile(r"\d\d")
+
+@functools.lru_cache(maxsize=32)
+def compile_detection_engine(enabled_keys=None):
+    """
+    Compiles the ID and date patterns into a single alternation with one named group per rule.
+
+    A rule listed in OVERLAPPING_RULES first matches in a lookahead, then looks ahead for
+    each rule it can overlap, and only then consumes its text, so one search reports both.
+
+    Parameters:
+        enabled_keys (frozenset): Keys (e.g. 'aadhar', 'dob') to include. None includes every rule.
+
+    Returns:
+        tuple: (compiled alternation, dict mapping each rule's group name to (key, label,
+               value group index, list of (key, label, value group index, group name) of
+               the rules it can overlap)).
+    """
+    rules = [rule for rule in get_detection_rules() if enabled_keys is None or rule[1] in enabled_keys]
+    if not rules:
+        return None, {}
+
+    names_by_label = {label: name for name, _, label, _ in rules}
+    patterns = {name: pattern for name, _, _, pattern in rules}
+    alternatives = []
+    for name, _, label, pattern in rules:
+        overlapping = [names_by_label[other] for other in OVERLAPPING_RULES.get(label, []) if other in names_by_label]
+        if not overlapping:
+            alternatives.append(f"(?P<{name}>{pattern})")
+            continue
+        lookaheads = "".join(f"(?:(?=[\\s\\S]*?(?P<{name}__{other}>{patterns[other]})))?" for other in overlapping)
+        alternatives.append(f"(?P<{name}>(?=(?P<{name}_m>{pattern})){lookaheads}(?P={name}_m))")
+    combined = re.compile("|".join(alternatives), re.IGNORECASE | re.UNICODE)
+
+    def value_index(group_name, pattern):
+        # The value is the ID number / date: the second group when the rule has a label
+        # prefix, the only group otherwise, or the whole match
+        return combined.groupindex[group_name] + min(re.compile(pattern).groups, 2)
+
+    engine = {}
+    for name, key, label, pattern in rules:
+        overlapping = [
+            (other_key, other_label, value_index(f"{name}__{other}", other_pattern), f"{name}__{other}")
+            for other, other_key, other_label, other_pattern in rules if f"{name}__{other}" in combined.groupindex
+        ]
+        inner = f"{name}_m" if overlapping else name
+        engine[name] = (key, label, value_index(inner, pattern), overlapping)
+    return combined, engine
+
+# Compile the full rule set once at import
+compile_detection_engine()
+
+def scan_line(text, enabled_keys=None):
+    """
+    Scans a line for every ID and date pattern in one pass of the combined alternation.
+
+    Lines without two consecutive digits cannot match any rule and are skipped. Every match names its rule through its group; rules that can overlap another rule's
+    match are found by that rule's lookaheads (see OVERLAPPING_RULES). Matches are returned
+    in the order they appear in the line.
+
+    Parameters:
+        text (str): Line text.
+        enabled_keys (frozenset): Keys to detect. None detects every type.
+
+    Returns:
+        List[dict]: Matches with 'key', 'label', 'text' (the ID number or date),
+                    'match' (the full matched text) and the 'start'/'end' offsets of 'text' in the line.
+    """
+    combined, engine = compile_detection_engine(enabled_keys)
+    if combined is None or REQUIRED_DIGITS.search(text) is None:
+        return []
+
+    matches = []
+    for m in combined.finditer(text):
+        key, label, value_group, overlapping = engine[m.lastgroup]
+        found = [(key, label, value_group, m.lastgroup)]
+        for other_key, other_label, other_value_group, group_name in overlapping:
+            # The lookahead runs to the end of the line; keep only matches starting inside this one
+            if m.start(group_name) != -1 and m.start(group_name) < m.end():
+                found.append((other_key, other_label, other_value_group, group_name))
+        for key, label, value_group, group_name in found:
+            value = m.group(value_group)
+            if value is None:
+                continue
+            matches.append({
+                'key': key,
+                'label': label,
+                'text': value,
+                'match': m.group(group_name),
+                'start': m.start(value_group),
+                'end': m.end(value_group)
+            })
+    return matches
+
+def _line_entity(pii_type, text, line_data):
+    return {
+        'type': pii_type,
+        'text': text,
+        'bounding_box': {
+            'left': line_data['left'],
+            'top': line_data['top'],
+            'width': line_data['width'],
+            'height': line_data['height']
+        },
+        'page': line_data.get('page', 0)
+    }
+
+# OCR lines on Indian ID documents that never contain a person, place or organisation of the holder
+DEFAULT_BOILERPLATE_LINES = frozenset([
+    "GOVERNMENT OF INDIA",
+    "GOVT OF INDIA",
+    "INCOME TAX DEPARTMENT",
+    "PERMANENT ACCOUNT NUMBER",
+    "PERMANENT ACCOUNT NUMBER CARD",
+    "UNIQUE IDENTIFICATION AUTHORITY OF INDIA",
+    "ELECTION COMMISSION OF INDIA",
+    "MERA AADHAAR MERI PEHCHAAN",
+    "AADHAAR",
+    "AADHAAR NO",
+    "ENROLMENT NO",
+    "NAME",
+    "FATHERS NAME",
+    "DATE OF BIRTH",
+    "DOB",
+    "YEAR OF BIRTH",
+    "MALE",
+    "FEMALE",
+    "GENDER",
+    "ADDRESS",
+    "SIGNATURE",
+    "ISSUE DATE",
+    "VALID TILL",
+    "VID",
+    "DRIVING LICENCE",
+    "UNION OF INDIA",
+    "REPUBLIC OF INDIA",
+    "ELECTOR PHOTO IDENTITY CARD"
+])
+
+def has_alpha_token(text):
+    """
+    True if the line has a word of two or more letters. ID numbers, dates and
+    alphanumeric codes such as 'ABCDE1234F' or 'MH12' do not count.
+    """
+    for token in text.split():
+        token = token.strip(string.punctuation)
+        if len(token) >= 2 and token.isalpha():
+            return True
+    return False
+
+def normalize_boilerplate(text):
+    """
+    Normalizes a line for boilerplate lookup: punctuation dropped, whitespace collapsed, upper case.
+    """
+    return " ".join(re.sub(r"[^\w\s]", "", text).upper().split())
+
+def prefilter_ner_lines(texts, boilerplate=DEFAULT_BOILERPLATE_LINES, require_capitalized=False):
+    """
+    Cheap gate ahead of NER that drops lines which cannot contain a named entity.
+
+    A line is skipped when it has no purely alphabetic word (numbers, dates, codes), when it is on the boilerplate list, or, with `require_capitalized`, when it has
+    cased letters but none of them is upper case.
+
+    Parameters:
+        texts (List[str]): Line texts.
+        boilerplate (frozenset): Normalized boilerplate lines (see normalize_boilerplate).
+        require_capitalized (bool): Enable the capitalization heuristic.
 
-    # Flags
-    person_flag = pii_types.get('person', False)
-    address_flag = pii_types.get('address', False)
-    org_flag = pii_types.get('org', False)
+    Returns:
+        tuple: (indices of the lines to send to NER, dict of skipped line counts by reason).
+    """
+    keep = []
+    skipped = {'no_alpha': 0, 'boilerplate': 0, 'lowercase': 0}
+    for index, text in enumerate(texts):
+        if not text or not has_alpha_token(text):
+            skipped['no_alpha'] += 1
+        elif normalize_boilerplate(text) in boilerplate:
+            skipped['boilerplate'] += 1
+        elif require_capitalized and text != text.upper() and text == text.lower():
+            skipped['lowercase'] += 1
+        else:
+            keep.append(index)
+    return keep, skipped
+
+def run_ner_batched(ner_pipeline, texts, batch_size=DEFAULT_NER_BATCH_SIZE, chunk_size=None):
+    """
+    Runs the NER pipeline over many lines in padded batches instead of one forward pass per line.
+
+    Lines are sorted by token length before batching so each batch pads to a similar length,
+    and the results are mapped back to the position of their source line.
+
+    Parameters:
+        ner_pipeline: Hugging Face token-classification pipeline.
+        texts (List[str]): Line texts.
+        batch_size (int): Number of lines per forward pass.
+        chunk_size (int): Maximum number of lines handed to the pipeline per call. None sends all lines at once.
+
+    Returns:
+        List[List[dict]]: Entities for each input line, in input order.
+    """
+    results = [[] for _ in texts]
+    order = [i for i, text in enumerate(texts) if text and text.strip()]
+    if not order:
+        return results
+
+    encoded = ner_pipeline.tokenizer([texts[i] for i in order], add_special_tokens=False)['input_ids']
+    token_lengths = dict(zip(order, (len(ids) for ids in encoded)))
+    order.sort(key=lambda i: token_lengths[i])
+
+    chunk_size = chunk_size or len(order)
+    for start in range(0, len(order), chunk_size):
+        chunk = order[start:start + chunk_size]
+        outputs = ner_pipeline([texts[i] for i in chunk], batch_size=batch_size)
+        for i, entities in zip(chunk, outputs):
+            results[i] = entities
+    return results
+
+def run_ner(ner_pipeline, texts, ner_config):
+    """
+    Runs NER over `texts` using the mode selected in the 'ner' config section:
+    the cross-document scheduler, local batching or one call per line.
+
+    Returns:
+        List[List[dict]]: Entities for each text, in input order.
+    """
+    if not texts:
+        return []
+
+    batch_size = ner_config.get('batch_size', DEFAULT_NER_BATCH_SIZE)
+    scheduler_config = ner_config.get('scheduler', {})
+    if scheduler_config.get('enabled', False):
+        # Share forward passes with documents being processed concurrently in this process
+        scheduler = get_ner_scheduler(
+            ENGLISH_NER_MODEL,
+            lambda batch: run_ner_batched(ner_pipeline, batch, batch_size=batch_size),
+            max_batch_size=scheduler_config.get('max_batch_size', DEFAULT_MAX_BATCH_SIZE),
+            max_wait_ms=scheduler_config.get('max_wait_ms', DEFAULT_MAX_WAIT_MS),
+            backend=ner_config.get('backend', 'torch'),
+            options={'onnx': ner_config.get('onnx'), 'batch_size': batch_size}
+        )
+        return scheduler.submit(texts)
+    if ner_config.get('batched', True):
+        return run_ner_batched(ner_pipeline, texts, batch_size=batch_size, chunk_size=ner_config.get('chunk_size'))
+    return [ner_pipeline(text) for text in texts]
+
+def detection_model_version(ner_config):
+    """
+    Identifies everything besides the line text and enabled types that affects per-line
+    detection output; part of the line cache key.
+    """
+    prefilter_config = json.dumps(ner_config.get('prefilter', {}), sort_keys=True)
+    return f"{ENGLISH_NER_MODEL}:{ner_config.get('backend', 'torch')}:rules-{DETECTION_RULES_VERSION}:{prefilter_config}"
+
+def detect_line_spans(texts, pii_types, ner_config):
+    """
+    Runs the NER pre-filter, NER and the regex engine on a list of line texts.
+
+    Returns:
+        tuple: (list with the entity spans of each line, dict of NER pre-filter skip counts).
+               Spans are dicts with 'type' and 'text'; ID spans instead carry 'whole_line' and
+               'label' because an ID redacts the entire line it appears on.
+    """
+    line_spans = [[] for _ in texts]
 
     print("Performing NER-based detection...")
-    for line_data in extracted_data:
-        text = line_data['text']
-        entities = ner_pipeline(text)
+    prefilter_config = ner_config.get('prefilter', {})
+    if not any(pii_types.get(pii_type, False) for pii_type in NER_ENTITY_TYPES.values()):
+        ner_indices = []
+        skipped = {'ner_disabled': len(texts)}
+    elif prefilter_config.get('enabled', True):
+        ner_indices, skipped = prefilter_ner_lines(
+            texts,
+            boilerplate=DEFAULT_BOILERPLATE_LINES | {normalize_boilerplate(line) for line in prefilter_config.get('boilerplate', [])},
+            require_capitalized=prefilter_config.get('require_capitalized', False)
+        )
+    else:
+        ner_indices = list(range(len(texts)))
+        skipped = {}
+    print(f"NER pre-filter skipped {sum(skipped.values())} of {len(texts)} lines {skipped}")
+
+    ner_results = []
+    if ner_indices:
+        ner_pipeline = get_ner_pipeline(
+            ENGLISH_NER_MODEL,
+            backend=ner_config.get('backend', 'torch'),
+            onnx_options=ner_config.get('onnx')
+        )
+        ner_results = run_ner(ner_pipeline, [texts[i] for i in ner_indices], ner_config)
+
+    for i, entities in zip(ner_indices, ner_results):
         for entity in entities:
-            ent_type = entity['entity_group']
-            ent_text = entity['word'].strip()
-
-            pii_type = None
-            if ent_type == "PER" and person_flag:
-                pii_type = 'person'
-            elif ent_type == "LOC" and address_flag:
-                pii_type = 'address'
-            elif ent_type == "ORG" and org_flag:
-                pii_type = 'org'
-
-            if pii_type:
-                entity_data = {
-                    'type': pii_type,
-                    'text': ent_text,
-                    'bounding_box': {
-                        'left': line_data['left'],
-                        'top': line_data['top'],
-                        'width': line_data['width'],
-                        'height': line_data['height']
-                    }
-                }
-                pii_entities.append(entity_data)
-                print(f"Detected {pii_type.upper()}: {ent_text} at {entity_data['bounding_box']}")
+            pii_type = NER_ENTITY_TYPES.get(entity['entity_group'])
+            if pii_type and pii_types.get(pii_type, False):
+                line_spans[i].append({'type': pii_type, 'text': entity['word'].strip()})
 
     print("Performing ID and date regex detection...")
-    # ID Normalization
-    # Map the given ID card names to config keys:
-    # "Aadhaar Card" -> "aadhar"
-    # "PAN Card" -> "pan"
-    # "Driving Licence" -> "dl"
-    # "Voter ID Card" -> "voter"
-    # "Ration Card" -> Possibly "ration_card" (if you want to handle it in config)
-    # "Birth Certificate" -> "birth_certificate"
-    # "Passport" -> "passport"
-    for id_type, pattern in id_patterns.items():
-        normalized_key = id_type.lower()  # e.g. "driving licence", "voter id card"
-        if normalized_key == "aadhaar card":
-            normalized_key = "aadhar"
-        elif normalized_key == "pan card":
-            normalized_key = "pan"
-        elif normalized_key == "driving licence":
-            normalized_key = "dl"
-        elif normalized_key == "voter id card":
-            normalized_key = "voter"
-        elif normalized_key == "ration card":
-            normalized_key = "ration_card"
-        elif normalized_key == "birth certificate":
-            normalized_key = "birth_certificate"
-        elif normalized_key == "passport":
-            normalized_key = "passport"
-
-        if not pii_types.get(normalized_key, False):
-            continue
+    enabled_keys = frozenset(key for key, enabled in pii_types.items() if enabled)
+    for i, text in enumerate(texts):
+        detected_id_keys = set()
+        for match in scan_line(text, enabled_keys):
+            if match['key'] == 'dob':
+                line_spans[i].append({'type': 'dob', 'text': match['text']})
+            elif match['key'] not in detected_id_keys:
+                # ID numbers redact the whole line, once per ID type
+                detected_id_keys.add(match['key'])
+                line_spans[i].append({'type': match['key'], 'label': match['label'], 'whole_line': True})
 
-        for line_data in extracted_data:
-            if re.search(pattern, line_data['text'], re.IGNORECASE):
-                entity_data = {
-                    'type': normalized_key,
-                    'text': line_data['text'],
-                    'bounding_box': {
-                        'left': line_data['left'],
-                        'top': line_data['top'],
-                        'width': line_data['width'],
-                        'height': line_data['height']
-                    }
-                }
+    return line_spans, skipped
+
+def find_pii_entities(extracted_data, pii_types, stats=None, found_dates=None):
+    """
+    Detects PII in OCR line records with NER (names, places, organisations) and regexes (IDs, dates).
+
+    Parameters:
+        extracted_data (List[dict]): Line records from extract_text_and_coords.
+        pii_types (dict): Enabled PII types.
+        stats (dict): Optional dict that receives per-document counters such as the number
+                      of lines skipped by the NER pre-filter and line cache hits.
+        found_dates (set): Dates already reported for this document, when it is scanned in
+                           several parts; updated with the dates found here.
+
+    Returns:
+        List[dict]: Entities with 'type', 'text', 'bounding_box' and 'page'.
+    """
+    print("\n--- Starting PII Detection ---")
+
+    extracted_text_lines = [line['text'] for line in extracted_data]
+
+    pii_config = load_pii_config()
+    ner_config = pii_config.get('ner', {})
+    cache_config = pii_config.get('detection_cache', {})
+
+    cache = None
+    if cache_config.get('enabled', True):
+        sqlite_path = cache_config.get('sqlite_path')
+        encryption_key = None
+        if sqlite_path:
+            try:
+                encryption_key = load_key()
+            except FileNotFoundError:
+                # Spans are PII; without a key to encrypt them the cache stays in memory
+                print("Encryption key not found; line detection cache kept in memory only.")
+                sqlite_path = None
+        cache = get_line_cache(
+            max_entries=cache_config.get('max_entries', DEFAULT_LINE_CACHE_ENTRIES),
+            sqlite_path=sqlite_path,
+            key=encryption_key
+        )
+
+    enabled_types = [key for key, enabled in pii_types.items() if enabled]
+    model_version = detection_model_version(ner_config)
+    line_keys = [make_line_key(text, enabled_types, model_version) for text in extracted_text_lines]
+    line_spans = [cache.get(key) if cache else None for key in line_keys]
+
+    # Lines missing from the cache are detected once per distinct text
+    pending = {}
+    for i, spans in enumerate(line_spans):
+        if spans is None:
+            pending.setdefault(line_keys[i], []).append(i)
+    cache_hits = len(line_spans) - sum(len(indices) for indices in pending.values())
+    if cache:
+        print(f"Line cache: {cache_hits} of {len(line_spans)} lines served from cache")
+
+    skipped = {}
+    if pending:
+        pending_keys = list(pending)
+        computed, skipped = detect_line_spans(
+            [extracted_text_lines[pending[key][0]] for key in pending_keys],
+            pii_types,
+            ner_config
+        )
+        for key, spans in zip(pending_keys, computed):
+            for i in pending[key]:
+                line_spans[i] = spans
+            if cache:
+                cache.put(key, spans)
+    if cache:
+        cache.flush()
+
+    if stats is not None:
+        stats['lines'] = len(extracted_text_lines)
+        stats['line_cache_hits'] = cache_hits
+        stats['ner_skipped'] = sum(skipped.values())
+        stats['ner_skipped_by_reason'] = skipped
+
+    pii_entities = []
+    found_dates_set = found_dates if found_dates is not None else set()
+    for line_data, spans in zip(extracted_data, line_spans):
+        for span in spans:
+            if span.get('whole_line'):
+                entity_data = _line_entity(span['type'], line_data['text'], line_data)
                 pii_entities.append(entity_data)
-                print(f"Detected {id_type.upper()}: {line_data['text']} at {entity_data['bounding_box']}")
-
-    # DOB detection
-    if pii_types.get('dob', False):
-        found_dates_set = set()
-        for date_fmt in date_patterns:
-            pattern = re.compile(date_fmt['pattern'], re.IGNORECASE | re.UNICODE)
-            for line_data in extracted_data:
-                matches = re.findall(pattern, line_data['text'])
-                if matches:
-                    flat_matches = [m[1] if isinstance(m, tuple) else m for m in matches]
-                    new_matches = [m for m in flat_matches if m not in found_dates_set]
-                    for match in new_matches:
-                        found_dates_set.add(match)
-                        entity_data = {
-                            'type': 'dob',
-                            'text': match,
-                            'bounding_box': {
-                                'left': line_data['left'],
-                                'top': line_data['top'],
-                                'width': line_data['width'],
-                                'height': line_data['height']
-                            }
-                        }
-                        pii_entities.append(entity_data)
-                        print(f"Detected DOB: {match} at {entity_data['bounding_box']}")
-
-        # Additional DOB pattern
-        dob_pattern = re.compile(r'\b(?:\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}[/-]\d{1,2}[-/]\d{1,2})\b', re.IGNORECASE)
-        for line_data in extracted_data:
-            dob_matches = dob_pattern.findall(line_data['text'])
-            for dob_match in dob_matches:
-                if dob_match not in found_dates_set:
-                    found_dates_set.add(dob_match)
-                    entity_data = {
-                        'type': 'dob',
-                        'text': dob_match,
-                        'bounding_box': {
-                            'left': line_data['left'],
-                            'top': line_data['top'],
-                            'width': line_data['width'],
-                            'height': line_data['height']
-                        }
-                    }
-                    pii_entities.append(entity_data)
-                    print(f"Detected DOB: {dob_match} at {entity_data['bounding_box']}")
+                print(f"Detected {span['label'].upper()}: {line_data['text']} at {entity_data['bounding_box']}")
+                continue
+            if span['type'] == 'dob':
+                # Each date is reported once per document
+                if span['text'] in found_dates_set:
+                    continue
+                found_dates_set.add(span['text'])
+            entity_data = _line_entity(span['type'], span['text'], line_data)
+            pii_entities.append(entity_data)
+            print(f"Detected {span['type'].upper()}: {span['text']} at {entity_data['bounding_box']}")
 
     print("--- Completed PII Detection ---\n")
-    return pii_entities
\ No newline at end of file
+    return pii_entities
@@ -0,0 +1,77 @@
+# src/pipeline/rasterize.py
+
+import io
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+# 2x the PDF's 72 DPI, the scale docTR's DocumentFile.from_pdf renders at
+DEFAULT_DPI = 144
+
+class PageImage(np.ndarray):
+    """
+    RGB page image that views the MuPDF pixmap buffer directly instead of copying it.
+
+    The array keeps its pixmap alive, so the buffer is freed once the last consumer drops
+    the page. It is read-only because docTR and EasyOCR are handed the same array.
+    """
+
+    def __array_finalize__(self, obj):
+        self.pixmap = getattr(obj, 'pixmap', None)
+
+def open_pdf(file_path, data=None):
+    """
+    Opens a PDF from disk, or from `data` when the plaintext is held in memory.
+    """
+    if data is not None:
+        return fitz.open(stream=data, filetype='pdf')
+    return fitz.open(file_path)
+
+def render_page(page, dpi=DEFAULT_DPI):
+    """
+    Renders a PDF page to an RGB array without encoding it to an image file.
+
+    Parameters:
+        page (fitz.Page): PDF page.
+        dpi (int): Rendering resolution.
+
+    Returns:
+        PageImage: Array of shape (height, width, 3) backed by the pixmap.
+    """
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csRGB, alpha=False)
+    image = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.width, pix.n).view(PageImage)
+    image.pixmap = pix
+    image.flags.writeable = False
+    return image
+
+def load_image(file_path, data=None):
+    """
+    Loads an image file (or its in-memory contents) as an RGB array.
+    """
+    with Image.open(file_path if data is None else io.BytesIO(data)) as img:
+        image = np.asarray(img.convert('RGB'))
+    image.flags.writeable = False
+    return image
+
+def iter_page_images(file_path, data=None, dpi=DEFAULT_DPI, page_filter=None):
+    """
+    Yields (page_index, image) for every page of a PDF or image, rendering each PDF page once.
+    Only the page being yielded is held by this generator.
+
+    `page_filter`, if given, is called with each page index; pages it rejects are not rendered.
+    """
+    if not file_path.lower().endswith(".pdf"):
+        if page_filter is None or page_filter(0):
+            yield 0, load_image(file_path, data)
+        return
+    with open_pdf(file_path, data) as doc:
+        for page_index, page in enumerate(doc):
+            if page_filter is None or page_filter(page_index):
+                yield page_index, render_page(page, dpi)
+
+def render_pages(file_path, data=None, dpi=DEFAULT_DPI):
+    """
+    Returns:
+        List[np.ndarray]: One RGB array per page of the PDF or image.
+    """
+    return [image for _, image in iter_page_images(file_path, data, dpi)]
@@ -1,33 +1,39 @@
 # src/pipeline/redaction.py
 
 from PIL import Image, ImageDraw
+import io
 import os
 import fitz  # PyMuPDF
 
+def draw_redactions(img, pii_entities, pii_types):
+    """
+    Draws black boxes over the enabled entities of a PIL image, in place.
+    """
+    image_width, image_height = img.size
+    draw = ImageDraw.Draw(img)
+
+    for entity in pii_entities:
+        entity_type = entity.get('type', '')
+        if not pii_types.get(entity_type, False):
+            # Skip redaction if disabled
+            continue
+
+        bbox = entity['bounding_box']
+        left = bbox['left'] * image_width
+        top = bbox['top'] * image_height
+        width = bbox['width'] * image_width
+        height = bbox['height'] * image_height
+
+        rectangle = [left, top, left + width, top + height]
+        draw.rectangle(rectangle, fill='black')
+
 def redact_image(image_path, pii_entities, extracted_data, output_path, pii_types):
     try:
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"Image file not found: {image_path}")
 
         with Image.open(image_path) as img:
-            image_width, image_height = img.size
-            draw = ImageDraw.Draw(img)
-
-            for entity in pii_entities:
-                entity_type = entity.get('type', '')
-                if not pii_types.get(entity_type, False):
-                    # Skip redaction if disabled
-                    continue
-
-                bbox = entity['bounding_box']
-                left = bbox['left'] * image_width
-                top = bbox['top'] * image_height
-                width = bbox['width'] * image_width
-                height = bbox['height'] * image_height
-
-                rectangle = [left, top, left + width, top + height]
-                draw.rectangle(rectangle, fill='black')
-
+            draw_redactions(img, pii_entities, pii_types)
             img.save(output_path)
             print(f"Redacted image saved to: {output_path}")
 
@@ -35,33 +41,95 @@ def redact_image(image_path, pii_entities, extracted_data, output_path, pii_type
         print(f"Redaction failed for {image_path}: {e}")
         raise
 
+def group_entities_by_page(pii_entities, pii_types, page_count=None):
+    """
+    Builds a per-page index of the entities that should be redacted.
+
+    Parameters:
+        pii_entities (List[dict]): Detected entities with a zero-based 'page' index.
+        pii_types (dict): Enabled PII types; entities of disabled types are dropped.
+        page_count (int): Number of pages in the document. Entities without a 'page'
+                          index are applied to every page when this is given.
+
+    Returns:
+        dict: Maps page index to the list of entities on that page.
+    """
+    index = {}
+    unpaged = []
+    for entity in pii_entities:
+        if not pii_types.get(entity.get('type', ''), False):
+            continue
+        if entity.get('bounding_box') is None:
+            continue
+        page_num = entity.get('page')
+        if page_num is None:
+            unpaged.append(entity)
+        else:
+            index.setdefault(page_num, []).append(entity)
+
+    if unpaged and page_count:
+        for page_num in range(page_count):
+            index.setdefault(page_num, []).extend(unpaged)
+    return index
+
+def redact_pdf_document(doc, pii_entities, pii_types):
+    """
+    Applies redactions for the enabled entities to an open PDF document, in place.
+    """
+    entities_by_page = group_entities_by_page(pii_entities, pii_types, page_count=len(doc))
+
+    # Pages without hits are left untouched
+    for page_num in sorted(entities_by_page):
+        if page_num >= len(doc):
+            continue
+        page = doc[page_num]
+        for entity in entities_by_page[page_num]:
+            bbox = entity['bounding_box']
+            rect = fitz.Rect(
+                bbox['left'] * page.rect.width,
+                bbox['top'] * page.rect.height,
+                (bbox['left'] + bbox['width']) * page.rect.width,
+                (bbox['top'] + bbox['height']) * page.rect.height
+            )
+            page.add_redact_annot(rect, fill=(0, 0, 0))
+        page.apply_redactions()
+
 def redact_pdf(pdf_path, pii_entities, output_path, pii_types):
     try:
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
         doc = fitz.open(pdf_path)
-        for page_num, page in enumerate(doc, start=1):
-            for entity in pii_entities:
-                entity_type = entity.get('type', '')
-                if not pii_types.get(entity_type, False):
-                    continue
-
-                bbox = entity['bounding_box']
-                if bbox is None:
-                    continue
-                rect = fitz.Rect(
-                    bbox['left'] * page.rect.width,
-                    bbox['top'] * page.rect.height,
-                    (bbox['left'] + bbox['width']) * page.rect.width,
-                    (bbox['top'] + bbox['height']) * page.rect.height
-                )
-                page.add_redact_annot(rect, fill=(0, 0, 0))
-            page.apply_redactions()
-
+        redact_pdf_document(doc, pii_entities, pii_types)
         doc.save(output_path)
         print(f"Redacted PDF saved to: {output_path}")
 
     except Exception as e:
         print(f"Redaction failed for {pdf_path}: {e}")
-        raise
\ No newline at end of file
+        raise
+
+def redact_document_bytes(data, file_ext, pii_entities, pii_types):
+    """
+    Redacts a PDF or image held in memory.
+
+    Parameters:
+        data (bytes): Plaintext document.
+        file_ext (str): Original file extension (e.g. '.pdf', '.png'); selects the format.
+        pii_entities (List[dict]): Entities to redact.
+        pii_types (dict): Enabled PII types.
+
+    Returns:
+        bytes: The redacted document in the same format.
+    """
+    if file_ext.lower() == '.pdf':
+        with fitz.open(stream=data, filetype='pdf') as doc:
+            redact_pdf_document(doc, pii_entities, pii_types)
+            return doc.tobytes()
+
+    with Image.open(io.BytesIO(data)) as img:
+        image_format = img.format
+        img.load()
+        draw_redactions(img, pii_entities, pii_types)
+        output = io.BytesIO()
+        img.save(output, format=image_format)
+        return output.getvalue()
@@ -0,0 +1,107 @@
+# src/pipeline/script_routing.py
+
+import re
+import threading
+
+ENGLISH = 'english'
+HINDI = 'hindi'
+BOTH = 'both'
+
+# docTR's recognition model has a Latin vocabulary; Devanagari words come back as
+# low-confidence guesses, well below the 0.9+ it reports for printed Latin text
+DEFAULT_MIN_CONFIDENCE = 0.5
+
+DEVANAGARI = re.compile(r'[\u0900-\u097F\uA8E0-\uA8FF]')
+
+def has_devanagari(text):
+    return bool(text) and DEVANAGARI.search(text) is not None
+
+def is_latin_line(line, min_confidence=DEFAULT_MIN_CONFIDENCE):
+    """
+    Whether a line record was read as Latin-script text.
+
+    Text-layer lines carry a confidence of 1.0 and are judged by their characters alone.
+    OCR lines also need docTR to have been confident in them. Lines without a confidence
+    (e.g. stored before it was recorded) are not trusted, so their page still gets Hindi OCR.
+    """
+    confidence = line.get('confidence')
+    if confidence is None or confidence < min_confidence:
+        return False
+    return not has_devanagari(line.get('text'))
+
+def route_page(lines, min_confidence=DEFAULT_MIN_CONFIDENCE):
+    """
+    Picks the pipelines a page needs from its English line records.
+
+    Returns:
+        str: ENGLISH if every line reads as Latin text (or the page is blank), HINDI if none
+             does and BOTH otherwise. HINDI and BOTH pages go through EasyOCR and IndicNER.
+    """
+    latin = sum(1 for line in lines if is_latin_line(line, min_confidence))
+    if latin == len(lines):
+        return ENGLISH
+    return HINDI if latin == 0 else BOTH
+
+def route_pages(page_lines, min_confidence=DEFAULT_MIN_CONFIDENCE):
+    """
+    Parameters:
+        page_lines (dict): Line records of each page, by page index.
+
+    Returns:
+        dict: Route of each page, by page index.
+    """
+    return {page_index: route_page(lines, min_confidence) for page_index, lines in page_lines.items()}
+
+def route_line_records(lines, page_indices=(), min_confidence=DEFAULT_MIN_CONFIDENCE):
+    """
+    Routes the pages of a document from its English line records, grouped by their 'page' index.
+
+    Parameters:
+        lines (List[dict]): Line records of the whole document.
+        page_indices (iterable): Pages to route even if no line is on them; they count as blank.
+
+    Returns:
+        dict: Route of each page, by page index.
+    """
+    page_lines = {page_index: [] for page_index in page_indices}
+    for line in lines:
+        page_lines.setdefault(line.get('page', 0), []).append(line)
+    return route_pages(page_lines, min_confidence)
+
+def needs_hindi(route):
+    return route != ENGLISH
+
+class RoutingStats:
+    """
+    Counts routing decisions and the time EasyOCR took on the pages sent to it, to estimate
+    the time saved on the pages that skipped it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pages = {ENGLISH: 0, HINDI: 0, BOTH: 0}
+        self.hindi_pages = 0
+        self.hindi_seconds = 0.0
+
+    def record(self, routes, hindi_pages=0, hindi_seconds=0.0):
+        with self._lock:
+            for route in routes.values():
+                self.pages[route] += 1
+            self.hindi_pages += hindi_pages
+            self.hindi_seconds += hindi_seconds
+
+    def stats(self):
+        with self._lock:
+            per_page = self.hindi_seconds / self.hindi_pages if self.hindi_pages else 0.0
+            skipped = self.pages[ENGLISH]
+            return {
+                'pages': dict(self.pages),
+                'skipped': skipped,
+                'hindi_seconds_per_page': per_page,
+                'estimated_seconds_saved': skipped * per_page
+            }
+
+_stats = RoutingStats()
+
+def get_routing_stats():
+    return _stats
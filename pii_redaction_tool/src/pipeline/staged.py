@@ -0,0 +1,332 @@
+# src/pipeline/staged.py
+
+import queue
+import threading
+import time
+from pipeline.utils import load_key
+from pipeline.workflow import (
+    new_document_context, decrypt_stage, lookup_document_cache, rasterize_stage, ocr_stage,
+    detect_stage, redact_stage, encrypt_stage, store_document_cache
+)
+
+DEFAULT_QUEUE_SIZE = 4
+DEFAULT_STAGE_WORKERS = {
+    'decrypt': 2,
+    # PyMuPDF is not thread-safe: concurrent rasterization of different documents can crash
+    # the process, so pages are rendered one document at a time
+    'rasterize': 1,
+    'ocr': 1,
+    'detect': 1,
+    'redact': 2,
+    'encrypt': 2
+}
+SAMPLE_INTERVAL = 0.1
+
+# Tells a stage worker to exit
+_STOP = object()
+
+class Stage:
+    """
+    One step of the pipeline, run by `workers` threads that take items from the stage's input queue.
+
+    `slots` limits how many calls of the stage run at once. The stage's own workers take
+    a slot per item, and other stages borrow one through call().
+    """
+
+    def __init__(self, name, function, workers=1):
+        self.name = name
+        self.function = function
+        self.workers = workers
+        self.slots = threading.Semaphore(workers)
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+
+    def call(self, function, item):
+        """
+        Runs `function(item)` for another stage in one of this stage's slots and counts its
+        time as this stage's work.
+
+        Returns:
+            tuple: (seconds spent waiting for a slot, seconds spent running).
+        """
+        start = time.perf_counter()
+        with self.slots:
+            started = time.perf_counter()
+            try:
+                function(item)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self.lock:
+                    self.busy += elapsed
+        return started - start, elapsed
+
+class StagedPipeline:
+    """
+    Runs items through a chain of stages connected by bounded queues.
+
+    Every stage has its own thread pool, so while one document is being OCRed the next is
+    decrypted and the previous one is redacted and encrypted. A full queue blocks the stage
+    feeding it, which bounds the number of documents held in memory. Items are dicts; a stage
+    that raises records the error on the item and hands it to `on_error`, and items with an
+    'error' or marked 'done' pass through the remaining stages untouched.
+
+    Queue depth is sampled in the background. stats() reports, per stage, the mean and maximum
+    depth of its input queue, the fraction of worker time spent working (utilization) and the
+    time spent blocked on a full downstream queue. The bottleneck is the stage with high
+    utilization and a deep input queue; the stages before it show blocked time.
+    """
+
+    def __init__(self, stages, queue_size=DEFAULT_QUEUE_SIZE, report_interval=0, on_error=None):
+        self.stages = stages
+        self.on_error = on_error
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self.output = queue.Queue()
+        self.report_interval = report_interval
+        self._depth_sums = [0] * len(stages)
+        self._depth_max = [0] * len(stages)
+        self._samples = 0
+        self._elapsed = 0.0
+        self._start = None
+        # Per worker thread: time the current item spent in other stages' slots
+        self._borrowed = threading.local()
+
+    def run_in_stage(self, name, function, item):
+        """
+        Runs part of an item's work from another stage as if it were done by stage `name`:
+        within that stage's concurrency limit and counted in its statistics. The calling
+        stage records the time as blocked instead of busy.
+        """
+        stage = next(stage for stage in self.stages if stage.name == name)
+        waited, elapsed = stage.call(function, item)
+        self._borrowed.seconds += waited + elapsed
+        self._borrowed.waited += waited
+
+    def _work(self, index):
+        stage = self.stages[index]
+        in_queue = self.queues[index]
+        out_queue = self.queues[index + 1] if index + 1 < len(self.stages) else self.output
+        while True:
+            item = in_queue.get()
+            if item is _STOP:
+                return
+            if item.get('error') is None and not item.get('done'):
+                self._borrowed.seconds = 0.0
+                self._borrowed.waited = 0.0
+                # Another stage may be using a slot of this one
+                start = time.perf_counter()
+                stage.slots.acquire()
+                waited = time.perf_counter() - start
+                start += waited
+                try:
+                    stage.function(item)
+                except Exception as e:
+                    item['error'] = str(e) or type(e).__name__
+                    print(f"Error in {stage.name} stage for {item.get('encrypted_input_path')}: {item['error']}")
+                    with stage.lock:
+                        stage.errors += 1
+                    if self.on_error is not None:
+                        self.on_error(item)
+                finally:
+                    stage.slots.release()
+                # Work run in other stages' slots belongs to those stages
+                elapsed = time.perf_counter() - start - self._borrowed.seconds
+                with stage.lock:
+                    stage.busy += elapsed
+                    stage.blocked += waited + self._borrowed.waited
+                    stage.processed += 1
+
+            start = time.perf_counter()
+            out_queue.put(item)
+            with stage.lock:
+                stage.blocked += time.perf_counter() - start
+
+    def _sample(self, finished):
+        next_report = time.perf_counter() + self.report_interval if self.report_interval else None
+        while not finished.wait(SAMPLE_INTERVAL):
+            for index, stage_queue in enumerate(self.queues):
+                depth = stage_queue.qsize()
+                self._depth_sums[index] += depth
+                self._depth_max[index] = max(self._depth_max[index], depth)
+            self._samples += 1
+            if next_report and time.perf_counter() >= next_report:
+                next_report += self.report_interval
+                print("Stage queues: " + ", ".join(
+                    f"{stage.name}={stage_queue.qsize()}" for stage, stage_queue in zip(self.stages, self.queues)
+                ))
+
+    def run(self, items, on_item_done=None):
+        """
+        Feeds `items` through every stage and waits for all of them.
+
+        Parameters:
+            items (List[dict]): Items to process; each is passed to every stage function.
+            on_item_done (callable): Called with each finished item, in completion order.
+
+        Returns:
+            List[dict]: The finished items, in completion order.
+        """
+        self._start = time.perf_counter()
+        threads = []
+        for index, stage in enumerate(self.stages):
+            for worker in range(stage.workers):
+                thread = threading.Thread(target=self._work, args=(index,), name=f"{stage.name}-{worker}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        finished = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(finished,), name="queue-sampler", daemon=True)
+        sampler.start()
+
+        # Feeding blocks once the first queue is full, so large inputs are never loaded all at once
+        feeder = threading.Thread(target=lambda: [self.queues[0].put(item) for item in items], name="feeder", daemon=True)
+        feeder.start()
+
+        done = []
+        for _ in range(len(items)):
+            item = self.output.get()
+            done.append(item)
+            if on_item_done is not None:
+                on_item_done(item)
+
+        feeder.join()
+        for index, stage in enumerate(self.stages):
+            for _ in range(stage.workers):
+                self.queues[index].put(_STOP)
+        for thread in threads:
+            thread.join()
+        finished.set()
+        sampler.join()
+        self._elapsed = time.perf_counter() - self._start
+        return done
+
+    def stats(self):
+        """
+        Returns:
+            dict: Per stage name: 'workers', 'processed', 'errors', 'utilization',
+                  'blocked_seconds', 'mean_queue_depth' and 'max_queue_depth'.
+        """
+        elapsed = self._elapsed or (time.perf_counter() - self._start if self._start else 0.0)
+        report = {}
+        for index, stage in enumerate(self.stages):
+            with stage.lock:
+                report[stage.name] = {
+                    'workers': stage.workers,
+                    'processed': stage.processed,
+                    'errors': stage.errors,
+                    'utilization': stage.busy / (elapsed * stage.workers) if elapsed else 0.0,
+                    'blocked_seconds': stage.blocked,
+                    'mean_queue_depth': self._depth_sums[index] / self._samples if self._samples else 0.0,
+                    'max_queue_depth': self._depth_max[index]
+                }
+        return report
+
+def print_stage_stats(stats):
+    print("Stage       workers  done  util  blocked  queue(mean/max)")
+    for name, stage in stats.items():
+        print(f"{name:<11} {stage['workers']:>7} {stage['processed']:>5} {stage['utilization']:>5.0%} "
+              f"{stage['blocked_seconds']:>7.1f}s  {stage['mean_queue_depth']:.1f}/{stage['max_queue_depth']}")
+
+def release_document(context):
+    """
+    Drops the decrypted bytes, rasterized pages and redacted output held by a document
+    context once it is written or has failed.
+    """
+    for key in ('data', 'redacted'):
+        context.pop(key, None)
+    context['images'] = {}
+
+def build_document_pipeline(settings, pipeline_config=None):
+    """
+    Builds the document pipeline: decrypt, rasterize, ocr, detect, redact, encrypt.
+
+    Parameters:
+        settings (dict): Output of workflow.load_workflow_settings.
+        pipeline_config (dict): 'queue_size', 'report_interval' and per-stage 'workers' counts.
+    """
+    pipeline_config = pipeline_config or {}
+    stage_workers = dict(DEFAULT_STAGE_WORKERS, **pipeline_config.get('workers', {}))
+    document_cache = settings['document_cache']
+    cache_version = settings['cache_version']
+
+    def decrypt(context):
+        decrypt_stage(context)
+        if lookup_document_cache(context, document_cache, cache_version):
+            context['done'] = True
+            context['status'] = 'cached'
+            del context['data']
+
+    def encrypt(context):
+        encrypt_stage(context)
+        store_document_cache(context, document_cache)
+        context['status'] = 'processed'
+        # Release the document as soon as it is written
+        release_document(context)
+
+    stages = [
+        Stage('decrypt', decrypt, stage_workers['decrypt']),
+        # PDFs longer than processing.page_window are streamed from this stage; each window
+        # is OCRed, detected and redacted in a slot of the stage below (see run_in_stage), and
+        # the document then passes those stages untouched
+        Stage('rasterize', rasterize_stage, stage_workers['rasterize']),
+        Stage('ocr', ocr_stage, stage_workers['ocr']),
+        Stage('detect', detect_stage, stage_workers['detect']),
+        Stage('redact', redact_stage, stage_workers['redact']),
+        Stage('encrypt', encrypt, stage_workers['encrypt'])
+    ]
+    return StagedPipeline(
+        stages,
+        queue_size=pipeline_config.get('queue_size', DEFAULT_QUEUE_SIZE),
+        report_interval=pipeline_config.get('report_interval', 0),
+        # A failed document passes the remaining stages untouched; drop its plaintext and pages now
+        on_error=release_document
+    )
+
+def run_staged(jobs, settings, pipeline_config=None):
+    """
+    Processes documents through the staged pipeline.
+
+    Parameters:
+        jobs (List[tuple]): (encrypted_input_path, encrypted_output_path) pairs.
+        settings (dict): Output of workflow.load_workflow_settings.
+        pipeline_config (dict): The processing.pipeline settings.
+
+    Returns:
+        tuple: (results in submission order in the format of process_file, stage statistics).
+    """
+    key = load_key()
+    contexts = []
+    for index, (encrypted_input_path, encrypted_output_path) in enumerate(jobs):
+        context = new_document_context(
+            encrypted_input_path, encrypted_output_path, settings['pii_types'], settings['hindi_config'],
+            settings['english_enabled'], settings['hindi_enabled'], ocr_config=settings['ocr_config'],
+            key=key, encryption_format=settings['encryption_format'], page_window=settings['page_window']
+        )
+        context['index'] = index
+        context['started'] = time.perf_counter()
+        contexts.append(context)
+
+    def finished(context):
+        context['seconds'] = time.perf_counter() - context['started']
+        if context.get('error') is None:
+            print(f"Successfully processed: {context['encrypted_input_path']} -> {context['encrypted_output_path']}")
+
+    from tqdm import tqdm
+    pipeline = build_document_pipeline(settings, pipeline_config)
+    for context in contexts:
+        # Windows of streamed PDFs run in the ocr, detect and redact stages' slots
+        context['run_stage'] = pipeline.run_in_stage
+    with tqdm(total=len(contexts), desc="Processing files") as progress:
+        pipeline.run(contexts, on_item_done=lambda context: (finished(context), progress.update(1)))
+
+    results = [{
+        'file': context['encrypted_input_path'],
+        'output': context['encrypted_output_path'],
+        'status': 'error' if context.get('error') else context.get('status', 'processed'),
+        'entities': context.get('entity_count', len(context['entities'])),
+        'error': context.get('error'),
+        'seconds': context['seconds']
+    } for context in sorted(contexts, key=lambda context: context['index'])]
+    return results, pipeline.stats()
@@ -1,40 +1,77 @@
 # src/pipeline/workflow.py
 
 import os
+import itertools
+import json
+import hashlib
 import shutil
+import tempfile
+import time
 import warnings
 import yaml
-from pipeline.decrypt import decrypt_file
-from pipeline.encrypt import encrypt_file
-from pipeline.ocr import extract_text_and_coords
-from pipeline.pii_detection import find_pii_entities
-from pipeline.redaction import redact_image, redact_pdf
-from pipeline.utils import load_pii_config
-from pipeline.hindi_extraction import extract_text_with_bboxes, filter_hindi_ocr_results, setup_logging as hindi_setup_logging
-from pipeline.hindi_detection import perform_hindi_ner, map_hindi_entities_to_bboxes
+from pipeline.decrypt import decrypt_file, decrypt_bytes
+from pipeline.encrypt import encrypt_file, encrypt_bytes, FERNET_FORMAT
+from pipeline.ocr import (
+    extract_text_and_coords, extract_text_and_coords_batch, lines_by_document, iter_pages, ocr_page_images,
+    DEFAULT_PAGE_BATCH_SIZE, DEFAULT_MIN_TEXT_LAYER_WORDS
+)
+from pipeline.pii_detection import find_pii_entities, DETECTION_RULES_VERSION
+from pipeline.redaction import redact_image, redact_pdf, redact_document_bytes, redact_pdf_document
+from pipeline.utils import load_key
+from pipeline.hindi_extraction import (
+    extract_text_with_bboxes, extract_text_with_bboxes_batch, filter_hindi_ocr_results,
+    configure_reader_pool, setup_logging as hindi_setup_logging, DEFAULT_READTEXT_BATCH_SIZE, DEFAULT_READERS_PER_LANGUAGE_SET
+)
+from pipeline.hindi_detection import (
+    perform_hindi_ner, map_hindi_entities_to_bboxes, assemble_hindi_text, DEFAULT_WINDOW_TOKENS as DEFAULT_HINDI_WINDOW_TOKENS,
+    DEFAULT_WINDOW_OVERLAP as DEFAULT_HINDI_WINDOW_OVERLAP, DEFAULT_NER_BATCH_SIZE as DEFAULT_HINDI_NER_BATCH_SIZE
+)
+from pipeline.model_registry import get_registry, DEFAULT_MAX_ENTRIES, ENGLISH_NER_MODEL, HINDI_NER_MODEL, DOCTR_OCR_MODEL
+from pipeline.document_cache import (
+    get_document_cache, make_document_key, hash_file, hash_bytes,
+    DEFAULT_CACHE_DIR as DEFAULT_DOCUMENT_CACHE_DIR, DEFAULT_MAX_BYTES as DEFAULT_DOCUMENT_CACHE_BYTES
+)
+from pipeline.detection_cache import get_line_caches
+from pipeline.ocr_store import get_ocr_stores, ocr_store_from_config
+from pipeline.rasterize import open_pdf, iter_page_images, DEFAULT_DPI
+from pipeline.script_routing import (
+    route_page, route_line_records, needs_hindi, get_routing_stats, DEFAULT_MIN_CONFIDENCE, ENGLISH
+)
 from tqdm import tqdm
 from PIL import Image
 
 warnings.filterwarnings("ignore")
 
-def process_english(decrypted_file_path, redacted_file_path, pii_types):
-    extracted_data = extract_text_and_coords(decrypted_file_path)
-    
+# PDFs with more pages than this are rasterized, OCRed, detected and redacted this many pages at a time
+DEFAULT_PAGE_WINDOW = 16
+# Documents decrypted and OCRed together by the sequential workflow. Their plaintext is held
+# until each is processed, so this bounds the memory used on top of the OCR page batches.
+DEFAULT_DOCUMENT_BATCH_SIZE = 4
+
+def detect_english(extracted_data, pii_types, found_dates=None):
     english_extracted_text = " ".join([line['text'] for line in extracted_data if line.get('text')])
     print("\n--- English Extracted Text ---")
     print(english_extracted_text)
     print("--- End of English Extracted Text ---\n")
 
-    detected_pii = find_pii_entities(extracted_data, pii_types)
+    detected_pii = find_pii_entities(extracted_data, pii_types, found_dates=found_dates)
 
     if detected_pii:
         print("\n--- Detected PII (English) ---")
         for entity in detected_pii:
-            print(f"Type: {entity['type']}, Text: {entity['text']}, Bounding Box: {entity['bounding_box']}")
+            print(f"Type: {entity['type']}, Text: {entity['text']}, Page: {entity.get('page', 0)}, Bounding Box: {entity['bounding_box']}")
         print("--- End of Detected PII (English) ---\n")
     else:
         print("\nNo English PII detected.\n")
 
+    return detected_pii
+
+def process_english(decrypted_file_path, redacted_file_path, pii_types, extracted_data=None):
+    if extracted_data is None:
+        extracted_data = extract_text_and_coords(decrypted_file_path)
+
+    detected_pii = detect_english(extracted_data, pii_types)
+
     original_ext = os.path.splitext(decrypted_file_path)[1].lower()
     if original_ext == '.pdf':
         redact_pdf(decrypted_file_path, detected_pii, redacted_file_path, pii_types)
@@ -43,37 +80,27 @@ def process_english(decrypted_file_path, redacted_file_path, pii_types):
 
     return detected_pii
 
-def process_hindi(hindi_decrypted_path, redacted_file_path, hindi_config, pii_types):
-    if not hindi_config.get('enabled', False):
-        return
+def detect_hindi(hindi_extracted_data, hindi_config):
+    if not hindi_extracted_data:
+        # Every page was routed to the English pipeline, or EasyOCR found nothing; skip IndicNER
+        print("\nNo Hindi text to scan.\n")
+        return []
 
-    from PIL import Image
-    original_ext = os.path.splitext(hindi_decrypted_path)[1].lower()
-
-    if original_ext == '.pdf':
-        from pdf2image import convert_from_path
-        pages = convert_from_path(hindi_decrypted_path)
-        hindi_extracted_data = []
-        for page in pages:
-            ocr_results = extract_text_with_bboxes(page, languages=hindi_config.get('languages', ['hi']))
-            image_width, image_height = page.size
-            filtered_ocr = filter_hindi_ocr_results(ocr_results, image_width, image_height)
-            hindi_extracted_data.extend(filtered_ocr)
-    else:
-        with Image.open(hindi_decrypted_path) as img:
-            ocr_results = extract_text_with_bboxes(img, languages=hindi_config.get('languages', ['hi']))
-            image_width, image_height = img.size
-            hindi_extracted_data = filter_hindi_ocr_results(ocr_results, image_width, image_height)
-
-    hindi_extracted_text = " ".join([entry['text'] for entry in hindi_extracted_data if entry.get('text')])
+    # Records each fragment's offsets in the text, so NER spans map back to fragment boxes
+    hindi_extracted_text, fragments = assemble_hindi_text(hindi_extracted_data)
     print("\n--- Hindi Extracted Text ---")
     print(hindi_extracted_text)
     print("--- End of Hindi Extracted Text ---\n")
 
     hindi_person_entities = perform_hindi_ner(
-        cleaned_text=' '.join([entry['text'] for entry in hindi_extracted_data]),
+        cleaned_text=hindi_extracted_text,
         model_name=hindi_config.get('ner_model', 'ai4bharat/IndicNER'),
-        logger=hindi_config.get('logger', None)
+        logger=hindi_config.get('logger', None),
+        backend=hindi_config.get('ner_backend', 'torch'),
+        onnx_options=hindi_config.get('onnx'),
+        window_tokens=hindi_config.get('ner_window_tokens', DEFAULT_HINDI_WINDOW_TOKENS),
+        overlap_tokens=hindi_config.get('ner_window_overlap', DEFAULT_HINDI_WINDOW_OVERLAP),
+        batch_size=hindi_config.get('ner_batch_size', DEFAULT_HINDI_NER_BATCH_SIZE)
     )
 
     print("\n--- Debug: Hindi Person Entities ---")
@@ -81,7 +108,7 @@ def process_hindi(hindi_decrypted_path, redacted_file_path, hindi_config, pii_ty
         print(ent)
     print("--- End of Debug: Hindi Person Entities ---\n")
 
-    hindi_mapped_entities = map_hindi_entities_to_bboxes(hindi_person_entities, hindi_extracted_data)
+    hindi_mapped_entities = map_hindi_entities_to_bboxes(hindi_person_entities, fragments)
 
     if hindi_mapped_entities:
         print("\n--- Detected PII (Hindi) ---")
@@ -91,6 +118,66 @@ def process_hindi(hindi_decrypted_path, redacted_file_path, hindi_config, pii_ty
     else:
         print("\nNo Hindi PII detected.\n")
 
+    return hindi_mapped_entities
+
+def process_hindi(hindi_decrypted_path, redacted_file_path, hindi_config, pii_types, dpi=DEFAULT_DPI,
+                  page_window=DEFAULT_PAGE_WINDOW, routes=None):
+    """
+    Runs EasyOCR and IndicNER over the document and redacts the Hindi names found.
+
+    `routes` maps page indices to their script route (see route_english_lines). Pages routed
+    to the English pipeline, or missing from it and so without any English line, are neither
+    rendered nor OCRed. With None every page goes through Hindi OCR.
+    """
+    if not hindi_config.get('enabled', False):
+        return []
+
+    from PIL import Image
+    original_ext = os.path.splitext(hindi_decrypted_path)[1].lower()
+    page_filter = None
+    if routes is not None:
+        page_filter = lambda page_index: needs_hindi(routes.get(page_index, ENGLISH))
+    start = time.perf_counter()
+    hindi_pages = 0
+
+    if original_ext == '.pdf':
+        # Only `page_window` rendered pages are held at a time
+        pages = iter_page_images(hindi_decrypted_path, dpi=dpi, page_filter=page_filter)
+        hindi_extracted_data = []
+        while True:
+            window = list(itertools.islice(pages, page_window or None))
+            if not window:
+                break
+            page_results = extract_text_with_bboxes_batch(
+                [page for _, page in window],
+                languages=hindi_config.get('languages', ['hi']),
+                batch_size=hindi_config.get('ocr_batch_size', DEFAULT_READTEXT_BATCH_SIZE),
+                store=hindi_config.get('ocr_store')
+            )
+            for (page_index, page), ocr_results in zip(window, page_results):
+                image_height, image_width = page.shape[:2]
+                filtered_ocr = filter_hindi_ocr_results(ocr_results, image_width, image_height, page_index=page_index)
+                hindi_extracted_data.extend(filtered_ocr)
+            hindi_pages += len(window)
+            del window, page_results
+    elif page_filter is not None and not page_filter(0):
+        hindi_extracted_data = []
+    else:
+        with Image.open(hindi_decrypted_path) as img:
+            ocr_results = extract_text_with_bboxes(
+                img,
+                languages=hindi_config.get('languages', ['hi']),
+                store=hindi_config.get('ocr_store')
+            )
+            image_width, image_height = img.size
+            hindi_extracted_data = filter_hindi_ocr_results(ocr_results, image_width, image_height)
+        hindi_pages = 1
+
+    if routes is not None:
+        get_routing_stats().record(routes, hindi_pages, time.perf_counter() - start)
+
+    hindi_mapped_entities = detect_hindi(hindi_extracted_data, hindi_config)
+
     # Only redact if hindi_mapped_entities exist AND 'person' type redaction is enabled
     if hindi_mapped_entities and pii_types.get('person', False):
         if original_ext == '.pdf':
@@ -98,62 +185,484 @@ def process_hindi(hindi_decrypted_path, redacted_file_path, hindi_config, pii_ty
         else:
             redact_image(hindi_decrypted_path, hindi_mapped_entities, hindi_extracted_data, redacted_file_path, pii_types)
 
-def process_file(encrypted_input_path, encrypted_output_path, temp_dir, pii_types, hindi_config, english_enabled, hindi_enabled):
-    try:
-        os.makedirs(temp_dir, exist_ok=True)
+    return hindi_mapped_entities
+
+def document_cache_version(config, hindi_config):
+    """
+    Describes the models, rules, settings and encryption key that shape a cached result.
+    Cached artifacts are stored encrypted, so a new key must not reuse them.
+    """
+    relevant = {
+        'models': [ENGLISH_NER_MODEL, HINDI_NER_MODEL, DOCTR_OCR_MODEL],
+        'rules': DETECTION_RULES_VERSION,
+        'processing': config.get('processing', {}),
+        'ner': config.get('ner', {}),
+        'ocr': config.get('ocr', {}),
+        'encryption': config.get('encryption', {}),
+        'hindi_processing': {key: value for key, value in hindi_config.items() if key not in ('logger', 'ocr_store', 'log_file')},
+        'key': hashlib.sha256(load_key()).hexdigest()[:16]
+    }
+    return json.dumps(relevant, sort_keys=True, default=str)
+
+# In-memory stages. Each takes the per-document context built by new_document_context,
+# reads what earlier stages stored in it and adds its own output.
+
+def new_document_context(encrypted_input_path, encrypted_output_path, pii_types, hindi_config, english_enabled,
+                         hindi_enabled, ocr_config=None, extracted_data=None, key=None, encryption_format=FERNET_FORMAT,
+                         page_window=DEFAULT_PAGE_WINDOW, data=None):
+    original_filename = os.path.basename(encrypted_input_path)[:-4]
+    return {
+        'encrypted_input_path': encrypted_input_path,
+        'encrypted_output_path': encrypted_output_path,
+        'original_filename': original_filename,
+        'original_ext': os.path.splitext(original_filename)[1].lower(),
+        'pii_types': pii_types,
+        'hindi_config': hindi_config,
+        'english_enabled': english_enabled,
+        'hindi_enabled': hindi_enabled and hindi_config.get('enabled', False),
+        'ocr_config': ocr_config or {},
+        'key': key or load_key(),
+        'encryption_format': encryption_format,
+        'page_window': page_window,
+        'extracted_data': extracted_data,
+        # Plaintext already decrypted by the caller (see prefetch_ocr), or None
+        'data': data,
+        'text_layer_lines': {},
+        'images': {},
+        'hindi_extracted_data': [],
+        'entities': []
+    }
 
+def decrypt_stage(context):
+    if context.get('data') is not None:
+        return
+    with open(context['encrypted_input_path'], 'rb') as encrypted_file:
+        context['data'] = decrypt_bytes(encrypted_file.read(), context['key'])
+
+def rasterize_stage(context):
+    """
+    Reads the text layer and renders page images once; English OCR and Hindi OCR share the images.
+    """
+    needs_english_ocr = context['english_enabled'] and context['extracted_data'] is None
+    if not needs_english_ocr and not context['hindi_enabled']:
+        return
+
+    if context['original_ext'] == '.pdf' and context['page_window']:
+        with open_pdf(context['original_filename'], context['data']) as doc:
+            page_count = len(doc)
+        if page_count > context['page_window']:
+            stream_document(context)
+            return
+
+    for page_index, lines, image in iter_document_pages(context, needs_english_ocr):
+        if lines is not None:
+            context['text_layer_lines'][page_index] = lines
+        if image is not None:
+            context['images'][page_index] = image
+
+def iter_document_pages(context, needs_english_ocr):
+    text_layer_config = context['ocr_config'].get('text_layer', {})
+    return iter_pages(
+        context['original_filename'],
+        use_text_layer=needs_english_ocr and text_layer_config.get('enabled', True),
+        min_text_words=text_layer_config.get('min_words', DEFAULT_MIN_TEXT_LAYER_WORDS),
+        data=context['data'],
+        render_text_pages=_hindi_render_filter(context),
+        dpi=context['ocr_config'].get('render_dpi', DEFAULT_DPI)
+    )
+
+def _min_routing_confidence(hindi_config):
+    """
+    Returns the docTR confidence below which a line counts as non-Latin, or None when
+    script routing is off and every page goes through Hindi OCR.
+    """
+    routing_config = hindi_config.get('routing', {})
+    if not routing_config.get('enabled', True):
+        return None
+    return routing_config.get('min_confidence', DEFAULT_MIN_CONFIDENCE)
+
+def _hindi_render_filter(context):
+    # Born-digital pages without Devanagari are never rendered for Hindi OCR
+    if not context['hindi_enabled']:
+        return False
+    min_confidence = _min_routing_confidence(context['hindi_config'])
+    if min_confidence is None:
+        return True
+    return lambda lines: needs_hindi(route_page(lines, min_confidence))
+
+def route_english_lines(extracted_data, hindi_config, page_indices=()):
+    """
+    Routes the pages of a document by its English line records.
+
+    Returns:
+        dict or None: Route of each page by page index, or None when routing is off or
+                      there are no English lines to route by (English processing disabled,
+                      or docTR found nothing), in which case every page gets Hindi OCR.
+    """
+    min_confidence = _min_routing_confidence(hindi_config)
+    if min_confidence is None or not extracted_data:
+        return None
+    return route_line_records(extracted_data, page_indices, min_confidence)
+
+def route_document_pages(context):
+    """
+    Routes every page of the document (or window) by its English line records.
+    """
+    if not context['english_enabled']:
+        return None
+    return route_english_lines(context['extracted_data'], context['hindi_config'], context['images'])
+
+def print_page_routes(filename, routes):
+    decisions = " ".join(f"{page_index + 1}:{routes[page_index]}" for page_index in sorted(routes))
+    skipped = sum(1 for route in routes.values() if not needs_hindi(route))
+    print(f"Script routing for {filename}: {decisions} "
+          f"(Hindi OCR skipped on {skipped} of {len(routes)} pages)")
+
+def _next_window(context, pages, prefetched):
+    """
+    Builds the context of the next `page_window` pages, or returns None when the document is done.
+    """
+    window = dict(
+        context, text_layer_lines={}, images={}, hindi_extracted_data=[], entities=[],
+        extracted_data=None if prefetched is None else []
+    )
+    page_count = 0
+    for page_index, lines, image in itertools.islice(pages, context['page_window']):
+        page_count += 1
+        if lines is not None:
+            window['text_layer_lines'][page_index] = lines
+        if image is not None:
+            window['images'][page_index] = image
+        if prefetched is not None:
+            window['extracted_data'].extend(prefetched.get(page_index, []))
+    return window if page_count else None
+
+def stream_document(context):
+    """
+    Processes a large PDF in windows of `page_window` pages so peak memory does not grow
+    with the page count: each window is rendered, OCRed by both engines, released,
+    scanned and redacted into the output document before the next one is rendered.
+
+    Dates are reported once per document as in the whole-document path. Hindi NER runs
+    per window, so a name split across a window boundary is not joined.
+
+    Each window's OCR, detection and redaction are run through context['run_stage'] when
+    set, called as run_stage(stage_name, function, window); the staged pipeline uses it to
+    run them within the limits of its own ocr, detect and redact stages.
+    """
+    run_stage = context.get('run_stage') or (lambda name, function, window: function(window))
+    needs_english_ocr = context['english_enabled'] and context['extracted_data'] is None
+    prefetched = None
+    if not needs_english_ocr and context['extracted_data'] is not None:
+        prefetched = {}
+        for line in context['extracted_data']:
+            prefetched.setdefault(line.get('page', 0), []).append(line)
+
+    pages = iter_document_pages(context, needs_english_ocr)
+    found_dates = set()
+    extracted_data = []
+    windows = 0
+    with open_pdf(context['original_filename'], context['data']) as doc:
+        while True:
+            window = _next_window(context, pages, prefetched)
+            if window is None:
+                break
+            window['found_dates'] = found_dates
+            run_stage('ocr', ocr_stage, window)
+            run_stage('detect', detect_stage, window)
+            run_stage('redact', lambda window: redact_pdf_document(doc, window['entities'], context['pii_types']), window)
+            extracted_data.extend(window['extracted_data'] or [])
+            context['hindi_extracted_data'].extend(window['hindi_extracted_data'])
+            context['entities'].extend(window['entities'])
+            windows += 1
+            del window
+        context['redacted'] = doc.tobytes() if context['entities'] else context['data']
+
+    if context['english_enabled']:
+        context['extracted_data'] = extracted_data
+    context['streamed'] = True
+    print(f"Processed {context['original_filename']} in {windows} windows of {context['page_window']} pages")
+
+def ocr_stage(context):
+    # Streamed documents went through every stage up to redaction in rasterize_stage
+    if context.get('streamed'):
+        return
+    if context['english_enabled'] and context['extracted_data'] is None:
+        ocr_images = {
+            page_index: image for page_index, image in context['images'].items()
+            if page_index not in context['text_layer_lines']
+        }
+        page_lines = dict(context['text_layer_lines'])
+        page_lines.update(ocr_page_images(
+            ocr_images,
+            page_batch_size=context['ocr_config'].get('page_batch_size', DEFAULT_PAGE_BATCH_SIZE),
+            store=ocr_store_from_config(context['ocr_config'])
+        ))
+        context['extracted_data'] = [line for page_index in sorted(page_lines) for line in page_lines[page_index]]
+
+    if context['hindi_enabled']:
+        hindi_config = context['hindi_config']
+        page_indices = sorted(context['images'])
+        routes = route_document_pages(context)
+        if routes is not None:
+            page_indices = [page_index for page_index in page_indices if needs_hindi(routes[page_index])]
+        start = time.perf_counter()
+        page_results = extract_text_with_bboxes_batch(
+            [context['images'][page_index] for page_index in page_indices],
+            languages=hindi_config.get('languages', ['hi']),
+            batch_size=hindi_config.get('ocr_batch_size', DEFAULT_READTEXT_BATCH_SIZE),
+            store=hindi_config.get('ocr_store')
+        ) if page_indices else []
+        for page_index, ocr_results in zip(page_indices, page_results):
+            image_height, image_width = context['images'][page_index].shape[:2]
+            context['hindi_extracted_data'].extend(
+                filter_hindi_ocr_results(ocr_results, image_width, image_height, page_index=page_index)
+            )
+        if routes is not None:
+            get_routing_stats().record(routes, len(page_indices), time.perf_counter() - start)
+            print_page_routes(context['original_filename'], routes)
+
+    # Both OCR engines are done with the pages; release the pixmaps
+    context['images'] = {}
+
+def detect_stage(context):
+    if context.get('streamed'):
+        return
+    if context['english_enabled']:
+        context['entities'].extend(detect_english(
+            context['extracted_data'] or [], context['pii_types'], found_dates=context.get('found_dates')
+        ))
+    if context['hindi_enabled']:
+        context['entities'].extend(detect_hindi(context['hindi_extracted_data'], context['hindi_config']))
+
+def redact_stage(context):
+    if context.get('streamed'):
+        return
+    # English and Hindi entities are applied in one pass over the document
+    if context['entities']:
+        context['redacted'] = redact_document_bytes(
+            context['data'], context['original_ext'], context['entities'], context['pii_types']
+        )
+    else:
+        context['redacted'] = context['data']
+
+def encrypt_stage(context):
+    with open(context['encrypted_output_path'], 'wb') as output_file:
+        output_file.write(encrypt_bytes(context['redacted'], context['key'], context['encryption_format']))
+
+def lookup_document_cache(context, document_cache, cache_version):
+    """
+    Serves a decrypted document from the cache if possible.
+
+    Returns:
+        bool: True if the output was written from the cache and the remaining stages can be skipped.
+    """
+    if document_cache is None:
+        return False
+    context['cache_key'] = make_document_key(hash_bytes(context['data']), context['pii_types'], cache_version)
+    cached = document_cache.get(context['cache_key'])
+    if cached is None:
+        return False
+    with open(context['encrypted_output_path'], 'wb') as output_file:
+        output_file.write(cached['artifact'])
+    context['entity_count'] = cached['entity_count']
+    print(f"Served from document cache: {context['encrypted_input_path']} -> {context['encrypted_output_path']}")
+    return True
+
+def store_document_cache(context, document_cache):
+    if document_cache is None:
+        return
+    with open(context['encrypted_output_path'], 'rb') as output_file:
+        document_cache.put(context['cache_key'], output_file.read(), context['entities'])
+
+def process_document_in_memory(context, document_cache=None, cache_version=''):
+    """
+    Runs one document through the in-memory stages: it is decrypted once, redacted in memory
+    and encrypted once, and the plaintext never touches disk.
+    """
+    decrypt_stage(context)
+    if lookup_document_cache(context, document_cache, cache_version):
+        return {'status': 'cached', 'entities': context['entity_count']}
+
+    rasterize_stage(context)
+    ocr_stage(context)
+    detect_stage(context)
+    redact_stage(context)
+    encrypt_stage(context)
+    store_document_cache(context, document_cache)
+    return {'status': 'processed', 'entities': len(context['entities'])}
+
+def process_file(encrypted_input_path, encrypted_output_path, temp_dir, pii_types, hindi_config, english_enabled, hindi_enabled,
+                 extracted_data=None, document_cache=None, cache_version='', in_memory=True, ocr_config=None,
+                 encryption_format=FERNET_FORMAT, page_window=DEFAULT_PAGE_WINDOW, data=None):
+    """
+    Parameters:
+        extracted_data (List[dict]): English line records OCRed ahead of time, or None.
+        data (bytes): Plaintext decrypted ahead of time, or None to decrypt the input file.
+
+    Returns:
+        dict: 'file', 'output', 'status' ('processed', 'cached', 'skipped' or 'error'),
+              'entities' (number detected), 'error' (message or None) and 'seconds'.
+    """
+    start = time.perf_counter()
+    result = {
+        'file': encrypted_input_path,
+        'output': encrypted_output_path,
+        'status': 'skipped',
+        'entities': 0,
+        'error': None,
+        'seconds': 0.0
+    }
+    try:
         base_name = os.path.basename(encrypted_input_path)
         if not base_name.endswith('.enc'):
             print(f"Skipping non-encrypted file: {base_name}")
-            return
-        original_filename = base_name[:-4]
-        original_ext = os.path.splitext(original_filename)[1].lower()
+            return result
+
+        if in_memory:
+            context = new_document_context(
+                encrypted_input_path, encrypted_output_path, pii_types, hindi_config,
+                english_enabled, hindi_enabled, ocr_config=ocr_config, extracted_data=extracted_data,
+                encryption_format=encryption_format, page_window=page_window, data=data
+            )
+            result.update(process_document_in_memory(context, document_cache, cache_version))
+        else:
+            result.update(process_file_on_disk(
+                encrypted_input_path, encrypted_output_path, temp_dir, pii_types, hindi_config,
+                english_enabled, hindi_enabled, extracted_data, document_cache, cache_version, encryption_format,
+                ocr_config, page_window, data
+            ))
 
-        decrypted_file_path = os.path.join(temp_dir, f'decrypted_input{original_ext}')
-        redacted_file_path = os.path.join(temp_dir, f'redacted_input{original_ext}')
+        print(f"Successfully processed: {encrypted_input_path} -> {encrypted_output_path}")
 
-        decrypt_file(encrypted_input_path, decrypted_file_path)
+    except Exception as e:
+        print(f"Error processing file {encrypted_input_path}: {e}")
+        result['status'] = 'error'
+        # Some exceptions (e.g. InvalidToken) carry no message
+        result['error'] = str(e) or type(e).__name__
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def process_file_on_disk(encrypted_input_path, encrypted_output_path, temp_dir, pii_types, hindi_config, english_enabled,
+                         hindi_enabled, extracted_data=None, document_cache=None, cache_version='',
+                         encryption_format=FERNET_FORMAT, ocr_config=None, page_window=DEFAULT_PAGE_WINDOW, data=None):
+    """
+    Processes one document through plaintext temp files (processing.in_memory: false).
+    Each call works in its own temp directory so concurrent runs do not collide.
+    """
+    os.makedirs(temp_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix='document_', dir=temp_dir)
+    try:
+        original_filename = os.path.basename(encrypted_input_path)[:-4]
+        original_ext = os.path.splitext(original_filename)[1].lower()
+
+        decrypted_file_path = os.path.join(work_dir, f'decrypted_input{original_ext}')
+        redacted_file_path = os.path.join(work_dir, f'redacted_input{original_ext}')
 
+        if data is None:
+            decrypt_file(encrypted_input_path, decrypted_file_path)
+        else:
+            with open(decrypted_file_path, 'wb') as decrypted_file:
+                decrypted_file.write(data)
+
+        # Documents already processed with the same flags and models are served from the cache
+        cache_key = None
+        if document_cache is not None:
+            cache_key = make_document_key(hash_file(decrypted_file_path), pii_types, cache_version)
+            cached = document_cache.get(cache_key)
+            if cached is not None:
+                with open(encrypted_output_path, 'wb') as output_file:
+                    output_file.write(cached['artifact'])
+                print(f"Served from document cache: {encrypted_input_path} -> {encrypted_output_path}")
+                return {'status': 'cached', 'entities': cached['entity_count']}
+
+        detected_entities = []
         if english_enabled:
-            process_english(decrypted_file_path, redacted_file_path, pii_types)
-            encrypt_file(redacted_file_path, encrypted_output_path)
+            if extracted_data is None:
+                extracted_data = extract_text_and_coords(decrypted_file_path)
+            detected_entities.extend(process_english(decrypted_file_path, redacted_file_path, pii_types, extracted_data=extracted_data))
+            encrypt_file(redacted_file_path, encrypted_output_path, file_format=encryption_format)
         else:
             shutil.copyfile(decrypted_file_path, redacted_file_path)
-            encrypt_file(redacted_file_path, encrypted_output_path)
+            encrypt_file(redacted_file_path, encrypted_output_path, file_format=encryption_format)
 
         if hindi_enabled and hindi_config.get('enabled', False):
-            hindi_decrypted_path = os.path.join(temp_dir, f'decrypted_redacted_input{original_ext}')
+            hindi_decrypted_path = os.path.join(work_dir, f'decrypted_redacted_input{original_ext}')
             decrypt_file(encrypted_output_path, hindi_decrypted_path)
 
-            process_hindi(hindi_decrypted_path, redacted_file_path, hindi_config, pii_types)
-
-            encrypt_file(redacted_file_path, encrypted_output_path)
-            os.remove(hindi_decrypted_path)
-
-        os.remove(decrypted_file_path)
-        os.remove(redacted_file_path)
-
-        print(f"Successfully processed: {encrypted_input_path} -> {encrypted_output_path}")
+            # Pages whose English lines all read as confident Latin text skip EasyOCR
+            routes = route_english_lines(extracted_data, hindi_config) if english_enabled else None
+            if routes is not None:
+                print_page_routes(original_filename, routes)
+            detected_entities.extend(process_hindi(
+                hindi_decrypted_path, redacted_file_path, hindi_config, pii_types,
+                dpi=(ocr_config or {}).get('render_dpi', DEFAULT_DPI),
+                page_window=page_window,
+                routes=routes
+            ))
+
+            encrypt_file(redacted_file_path, encrypted_output_path, file_format=encryption_format)
+
+        if document_cache is not None:
+            with open(encrypted_output_path, 'rb') as output_file:
+                document_cache.put(cache_key, output_file.read(), detected_entities)
+        return {'status': 'processed', 'entities': len(detected_entities)}
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def prefetch_ocr(input_dir, encrypted_files, ocr_config, key=None):
+    """
+    Decrypts a group of files in memory and OCRs all their pages together in large batches.
+
+    Returns:
+        dict: Maps each encrypted filename to (plaintext, extracted line records), to be passed
+              on to process_file so nothing is decrypted or OCRed twice. Files that could not be
+              decrypted are left out; files that could not be OCRed map to (plaintext, None).
+    """
+    key = key or load_key()
+    contents = {}
+    for file in encrypted_files:
+        try:
+            with open(os.path.join(input_dir, file), 'rb') as encrypted_file:
+                contents[file[:-4]] = decrypt_bytes(encrypted_file.read(), key)
+        except Exception as e:
+            print(f"Error decrypting {file} for batched OCR: {e}")
 
+    try:
+        documents = lines_by_document(
+            extract_text_and_coords_batch(
+                list(contents),
+                page_batch_size=ocr_config.get('page_batch_size', DEFAULT_PAGE_BATCH_SIZE),
+                use_text_layer=ocr_config.get('text_layer', {}).get('enabled', True),
+                min_text_words=ocr_config.get('text_layer', {}).get('min_words', DEFAULT_MIN_TEXT_LAYER_WORDS),
+                store=ocr_store_from_config(ocr_config),
+                contents=contents,
+                dpi=ocr_config.get('render_dpi', DEFAULT_DPI)
+            )
+        )
     except Exception as e:
-        print(f"Error processing file {encrypted_input_path}: {e}")
+        print(f"Error during batched OCR extraction: {e}")
+        documents = {}
 
-def run_workflow(input_dir='input', output_dir='output', temp_dir='temp', pii_config_path='config/settings.yaml'):
-    import logging
+    return {file: (contents[file[:-4]], documents.get(file[:-4])) for file in encrypted_files if file[:-4] in contents}
 
-    try:
-        with open(pii_config_path, 'r') as file:
-            config = yaml.safe_load(file)
-    except FileNotFoundError:
-        print(f"Configuration file not found: {pii_config_path}")
-        return
-    except yaml.YAMLError as e:
-        print(f"Error parsing configuration file: {e}")
-        return
+def load_workflow_settings(config, output_dir='output'):
+    """
+    Builds the per-document settings of a workflow run from the parsed configuration.
+    Also sizes the model registry and the EasyOCR reader pool of the calling process.
 
+    Returns:
+        dict: Keyword arguments for process_file, apart from the paths.
+    """
     processing_config = config.get('processing', {})
     english_enabled = processing_config.get('english_enabled', True)
     hindi_enabled = processing_config.get('hindi_enabled', True)
+    # Decrypt once and keep the plaintext in memory; false falls back to temp files
+    in_memory = processing_config.get('in_memory', True)
+    # Large PDFs are processed this many pages at a time to bound memory; 0 loads whole documents
+    page_window = processing_config.get('page_window', DEFAULT_PAGE_WINDOW)
+    # Output container: 'fernet' (default) or 'chunked'; inputs of either format are detected
+    encryption_format = config.get('encryption', {}).get('format', FERNET_FORMAT)
 
     pii_patterns = config.get('pii_patterns', {})
 
@@ -170,37 +679,170 @@ def run_workflow(input_dir='input', output_dir='output', temp_dir='temp', pii_co
         'voter': pii_patterns.get('voter', False)  # Added voter
     }
 
+    registry_config = config.get('model_registry', {})
+    get_registry().resize(registry_config.get('max_models', DEFAULT_MAX_ENTRIES))
+
     hindi_config = config.get('hindi_processing', {})
     hindi_logger = hindi_setup_logging(
         output_dir=output_dir,
         log_file=hindi_config.get('log_file', 'hindi_results.log')
     )
     hindi_config['logger'] = hindi_logger
+    hindi_config['ocr_store'] = ocr_store_from_config(config.get('ocr', {}))
+    configure_reader_pool(
+        max_readers=hindi_config.get('reader_pool_size', DEFAULT_READERS_PER_LANGUAGE_SET),
+        gpu=hindi_config.get('gpu', False)
+    )
+
+    document_cache = None
+    cache_version = ''
+    document_cache_config = config.get('document_cache', {})
+    if document_cache_config.get('enabled', True):
+        document_cache = get_document_cache(
+            cache_dir=document_cache_config.get('cache_dir', DEFAULT_DOCUMENT_CACHE_DIR),
+            max_bytes=document_cache_config.get('max_bytes', DEFAULT_DOCUMENT_CACHE_BYTES)
+        )
+        cache_version = document_cache_version(config, hindi_config)
+
+    return {
+        'pii_types': pii_types,
+        'hindi_config': hindi_config,
+        'english_enabled': english_enabled,
+        'hindi_enabled': hindi_enabled,
+        'document_cache': document_cache,
+        'cache_version': cache_version,
+        'in_memory': in_memory,
+        'encryption_format': encryption_format,
+        'ocr_config': config.get('ocr', {}),
+        'page_window': page_window
+    }
+
+def print_results_summary(results):
+    """
+    Prints per-status counts and, in submission order, every file that failed.
+    """
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    print("Results: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+    for result in results:
+        if result['status'] == 'error':
+            print(f"  Failed: {result['file']}: {result['error']}")
+
+def run_workflow(input_dir='input', output_dir='output', temp_dir='temp', pii_config_path='config/settings.yaml', workers=None):
+    """
+    Redacts every encrypted file in `input_dir`.
+
+    Parameters:
+        workers (int): Number of worker processes; defaults to processing.workers (1 runs in this process).
+                       With one worker, processing.pipeline.enabled runs the stages of consecutive
+                       documents concurrently (see pipeline.staged).
+
+    Returns:
+        List[dict]: The process_file result of each file, in directory listing order.
+    """
+    try:
+        with open(pii_config_path, 'r') as file:
+            config = yaml.safe_load(file)
+    except FileNotFoundError:
+        print(f"Configuration file not found: {pii_config_path}")
+        return []
+    except yaml.YAMLError as e:
+        print(f"Error parsing configuration file: {e}")
+        return []
+
+    settings = load_workflow_settings(config, output_dir)
+    processing_config = config.get('processing', {})
+    workers = workers or processing_config.get('workers', 1)
 
     os.makedirs(output_dir, exist_ok=True)
     encrypted_files = [f for f in os.listdir(input_dir) if f.endswith('.enc')]
 
     if not encrypted_files:
         print(f"No encrypted files found in the input directory: {input_dir}")
-        return
-
-    for file in tqdm(encrypted_files, desc="Processing files"):
-        encrypted_input_path = os.path.join(input_dir, file)
-        base_name = os.path.splitext(file)[0]
-        encrypted_output_path = os.path.join(output_dir, f"{base_name}_redacted.enc")
-
-        process_file(
-            encrypted_input_path=encrypted_input_path,
-            encrypted_output_path=encrypted_output_path,
+        return []
+
+    jobs = [
+        (os.path.join(input_dir, file), os.path.join(output_dir, f"{os.path.splitext(file)[0]}_redacted.enc"))
+        for file in encrypted_files
+    ]
+
+    # Decrypt, rasterize, OCR, detect, redact and encrypt on separate thread pools
+    pipeline_config = processing_config.get('pipeline', {})
+    stage_stats = None
+
+    if workers > 1:
+        from pipeline.parallel import run_parallel
+        results = run_parallel(
+            jobs,
+            workers=workers,
+            pii_config_path=pii_config_path,
+            output_dir=output_dir,
             temp_dir=temp_dir,
-            pii_types=pii_types,
-            hindi_config=hindi_config,
-            english_enabled=english_enabled,
-            hindi_enabled=hindi_enabled
+            threads_per_worker=processing_config.get('threads_per_worker')
         )
-
+    elif pipeline_config.get('enabled', False):
+        from pipeline.staged import run_staged
+        results, stage_stats = run_staged(jobs, settings, pipeline_config)
+    else:
+        results = []
+        ocr_config = settings['ocr_config']
+        document_batch_size = ocr_config.get('document_batch_size', DEFAULT_DOCUMENT_BATCH_SIZE)
+        with tqdm(total=len(jobs), desc="Processing files") as progress:
+            for batch_start in range(0, len(jobs), document_batch_size):
+                batch_files = encrypted_files[batch_start:batch_start + document_batch_size]
+
+                prefetched = {}
+                if settings['english_enabled'] and document_batch_size > 1:
+                    prefetched = prefetch_ocr(input_dir, batch_files, ocr_config)
+
+                for file, (encrypted_input_path, encrypted_output_path) in zip(batch_files, jobs[batch_start:]):
+                    # Hand the plaintext over so the batch only holds documents still to be processed
+                    data, extracted_data = prefetched.pop(file, (None, None))
+                    results.append(process_file(
+                        encrypted_input_path=encrypted_input_path,
+                        encrypted_output_path=encrypted_output_path,
+                        temp_dir=temp_dir,
+                        extracted_data=extracted_data,
+                        data=data,
+                        **settings
+                    ))
+                    del data
+                    progress.update(1)
+
+    print_results_summary(results)
+    if stage_stats:
+        from pipeline.staged import print_stage_stats
+        print_stage_stats(stage_stats)
+
+    registry_stats = get_registry().stats()
+    print(f"Model registry: {registry_stats['hits']} hits, {registry_stats['misses']} misses, "
+          f"{registry_stats['evictions']} evictions, {registry_stats['load_time']:.2f}s spent loading models")
+    for line_cache in get_line_caches():
+        cache_stats = line_cache.stats()
+        print(f"Line detection cache: {cache_stats['hit_ratio']:.1%} hit ratio, {cache_stats['size']} entries, "
+              f"{cache_stats['evictions']} evictions")
+    routing_stats = get_routing_stats().stats()
+    if sum(routing_stats['pages'].values()):
+        pages = routing_stats['pages']
+        print(f"Script routing: {pages['english']} english, {pages['both']} both, {pages['hindi']} hindi pages; "
+              f"Hindi OCR skipped on {routing_stats['skipped']} pages, ~{routing_stats['estimated_seconds_saved']:.1f}s saved "
+              f"at {routing_stats['hindi_seconds_per_page']:.2f}s per Hindi page")
+    for ocr_store in get_ocr_stores():
+        store_stats = ocr_store.stats()
+        print(f"OCR result store: {store_stats['hit_ratio']:.1%} hit ratio, {store_stats['size']} pages stored")
+    document_cache = settings['document_cache']
+    if document_cache is not None:
+        document_stats = document_cache.stats()
+        print(f"Document cache: {document_stats['hits']} hits, {document_stats['misses']} misses, "
+              f"{document_stats['entries']} entries, {document_stats['bytes'] / (1024 * 1024):.1f} MB")
+
+    if not os.path.isdir(temp_dir):
+        # The in-memory path never creates it
+        return results
     try:
         shutil.rmtree(temp_dir)
         print(f"Temporary directory '{temp_dir}' removed.")
     except Exception as e:
-        print(f"Error removing temporary directory '{temp_dir}': {e}")
\ No newline at end of file
+        print(f"Error removing temporary directory '{temp_dir}': {e}")
+    return results
\ No newline at end of file
@@ -0,0 +1,74 @@
+# tests/test_chunked_crypto.py
+
+import os
+import sys
+from cryptography.fernet import InvalidToken
+from pipeline.encrypt import encrypt_bytes, CHUNKED_FORMAT, FERNET_FORMAT
+from pipeline.decrypt import decrypt_bytes
+from pipeline.chunked_crypto import (
+    encrypt_file_chunked, decrypt_file_chunked, decrypt_range, DEFAULT_CHUNK_SIZE, HEADER, MAGIC, FORMAT_VERSION
+)
+
+def rejected(data):
+    try:
+        decrypt_bytes(data)
+        return False
+    except InvalidToken:
+        return True
+
+def report(name, ok):
+    print(f"{name}: {'ok' if ok else 'FAILED'}")
+    return ok
+
+TRUNCATE = 1000
+
+def main():
+    plaintext = os.urandom(3 * DEFAULT_CHUNK_SIZE + 1234)
+    plain_path = os.path.join('output', 'chunked_sample.bin')
+    encrypted_path = os.path.join('output', 'chunked_sample.enc')
+    decrypted_path = os.path.join('output', 'chunked_sample_decrypted.bin')
+    os.makedirs('output', exist_ok=True)
+    with open(plain_path, 'wb') as file:
+        file.write(plaintext)
+
+    results = []
+    encrypt_file_chunked(plain_path, encrypted_path)
+    decrypt_file_chunked(encrypted_path, decrypted_path)
+    with open(decrypted_path, 'rb') as file:
+        results.append(report("Streamed round trip", file.read() == plaintext))
+
+    offset, length = DEFAULT_CHUNK_SIZE - 100, 500
+    results.append(report("Range across a chunk boundary",
+                          decrypt_range(encrypted_path, offset, length) == plaintext[offset:offset + length]))
+
+    for file_format in (FERNET_FORMAT, CHUNKED_FORMAT):
+        results.append(report(f"Auto-detected {file_format} decrypt",
+                              decrypt_bytes(encrypt_bytes(plaintext, file_format=file_format)) == plaintext))
+
+    with open(encrypted_path, 'rb') as file:
+        tampered = bytearray(file.read())
+    original = bytes(tampered)
+    tampered[-1] ^= 1
+    results.append(report("Tampered chunk rejected", rejected(bytes(tampered))))
+    results.append(report("Truncated file rejected", rejected(original[:-TRUNCATE])))
+    _, _, _, plaintext_size, nonce_prefix, salt = HEADER.unpack(original[:HEADER.size])
+    results.append(report("Zero chunk size rejected", rejected(
+        HEADER.pack(MAGIC, FORMAT_VERSION, 0, plaintext_size, nonce_prefix, salt) + original[HEADER.size:]
+    )))
+
+    # A failed decrypt must not leave the chunks verified before the bad one behind
+    with open(encrypted_path, 'wb') as file:
+        file.write(bytes(tampered))
+    os.remove(decrypted_path)
+    try:
+        decrypt_file_chunked(encrypted_path, decrypted_path)
+    except InvalidToken:
+        pass
+    results.append(report("No partial plaintext after a failed decrypt", not os.path.exists(decrypted_path)))
+
+    for path in (plain_path, encrypted_path):
+        os.remove(path)
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,43 @@
+# tests/test_hindi_bbox_mapping.py
+
+import sys
+import time
+from pipeline.hindi_detection import assemble_hindi_text, map_hindi_entities_to_bboxes
+
+def fragment(text, page, row, column):
+    x0, y0 = column * 0.2, row * 0.02
+    return {'text': text, 'bbox': ((x0, y0), (x0 + 0.15, y0 + 0.015)), 'page': page}
+
+def main(fragment_count=5000, entity_count=500):
+    words = ["राम", "कुमार", "शर्मा", "पिता", "का", "नाम", "पता", "जन्म", "तिथि"]
+    ocr_fragments = [
+        fragment(words[i % len(words)], i // 200, (i % 200) // 5, i % 5)
+        for i in range(fragment_count)
+    ]
+    text, fragments = assemble_hindi_text(ocr_fragments)
+    offsets_match = all(text[f['start']:f['end']] == f['text'] for f in fragments)
+    print(f"Offsets match the text: {offsets_match}")
+
+    # "कुमार शर्मा" spans two fragments: indices 1 and 2 of every cycle. A span across a page break gets one box per page
+    entities = []
+    for cycle in range(0, fragment_count // len(words), max(1, fragment_count // len(words) // entity_count)):
+        first, second = fragments[cycle * len(words) + 1], fragments[cycle * len(words) + 2]
+        entities.append({'name': "कुमार शर्मा", 'confidence': 0.9, 'start': first['start'], 'end': second['end']})
+
+    start = time.perf_counter()
+    mapped = map_hindi_entities_to_bboxes(entities, fragments)
+    seconds = time.perf_counter() - start
+    print(f"Mapped {len(entities)} entities to {len(mapped)} boxes over {len(fragments)} fragments in {seconds * 1000:.1f} ms")
+    print(f"First box: {mapped[0]['bounding_box']}, page {mapped[0]['page']}")
+    # The first entity covers columns 1 and 2 of the first row of page 0
+    first_box = mapped[0]['bounding_box']
+    first_ok = (mapped[0]['page'] == 0 and abs(first_box['left'] - 0.2) < 1e-9
+                and abs(first_box['left'] + first_box['width'] - 0.55) < 1e-9)
+
+    # Raw OCR fragments without offsets are assembled on the fly
+    same_from_raw = map_hindi_entities_to_bboxes(entities, ocr_fragments) == mapped
+    print(f"Same result from raw fragments: {same_from_raw}")
+    return offsets_match and len(mapped) >= len(entities) and first_ok and same_from_raw
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,68 @@
+# tests/test_hindi_ner_windows.py
+
+import sys
+import time
+from pipeline.model_registry import get_ner_pipeline, HINDI_NER_MODEL
+from pipeline.hindi_detection import perform_hindi_ner, split_token_windows
+
+SENTENCES = [
+    "पिता का नाम सुरेश शर्मा",
+    "राहुल कुमार शर्मा का जन्म पुणे में हुआ",
+    "आयकर विभाग भारत सरकार",
+    "प्रिया नायर का पता बेंगलुरु"
+]
+
+def spans(entities):
+    return [(entity['start'], entity['end']) for entity in entities]
+
+def check_windows(text, windows):
+    """
+    Whether the windows start at the beginning of the text, leave nothing but whitespace
+    between each other, reach its end and never cut a word at an edge inside the text.
+    """
+    covered = windows[0][0] == 0 and windows[-1][1] == len(text)
+    covered = covered and all(
+        not text[previous_end:start].strip() for (_, previous_end), (start, _) in zip(windows, windows[1:])
+    )
+    whole_words = all(
+        (start == 0 or text[start - 1].isspace()) and (end == len(text) or text[end].isspace())
+        for start, end in windows
+    )
+    return covered and whole_words and all(end > start for start, end in windows)
+
+def main(repeats=60, window_tokens=64, overlap_tokens=16, batch_sizes=(1, 4, 16)):
+    tokenizer = get_ner_pipeline(HINDI_NER_MODEL).tokenizer
+
+    # Short enough for one pass of the model, long enough to need several small windows
+    text = " ".join(SENTENCES * 8)
+    windows = split_token_windows(text, tokenizer, window_tokens, overlap_tokens)
+    whole = perform_hindi_ner(text, window_tokens=510)
+    chunked = perform_hindi_ner(text, window_tokens=window_tokens, overlap_tokens=overlap_tokens)
+    same_spans = spans(whole) == spans(chunked)
+    windows_ok = check_windows(text, windows)
+    print(f"{len(windows)} windows; whole text {len(whole)} names, windowed {len(chunked)} names")
+    print(f"Same spans as one pass: {same_spans}")
+    print(f"Windows cover the text on word boundaries: {windows_ok}")
+    # The first window starts at the beginning of the text, here on the whitespace before a word
+    spaced = "  " + text
+    spaced_ok = check_windows(spaced, split_token_windows(spaced, tokenizer, window_tokens, overlap_tokens))
+    print(f"Windows of text with leading whitespace: {spaced_ok}")
+    print(f"Names: {sorted(set(entity['name'] for entity in chunked))}")
+
+    # A multi-page document, far beyond the 512-token limit
+    text = " ".join(SENTENCES * repeats)
+    print(f"Long text: {len(tokenizer(text, add_special_tokens=False)['input_ids'])} tokens")
+    batched_spans = []
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        entities = perform_hindi_ner(text, batch_size=batch_size)
+        seconds = time.perf_counter() - start
+        print(f"batch_size {batch_size:>3}: {len(entities)} names in {seconds:.2f}s")
+        batched_spans.append(spans(entities))
+    # Batching changes only the speed, never the names found
+    same_across_batches = all(result == batched_spans[0] for result in batched_spans)
+    print(f"Same spans for every batch size: {same_across_batches}")
+    return same_spans and windows_ok and spaced_ok and same_across_batches
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
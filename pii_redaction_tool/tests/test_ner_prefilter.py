@@ -0,0 +1,57 @@
+# tests/test_ner_prefilter.py
+
+import sys
+from pipeline.pii_detection import prefilter_ner_lines
+
+# (line, contains a person/place/organisation that must be redacted)
+LABELED_LINES = [
+    ("GOVERNMENT OF INDIA", False),
+    ("Government of India", False),
+    ("Income Tax Department", False),
+    ("Permanent Account Number Card", False),
+    ("RAHUL KUMAR SHARMA", True),
+    ("Rahul Kumar Sharma", True),
+    ("Name: Priya Nair", True),
+    ("Father's Name", False),
+    ("SURESH SHARMA", True),
+    ("Date of Birth", False),
+    ("14/08/1992", False),
+    ("DOB: 14/08/1992", False),
+    ("1234 5678 9012", False),
+    ("ABCDE1234F", False),
+    ("Male", False),
+    ("FEMALE", False),
+    ("Address:", False),
+    ("S/O Suresh Sharma, 12 MG Road", True),
+    ("Bengaluru, Karnataka 560001", True),
+    ("Mera Aadhaar, Meri Pehchaan", False),
+    ("VID : 9123 4567 8901 2345", False),
+    ("Signature", False),
+    ("Issued by Regional Transport Office, Pune", True),
+    ("flat 4b, lake view apartments, kolkata", True),
+    ("MH12 20110012345", False),
+    ("Valid Till 13-05-2040", False)
+]
+
+def evaluate(require_capitalized):
+    lines = [line for line, _ in LABELED_LINES]
+    keep, skipped = prefilter_ner_lines(lines, require_capitalized=require_capitalized)
+    kept = set(keep)
+    missed = [line for index, (line, has_entity) in enumerate(LABELED_LINES) if has_entity and index not in kept]
+    entity_lines = sum(1 for _, has_entity in LABELED_LINES if has_entity)
+
+    print(f"require_capitalized={require_capitalized}: skipped {sum(skipped.values())} of {len(lines)} lines {skipped}")
+    print(f"  entity-line recall: {(entity_lines - len(missed)) / entity_lines:.2%}")
+    for line in missed:
+        print(f"  missed: {line}")
+    return missed
+
+def main():
+    # The default gate must keep every entity line; the capitalization heuristic is opt-in
+    # and trades recall on lower-case OCR output, so it is only reported
+    ok = not evaluate(require_capitalized=False)
+    evaluate(require_capitalized=True)
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,46 @@
+# tests/test_ocr_store_sharing.py
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+from cryptography.fernet import Fernet
+from pipeline.ocr_store import OcrResultStore
+
+def main():
+    work_dir = tempfile.mkdtemp(prefix='ocr_store_')
+    try:
+        path = os.path.join(work_dir, 'ocr_results.sqlite')
+        key = Fernet.generate_key()
+        # Two instances on one file, like two workflow worker processes
+        first = OcrResultStore(path, key=key, busy_timeout=1)
+        second = OcrResultStore(path, key=key, busy_timeout=1)
+        lines = [{'text': 'ABCDE1234F', 'left': 0.1, 'top': 0.1, 'width': 0.3, 'height': 0.05}]
+
+        first.put('doctr:test:page-1', lines)
+        shared = second.get('doctr:test:page-1') == lines
+        print(f"Hit from the other instance: {shared}")
+
+        # A hit must not leave a write transaction open that blocks the other writer
+        try:
+            first.put('doctr:test:page-2', lines)
+            second.put('doctr:test:page-3', lines)
+            first.flush()
+            second.flush()
+            print("Writers after a hit: ok")
+            writers_ok = True
+        except sqlite3.OperationalError as e:
+            print(f"Writers after a hit: {e}")
+            writers_ok = False
+
+        size = first.stats()['size']
+        journal_mode = first._db.execute('PRAGMA journal_mode').fetchone()[0]
+        print(f"Pages stored: {size} (expected 3)")
+        print(f"Journal mode: {journal_mode}")
+        return shared and writers_ok and size == 3 and journal_mode == 'wal'
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,51 @@
+# tests/test_onnx_parity.py
+
+import sys
+from pipeline.model_registry import get_ner_pipeline, ENGLISH_NER_MODEL, HINDI_NER_MODEL
+from pipeline.onnx_backend import compare_ner_outputs
+
+ENGLISH_CORPUS = [
+    "GOVERNMENT OF INDIA",
+    "Rahul Kumar Sharma",
+    "S/O Suresh Sharma, 12 MG Road, Bengaluru, Karnataka 560001",
+    "Income Tax Department",
+    "Name: Priya Nair DOB: 14/08/1992",
+    "Issued by Regional Transport Office, Pune",
+    "Election Commission of India",
+    "Address: Flat 4B, Lake View Apartments, Kolkata"
+]
+
+HINDI_CORPUS = [
+    "भारत सरकार",
+    "राहुल कुमार शर्मा",
+    "पिता का नाम सुरेश शर्मा",
+    "प्रिया नायर का जन्म पुणे में हुआ",
+    "आयकर विभाग"
+]
+
+MIN_AGREEMENT = 0.95
+
+def check(model_name, corpus):
+    torch_pipeline = get_ner_pipeline(model_name, backend='torch')
+    onnx_pipeline = get_ner_pipeline(model_name, backend='onnx')
+    report = compare_ner_outputs(torch_pipeline, onnx_pipeline, corpus)
+
+    print(f"{model_name}: agreement {report['agreement']:.3f} "
+          f"(matched {report['matched']}, missing {report['missing']}, extra {report['extra']})")
+    for mismatch in report['mismatches']:
+        print(f"  '{mismatch['text']}': missing {mismatch['missing']}, extra {mismatch['extra']}")
+    return report['agreement'] >= MIN_AGREEMENT
+
+def main():
+    results = [
+        check(ENGLISH_NER_MODEL, ENGLISH_CORPUS),
+        check(HINDI_NER_MODEL, HINDI_CORPUS)
+    ]
+    if all(results):
+        print("ONNX backend matches the PyTorch backend.")
+    else:
+        print(f"ONNX backend agreement is below {MIN_AGREEMENT}.")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,90 @@
+# tests/test_page_window_benchmark.py
+
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import fitz  # PyMuPDF
+from cryptography.fernet import Fernet
+
+def make_scanned_pdf(path, pages):
+    """
+    Writes a PDF whose pages are images of text with PII and no text layer, like a scanned bundle.
+    """
+    source = fitz.open()
+    page = source.new_page()
+    page.insert_text((72, 100), "Name: Ravi Kumar", fontsize=14)
+    page.insert_text((72, 130), "PAN: ABCDE1234F", fontsize=14)
+    page.insert_text((72, 160), "Date of Birth: 12/08/1990", fontsize=14)
+    scan = page.get_pixmap(dpi=150)
+
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page().insert_image(doc[-1].rect, pixmap=scan)
+    doc.save(path)
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def measure(path, page_window, results):
+    from pipeline.model_registry import get_ocr_predictor
+    from pipeline.workflow import new_document_context, rasterize_stage, ocr_stage, detect_stage, redact_stage
+
+    with open(path, 'rb') as file:
+        data = file.read()
+    # Load the model first so it is part of the baseline, not of the measurement
+    get_ocr_predictor()
+    baseline = peak_rss_mb()
+
+    context = new_document_context(
+        f"{path}.enc", os.devnull, {'pan': True, 'dob': True}, {}, True, False,
+        ocr_config={'text_layer': {'enabled': False}}, key=Fernet.generate_key(), page_window=page_window
+    )
+    context['data'] = data
+    start = time.perf_counter()
+    for stage in (rasterize_stage, ocr_stage, detect_stage, redact_stage):
+        stage(context)
+    results.put((baseline, peak_rss_mb(), time.perf_counter() - start, len(context['entities'])))
+
+def main(page_counts=(10, 50, 200), page_window=8):
+    work_dir = tempfile.mkdtemp(prefix='page_window_')
+    spawn = multiprocessing.get_context('spawn')
+    rows = []
+    try:
+        for pages in page_counts:
+            path = os.path.join(work_dir, f"bundle_{pages}.pdf")
+            make_scanned_pdf(path, pages)
+            for window in (0, page_window):
+                # A fresh process per run, so each peak RSS belongs to one document
+                results = spawn.Queue()
+                process = spawn.Process(target=measure, args=(path, window, results))
+                process.start()
+                baseline, peak, seconds, entities = results.get()
+                process.join()
+                rows.append((pages, window or 'whole', peak - baseline, peak, seconds, entities))
+
+        print(f"{'pages':>6} {'window':>7} {'peak RSS over baseline':>23} {'peak RSS':>9} {'seconds':>8} {'entities':>9}")
+        for pages, window, growth, peak, seconds, entities in rows:
+            print(f"{pages:>6} {window:>7} {growth:>20.0f} MB {peak:>6.0f} MB {seconds:>8.1f} {entities:>9}")
+
+        # Windows must find what the whole document finds, and on the largest bundle
+        # (where peak RSS is not noise) hold less in memory
+        ok = True
+        for whole, windowed in zip(rows[::2], rows[1::2]):
+            if whole[5] != windowed[5]:
+                print(f"{whole[0]} pages: {windowed[5]} entities with windows, {whole[5]} without")
+                ok = False
+        whole, windowed = rows[-2], rows[-1]
+        if windowed[2] > whole[2]:
+            print(f"{whole[0]} pages: windows grew peak RSS by {windowed[2]:.0f} MB, the whole document by {whole[2]:.0f} MB")
+            ok = False
+        return ok
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,53 @@
+# tests/test_rasterize.py
+
+import gc
+import io
+import sys
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+from pipeline.rasterize import render_page, render_pages, DEFAULT_DPI
+
+def main():
+    doc = fitz.open()
+    for page_num in range(2):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {page_num + 1}", fontsize=24)
+    data = doc.tobytes()
+
+    pages = render_pages('sample.pdf', data=data)
+    width, height = doc[0].rect.width, doc[0].rect.height
+    expected = (round(height * DEFAULT_DPI / 72), round(width * DEFAULT_DPI / 72), 3)
+    print(f"Pages rendered: {len(pages)}, shape {pages[0].shape} (expected {expected})")
+    checks = [len(pages) == 2, pages[0].shape == expected]
+
+    low = render_page(doc[0], dpi=72)
+    print(f"72 DPI shape: {low.shape}")
+    checks.append(low.shape == (round(height), round(width), 3))
+
+    image = render_page(doc[0])
+    buffer = np.frombuffer(image.pixmap.samples_mv, dtype=np.uint8)
+    shared = np.shares_memory(image, buffer)
+    read_only = not image.flags.writeable
+    print(f"Shares the pixmap buffer: {shared}")
+    print(f"Read-only: {read_only}")
+    checks += [shared, read_only]
+
+    # A slice must keep the pixmap alive after the page itself is dropped
+    region = image[:50]
+    checksum = int(region.sum())
+    del image, buffer
+    gc.collect()
+    still_valid = int(region.sum()) == checksum
+    print(f"Slice still valid after release: {still_valid}")
+    checks.append(still_valid)
+
+    png = io.BytesIO()
+    Image.fromarray(np.asarray(pages[0])).save(png, format='PNG')
+    loaded = render_pages('sample.png', data=png.getvalue())[0].shape
+    print(f"Image file loaded: {loaded}")
+    checks.append(loaded == expected)
+    return all(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
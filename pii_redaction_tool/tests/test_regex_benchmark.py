@@ -0,0 +1,139 @@
+# tests/test_regex_benchmark.py
+
+import random
+import re
+import sys
+import time
+from pipeline.pii_detection import get_id_patterns, get_date_patterns, scan_line, normalize_id_type, ADDITIONAL_DOB_PATTERN
+
+LINE_TEMPLATES = [
+    "GOVERNMENT OF INDIA",
+    "Income Tax Department",
+    "Name: {name}",
+    "Father's Name: {name}",
+    "DOB: {day:02d}/{month:02d}/{year}",
+    "Date of Birth: {day:02d}-{month:02d}-{year}",
+    "Aadhaar Card: {d4} {d4b} {d4c}",
+    "{d4} {d4b} {d4c}",
+    "Permanent Account Number {pan}",
+    "DL {state}{dl}",
+    "Voter ID Card: {voter}",
+    "Address: {house}, MG Road, Bengaluru 5600{pin:02d}",
+    "Issue Date {year}-{month:02d}-{day:02d}",
+    "Signature",
+    "VID : 9{d4} {d4b} {d4c}",
+    # Matches both the Ration Card and the Aadhaar rule
+    "RC {d4}{d4b}{d4c}"
+]
+NAMES = ["Rahul Kumar Sharma", "Priya Nair", "Amit Verma", "Sneha Iyer", "Mohammed Irfan"]
+STATES = ["MH", "KA", "DL", "TN", "UP"]
+
+def synthetic_corpus(size, seed=7):
+    rng = random.Random(seed)
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    lines = []
+    for _ in range(size):
+        template = rng.choice(LINE_TEMPLATES)
+        lines.append(template.format(
+            name=rng.choice(NAMES),
+            day=rng.randint(1, 28),
+            month=rng.randint(1, 12),
+            year=rng.randint(1950, 2010),
+            d4=rng.randint(1000, 9999),
+            d4b=rng.randint(1000, 9999),
+            d4c=rng.randint(1000, 9999),
+            pan="".join(rng.choice(letters) for _ in range(5)) + str(rng.randint(1000, 9999)) + rng.choice(letters),
+            state=rng.choice(STATES),
+            dl=rng.randint(1000000, 99999999),
+            voter="".join(rng.choice(letters) for _ in range(3)) + str(rng.randint(1000000, 9999999)),
+            house=rng.randint(1, 500),
+            pin=rng.randint(0, 99)
+        ))
+    return lines
+
+# The engine must beat the per-pattern loops by at least this much, on the whole corpus and
+# on the lines without a match (addresses with digits among them still run the alternation)
+MIN_SPEEDUP = 2.0
+MIN_NO_MATCH_SPEEDUP = 1.5
+
+def legacy_scan(lines, enabled_keys):
+    """
+    The previous detection loops: one pass over every line per pattern.
+    Returns the set of (line index, key) pairs that were detected, with (line index, 'dob', date)
+    for every date found.
+    """
+    detected = set()
+    for id_type, pattern in get_id_patterns().items():
+        key = normalize_id_type(id_type)
+        if key not in enabled_keys:
+            continue
+        for index, line in enumerate(lines):
+            if re.search(pattern, line, re.IGNORECASE):
+                detected.add((index, key))
+
+    if 'dob' in enabled_keys:
+        for date_fmt in get_date_patterns():
+            pattern = re.compile(date_fmt['pattern'], re.IGNORECASE | re.UNICODE)
+            for index, line in enumerate(lines):
+                for match in re.findall(pattern, line):
+                    detected.add((index, 'dob'))
+                    detected.add((index, 'dob', match[1]))
+        dob_pattern = re.compile(ADDITIONAL_DOB_PATTERN, re.IGNORECASE)
+        for index, line in enumerate(lines):
+            for match in dob_pattern.findall(line):
+                detected.add((index, 'dob'))
+                detected.add((index, 'dob', match))
+    return detected
+
+def engine_scan(lines, enabled_keys):
+    detected = set()
+    for index, line in enumerate(lines):
+        for match in scan_line(line, enabled_keys):
+            detected.add((index, match['key']))
+            if match['key'] == 'dob':
+                detected.add((index, 'dob', match['text']))
+    return detected
+
+def timed(scan, lines, enabled_keys):
+    start = time.perf_counter()
+    detected = scan(lines, enabled_keys)
+    return detected, time.perf_counter() - start
+
+def main(size=100000):
+    lines = synthetic_corpus(size)
+    enabled_keys = frozenset(['aadhar', 'pan', 'dl', 'voter', 'passport', 'ration_card', 'birth_certificate', 'dob'])
+    failures = []
+
+    legacy, legacy_time = timed(legacy_scan, lines, enabled_keys)
+    engine, engine_time = timed(engine_scan, lines, enabled_keys)
+    speedup = legacy_time / engine_time
+
+    print(f"Corpus: {size} lines")
+    print(f"Per-pattern loops:  {size / legacy_time:,.0f} lines/s")
+    print(f"Single-pass engine: {size / engine_time:,.0f} lines/s ({speedup:.1f}x)")
+    print(f"Detections only by the old loops: {len(legacy - engine)}, only by the engine: {len(engine - legacy)}")
+    if legacy != engine:
+        failures.append("engine and per-pattern loops disagree")
+    if speedup < MIN_SPEEDUP:
+        failures.append(f"engine is only {speedup:.1f}x faster (expected at least {MIN_SPEEDUP}x)")
+
+    # Lines without any ID or date, which most OCR lines are
+    plain = [line for line in lines if not engine_scan([line], enabled_keys)]
+    _, legacy_time = timed(legacy_scan, plain, enabled_keys)
+    _, engine_time = timed(engine_scan, plain, enabled_keys)
+    print(f"Lines without a match: {len(plain)}, engine {legacy_time / engine_time:.1f}x faster")
+    if legacy_time / engine_time < MIN_NO_MATCH_SPEEDUP:
+        failures.append(f"engine is only {legacy_time / engine_time:.1f}x faster on lines without a match")
+
+    overlap = "RC 123456789012"
+    keys = sorted(set(match['key'] for match in scan_line(overlap, enabled_keys)))
+    print(f"Overlapping rules on '{overlap}': {keys} (expected ['aadhar', 'ration_card'])")
+    if keys != ['aadhar', 'ration_card']:
+        failures.append("overlapping rules did not both fire")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    return not failures
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,32 @@
+# tests/test_script_routing.py
+
+import sys
+from pipeline.script_routing import route_page, route_pages, route_line_records
+
+def line(text, confidence):
+    return {'text': text, 'confidence': confidence}
+
+def main():
+    pages = {
+        0: [line("INCOME TAX DEPARTMENT", 0.97), line("ABCDE1234F", 0.99)],
+        1: [line("ncr fiqr", 0.21), line("arr", 0.14)],
+        2: [line("Name: Ravi Kumar", 0.95), line("qlcf", 0.18)],
+        3: [line("नाम: रवि कुमार", 1.0), line("PAN: ABCDE1234F", 1.0)],
+        4: [line("Ravi Kumar", None)],
+        5: []
+    }
+    expected = {0: 'english', 1: 'hindi', 2: 'both', 3: 'both', 4: 'hindi', 5: 'english'}
+    routes = route_pages(pages)
+    for page_index in sorted(routes):
+        print(f"Page {page_index + 1}: {routes[page_index]} (expected {expected[page_index]})")
+    print(f"All routes as expected: {routes == expected}")
+    # The on-disk pipeline routes from the document's flat list of line records
+    records = [dict(record, page=page_index) for page_index, lines in pages.items() for record in lines]
+    by_record = route_line_records(records, page_indices=pages)
+    print(f"Routing line records gives the same routes: {by_record == routes}")
+    strict = route_page(pages[0], min_confidence=0.98)
+    print(f"Stricter threshold sends page 1 to Hindi OCR: {strict}")
+    return routes == expected and by_record == routes and strict != 'english'
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
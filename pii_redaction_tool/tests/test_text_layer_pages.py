@@ -0,0 +1,42 @@
+# tests/test_text_layer_pages.py
+
+import io
+import sys
+import fitz  # PyMuPDF
+from PIL import Image
+from pipeline.ocr import iter_pages
+
+def scan_png(width=600, height=800):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'white').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def main():
+    doc = fitz.open()
+
+    # Born-digital page: text only
+    page = doc.new_page()
+    page.insert_text((72, 72), "Name: Ravi Kumar PAN ABCDE1234F", fontsize=12)
+
+    # Scanned page with a text footer: the footer must not stand in for the scan
+    page = doc.new_page()
+    page.insert_image(page.rect + (36, 36, -36, -72), stream=scan_png())
+    page.insert_text((72, page.rect.height - 40), "Page 2 of 3 - Confidential scan", fontsize=10)
+
+    # Searchable scan: the recognized text is laid over the image
+    page = doc.new_page()
+    page.insert_image(page.rect, stream=scan_png())
+    for row in range(40):
+        page.insert_text((20, 20 + row * 20), "Name Ravi Kumar Address MG Road Bengaluru 560001 " * 2, fontsize=14)
+
+    expected = {0: 'text layer', 1: 'OCR', 2: 'text layer'}
+    routes = {
+        page_index: 'text layer' if lines is not None else 'OCR'
+        for page_index, lines, _ in iter_pages('sample.pdf', data=doc.tobytes())
+    }
+    for page_index in sorted(routes):
+        print(f"Page {page_index + 1}: {routes[page_index]} (expected {expected[page_index]})")
+    return routes == expected
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -65,6 +65,7 @@ const PiiRedaction = () => {
     voter: true,
   });
   const [processedFiles, setProcessedFiles] = useState([]);
+  const [fileProgress, setFileProgress] = useState({});
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [sendLoading, setSendLoading] = useState(false);
@@ -237,6 +238,7 @@ const PiiRedaction = () => {
     }
 
     setProcessedFiles([]);
+    setFileProgress({});
     setPublicUrl(null);
     setSendError(null);
 
@@ -251,37 +253,94 @@ const PiiRedaction = () => {
     setError(null);
 
     try {
-      const response = await axios.post("http://127.0.0.1:5000/upload", formData, {
+      const response = await axios.post("http://127.0.0.1:5000/jobs", formData, {
         headers: { "Content-Type": "multipart/form-data" },
       });
 
-      if (response.data && response.data.processedFiles) {
-        setProcessedFiles(response.data.processedFiles);
+      if (response.data && response.data.job_id) {
+        followJob(response.data.job_id);
       } else if (response.data && response.data.error) {
         setError(response.data.error);
+        setLoading(false);
       } else {
         setError("An unexpected error occurred. Please try again.");
+        setLoading(false);
       }
     } catch (error) {
       console.error("Error uploading files:", error);
       setError("An error occurred while processing the files.");
-    } finally {
       setLoading(false);
     }
   };
 
+  // Streams job progress; finished files become downloadable while the rest are still processing
+  const followJob = (jobId) => {
+    const events = new EventSource(`http://127.0.0.1:5000/jobs/${jobId}/events`);
+
+    events.addEventListener("page", (e) => {
+      const data = JSON.parse(e.data);
+      setFileProgress((prev) => ({
+        ...prev,
+        [data.filename]: {
+          ...prev[data.filename],
+          stage: data.stage,
+          page: data.page + 1,
+          pages: data.pages || (prev[data.filename] && prev[data.filename].pages),
+        },
+      }));
+    });
+
+    events.addEventListener("file", (e) => {
+      const data = JSON.parse(e.data);
+      if (data.status === "done" && data.download_url) {
+        setProcessedFiles((prev) => [
+          ...prev,
+          { filename: data.output, download_url: data.download_url, job_id: jobId },
+        ]);
+      } else if (data.status === "failed") {
+        setError(`Failed to process ${data.filename}: ${data.error}`);
+      }
+      if (data.status === "done" || data.status === "failed") {
+        setFileProgress((prev) => {
+          const next = { ...prev };
+          delete next[data.filename];
+          return next;
+        });
+      }
+    });
+
+    events.addEventListener("job", (e) => {
+      const data = JSON.parse(e.data);
+      if (data.status === "done" || data.status === "failed") {
+        if (data.error) {
+          setError(`Error during processing: ${data.error}`);
+        }
+        events.close();
+        setLoading(false);
+      }
+    });
+
+    events.onerror = () => {
+      // The browser reconnects on its own unless the stream was closed
+      if (events.readyState === EventSource.CLOSED) {
+        setError("Lost connection to the server while processing the files.");
+        setLoading(false);
+      }
+    };
+  };
+
   const handleDownload = (fileObj) => {
     window.open(fileObj.download_url, "_blank");
     setProcessedFiles((prev) => prev.filter((f) => f.filename !== fileObj.filename));
   };
 
-  const handleSendToS3 = async (filename) => {
+  const handleSendToS3 = async (filename, jobId) => {
     setSendLoading(true);
     setSendError(null);
     setPublicUrl(null);
 
     try {
-      const response = await axios.post("http://127.0.0.1:5000/send_to_s3", { filename });
+      const response = await axios.post("http://127.0.0.1:5000/send_to_s3", { filename, job_id: jobId });
 
       if (response.data && response.data.public_url) {
         setPublicUrl(response.data.public_url);
@@ -548,6 +607,23 @@ const PiiRedaction = () => {
 
       {error && <div className="text-red-600 font-medium mt-4 text-center">{error}</div>}
 
+      {Object.keys(fileProgress).length > 0 && (
+        <div className="w-full max-w-2xl bg-white shadow-md rounded-lg p-6 mt-8 mx-auto">
+          <h2 className="text-lg font-semibold mb-4">In Progress</h2>
+          <ul className="space-y-2">
+            {Object.entries(fileProgress).map(([filename, progress]) => (
+              <li key={filename} className="flex justify-between items-center bg-gray-50 p-2 rounded">
+                <span>{filename}</span>
+                <span className="text-gray-600">
+                  {progress.stage} page {progress.page}
+                  {progress.pages ? ` of ${progress.pages}` : ""}
+                </span>
+              </li>
+            ))}
+          </ul>
+        </div>
+      )}
+
       {processedFiles.length > 0 && (
         <div className="w-full max-w-2xl bg-white shadow-md rounded-lg p-6 mt-8 mx-auto">
           <h2 className="text-lg font-semibold mb-4">Processed Files</h2>
@@ -571,7 +647,7 @@ const PiiRedaction = () => {
                     onClick={() => handleDownload(fileObj)}
                   />
                   <button
-                    onClick={() => handleSendToS3(fileObj.filename)}
+                    onClick={() => handleSendToS3(fileObj.filename, fileObj.job_id)}
                     disabled={sendLoading}
                     className={`px-4 py-2 rounded-lg font-bold ${
                       sendLoading